@@ -0,0 +1,13 @@
+"""
+@file: conftest.py
+@description: Окружение микробенчмарков: настройки как в тестах (до импорта сервисов), без
+    Redis и Telegram; БД нужна только бенчмарку relay outbox (без неё он пропускается). Запуск и
+    сравнение с базовой линией — scripts/bench-micro.sh.
+@dependencies: pytest, pytest-benchmark
+@created: 2026-10-19
+"""
+
+import os
+
+os.environ.setdefault("CELERY_BROKER_URL", "")
+os.environ.setdefault("REALTIME_ENABLED", "false")
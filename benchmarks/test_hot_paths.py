@@ -0,0 +1,189 @@
+"""
+@file: test_hot_paths.py
+@description: Микробенчмарки чисто-Python горячих путей: JWT, проверка initData Telegram, ключ
+    rate limit, валидация ответов OrderResponse/SlotResponse, клавиатуры пикера слотов бота,
+    тексты уведомлений воркера. Входные данные фиксированы — результаты сравнимы между коммитами.
+@dependencies: pytest-benchmark, services.api, services.bot, services.worker
+@created: 2026-10-19
+"""
+
+import hashlib
+import hmac
+import time
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from db.models import Order, OrderStatus, Slot, SlotStatus
+from services.api.auth import (
+    create_access_token,
+    decode_token,
+    verify_telegram_login_init_data,
+)
+from services.api.config import settings
+from services.api.middleware import _rate_limit_key
+from services.api.routers.orders import OrderResponse
+from services.bot.handlers.order_flow import _day_keyboard, _slot_keyboard
+from services.bot.slot_cache import group_free_slots
+from services.worker.tasks import (
+    OrderNotice,
+    _format_new_order_advertiser,
+    _format_new_order_owner,
+    _format_payment_received,
+)
+from shared.schemas.slot import SlotResponse
+
+BOT_TOKEN = "123456:bench-token"
+TENANT_ID = UUID("00000000-0000-0000-0000-0000000000aa")
+CHANNEL_ID = UUID("00000000-0000-0000-0000-0000000000cc")
+START = datetime(2026, 10, 20, 9, tzinfo=UTC)
+# Размер страницы списочных эндпоинтов
+PAGE = 100
+
+
+def _uuid(n: int) -> UUID:
+    return UUID(int=n)
+
+
+@pytest.fixture
+def bot_token(monkeypatch):
+    monkeypatch.setattr(settings, "telegram_bot_token", BOT_TOKEN)
+    return BOT_TOKEN
+
+
+def _init_data(bot_token: str) -> str:
+    fields = {
+        "auth_date": str(int(time.time())),
+        "query_id": "AAHdF6IQAAAAAN0XohDhrOrc",
+        "user": '{"id":123456789,"first_name":"Bench","username":"bench","language_code":"ru"}',
+    }
+    data_check_string = "\n".join(f"{k}={fields[k]}" for k in sorted(fields))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return "&".join(f"{k}={v}" for k, v in fields.items())
+
+
+def test_jwt_encode(benchmark):
+    token = benchmark(create_access_token, 123456789, TENANT_ID)
+    assert token.count(".") == 2
+
+
+def test_jwt_decode(benchmark):
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=create_access_token(123456789, TENANT_ID)
+    )
+    payload = benchmark(decode_token, credentials)
+    assert payload["sub"] == "123456789"
+
+
+def test_verify_telegram_init_data(benchmark, bot_token):
+    parsed = benchmark(verify_telegram_login_init_data, _init_data(bot_token))
+    assert parsed["query_id"]
+
+
+def test_rate_limit_key_jwt(benchmark):
+    # Request создаётся на каждый вызов, как в middleware
+    scope = {
+        "type": "http",
+        "headers": [
+            (b"host", b"api.lytslot.local"),
+            (b"user-agent", b"Mozilla/5.0"),
+            (b"accept", b"application/json"),
+            (b"authorization", f"Bearer {create_access_token(123456789)}".encode()),
+        ],
+        "client": ("203.0.113.7", 51000),
+    }
+    key = benchmark(lambda: _rate_limit_key(Request(scope)))
+    assert key == "user:123456789"
+
+
+def test_rate_limit_key_ip(benchmark):
+    scope = {"type": "http", "headers": [(b"host", b"api")], "client": ("203.0.113.7", 51000)}
+    key = benchmark(lambda: _rate_limit_key(Request(scope)))
+    assert key == "ip:203.0.113.7"
+
+
+def test_order_response_validation(benchmark):
+    orders = [
+        Order(
+            id=_uuid(i),
+            advertiser_id=100_000 + i,
+            channel_id=CHANNEL_ID,
+            slot_id=_uuid(10_000 + i),
+            content={"text": f"Реклама {i}", "media": []},
+            erid=f"erid{i:08d}",
+            status=OrderStatus.PAID,
+            created_at=START,
+            updated_at=START,
+        )
+        for i in range(PAGE)
+    ]
+    result = benchmark(lambda: [OrderResponse.model_validate(o) for o in orders])
+    assert len(result) == PAGE
+
+
+def test_slot_response_validation(benchmark):
+    slots = [
+        Slot(
+            id=_uuid(i),
+            channel_id=CHANNEL_ID,
+            datetime=START + timedelta(hours=i),
+            status=SlotStatus.FREE,
+            created_at=START,
+        )
+        for i in range(PAGE)
+    ]
+    result = benchmark(lambda: [SlotResponse.model_validate(s) for s in slots])
+    assert len(result) == PAGE
+
+
+def _api_slots(days: int, per_day: int) -> list[dict]:
+    return [
+        {
+            "id": str(_uuid(d * 100 + h)),
+            "datetime": (START + timedelta(days=d, minutes=30 * h)).isoformat(),
+            "status": "free" if h % 5 else "reserved",
+        }
+        for d in range(days)
+        for h in range(per_day)
+    ]
+
+
+def test_group_free_slots(benchmark):
+    days = benchmark(group_free_slots, _api_slots(14, 24))
+    assert len(days) == 14
+
+
+def test_day_keyboard(benchmark):
+    days = group_free_slots(_api_slots(14, 24))
+    markup = benchmark(_day_keyboard, days, 1)
+    assert markup.inline_keyboard
+
+
+def test_slot_keyboard(benchmark):
+    day, slots = group_free_slots(_api_slots(1, 48))[0]
+    markup = benchmark(_slot_keyboard, day, slots, 1)
+    assert markup.inline_keyboard
+
+
+def test_notification_texts(benchmark):
+    notice = OrderNotice(
+        id=_uuid(42),
+        status=OrderStatus.DRAFT,
+        advertiser_id=100_042,
+        channel_username="bench_channel",
+        owner_telegram_id=123456789,
+    )
+
+    def render() -> tuple[str, str, str]:
+        return (
+            _format_new_order_owner(notice),
+            _format_new_order_advertiser(notice),
+            _format_payment_received(notice, "1500.00"),
+        )
+
+    texts = benchmark(render)
+    assert all(texts)
@@ -0,0 +1,64 @@
+"""
+@file: test_outbox_relay.py
+@description: Пропускная способность relay outbox на живой БД: пачки по 500, отправка в порядке
+    записи. Relay забирает только строки своей задачи — чужие сообщения общей БД не трогаются.
+    Без БД (DATABASE_URL_SYNC) бенчмарк пропускается.
+@dependencies: pytest-benchmark, db.database, services.worker.outbox_relay
+@created: 2026-10-19
+"""
+
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from db.models import OutboxMessage
+from services.worker.outbox_relay import relay_batch
+
+TASK_NAME = f"bench.outbox.{uuid4()}"
+COUNT = 2000
+# Нижняя граница с большим запасом: регрессия на порядок (построчный commit/отправка) её пробьёт
+MIN_MESSAGES_PER_S = 500
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        session.execute(text("SELECT 1"))
+    except OperationalError:
+        session.close()
+        pytest.skip("нужна БД (DATABASE_URL_SYNC)")
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.execute(delete(OutboxMessage).where(OutboxMessage.task_name == TASK_NAME))
+        session.commit()
+        session.close()
+
+
+def _fill(db: Session):
+    db.add_all([OutboxMessage(task_name=TASK_NAME, kwargs={"n": i}) for i in range(COUNT)])
+    db.commit()
+    return (db,), {}
+
+
+def _drain(db: Session) -> tuple[list[int], float]:
+    sent: list[int] = []
+    started = time.perf_counter()
+    while relay_batch(
+        db, lambda name, kwargs: sent.append(kwargs["n"]), limit=500, task_names=[TASK_NAME]
+    ):
+        pass
+    return sent, time.perf_counter() - started
+
+
+def test_outbox_relay_throughput(benchmark, db):
+    sent, elapsed = benchmark.pedantic(_drain, setup=lambda: _fill(db), rounds=3)
+    assert sent == list(range(COUNT))
+    assert COUNT / elapsed >= MIN_MESSAGES_PER_S
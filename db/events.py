@@ -0,0 +1,161 @@
+"""
+@file: events.py
+@description: Доменные события для real-time: копятся в сессии SQLAlchemy и после успешного
+    commit публикуются в Redis pub/sub (канал dashboard:<tenant_id>); смены статуса заказа
+    дополнительно пишутся в ограниченный по длине поток order-events:<tenant_id> (для SSE).
+    Публикация — в фоновом потоке процесса: Redis не на пути запроса, записавшего данные.
+@dependencies: sqlalchemy, redis
+@created: 2026-10-19
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import redis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# false — события не публикуются (тесты, окружения без Redis)
+REALTIME_ENABLED = os.getenv("REALTIME_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+DASHBOARD_CHANNEL_PREFIX = "dashboard:"
+ORDER_STREAM_PREFIX = "order-events:"
+# Сколько последних смен статуса хранится на тенанта (XADD MAXLEN ~)
+ORDER_STREAM_MAXLEN = int(os.getenv("ORDER_STREAM_MAXLEN", "10000"))
+# Очередь фонового публикатора (commit'ов с событиями); переполнение — события отбрасываются
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "10000"))
+# Сколько commit'ов склеивается в один pipeline
+EVENTS_BATCH_COMMITS = 100
+
+_PENDING_KEY = "dashboard_events"
+_client: redis.Redis | None = None
+_client_pid: int | None = None
+_queue: queue.Queue | None = None
+_queue_lock = threading.Lock()
+
+
+def dashboard_channel(tenant_id: UUID | str) -> str:
+    return f"{DASHBOARD_CHANNEL_PREFIX}{tenant_id}"
+
+
+def order_stream_key(tenant_id: UUID | str) -> str:
+    return f"{ORDER_STREAM_PREFIX}{tenant_id}"
+
+
+def record_event(db: Session, tenant_id: UUID | str | None, type_: str, **data: Any) -> None:
+    """Запомнить событие тенанта; уйдёт в Redis после commit этой сессии, при rollback — нет."""
+    if tenant_id is None:
+        return
+    db.info.setdefault(_PENDING_KEY, []).append((str(tenant_id), {"type": type_, **data}))
+
+
+def _get_client() -> redis.Redis:
+    """Ленивый клиент процесса (пересоздаётся после fork воркера); короткие таймауты."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.from_url(REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+        _client_pid = os.getpid()
+    return _client
+
+
+def publish_events(events: list[tuple[str, dict[str, Any]]]) -> None:
+    """Опубликовать события одним pipeline. Best effort: ошибка Redis не ломает бизнес-операцию."""
+    if not events or not REALTIME_ENABLED:
+        return
+    try:
+        pipe = _get_client().pipeline(transaction=False)
+        now = datetime.now(UTC).isoformat()
+        for tenant_id, payload in events:
+            pipe.publish(dashboard_channel(tenant_id), json.dumps(payload, default=str))
+            if payload["type"] == "order" and payload.get("status"):
+                pipe.xadd(
+                    order_stream_key(tenant_id),
+                    {"order_id": payload["id"], "status": str(payload["status"]), "ts": now},
+                    maxlen=ORDER_STREAM_MAXLEN,
+                    approximate=True,
+                )
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Dashboard events not published (%s): %s", len(events), e)
+
+
+def _drain(q: queue.Queue) -> None:
+    while True:
+        batches = [q.get()]
+        while len(batches) < EVENTS_BATCH_COMMITS:
+            try:
+                batches.append(q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            publish_events([e for batch in batches for e in batch])
+        except Exception:
+            logger.exception("Dashboard events publisher failed")
+        finally:
+            for _ in batches:
+                q.task_done()
+
+
+def _publisher_queue() -> queue.Queue:
+    """Очередь и поток публикации процесса; создаются при первом событии."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                q: queue.Queue = queue.Queue(EVENTS_QUEUE_SIZE)
+                threading.Thread(
+                    target=_drain, args=(q,), name="events-publisher", daemon=True
+                ).start()
+                _queue = q
+    return _queue
+
+
+def enqueue_events(events: list[tuple[str, dict[str, Any]]]) -> None:
+    """Передать события фоновому потоку; put не ждёт — при переполнении события теряются."""
+    if not events or not REALTIME_ENABLED:
+        return
+    try:
+        _publisher_queue().put_nowait(events)
+    except queue.Full:
+        logger.warning("Dashboard events dropped, publisher queue full (%s)", len(events))
+
+
+def flush(timeout: float = 2.0) -> None:
+    """Дождаться публикации поставленных событий (выход процесса, тесты)."""
+    q = _queue
+    deadline = time.monotonic() + timeout
+    while q is not None and q.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _reset_after_fork() -> None:
+    # Поток родителя в дочернем процессе не существует: очередь и поток — заново, по требованию
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    enqueue_events(session.info.pop(_PENDING_KEY, []))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    # Срабатывает и после commit (события уже отправлены), и после rollback/close — отбрасываем
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
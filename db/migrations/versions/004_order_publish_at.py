@@ -0,0 +1,38 @@
+"""Add orders.publish_at + partial index for the publish scheduler.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("publish_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        """UPDATE orders SET publish_at = slots.datetime
+           FROM slots
+           WHERE slots.id = orders.slot_id
+             AND orders.status IN ('draft', 'paid', 'marked')
+             AND slots.datetime > now()"""
+    )
+    op.create_index(
+        "ix_orders_publish_due",
+        "orders",
+        ["publish_at"],
+        postgresql_where=sa.text("status IN ('draft', 'paid', 'marked')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_publish_due", table_name="orders")
+    op.drop_column("orders", "publish_at")
@@ -0,0 +1,32 @@
+"""Add orders.publish_state / publish_attempts / telegram_message_id (idempotent publish).
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("orders", sa.Column("publish_state", sa.String(16), nullable=True))
+    op.add_column(
+        "orders",
+        sa.Column("publish_attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("orders", sa.Column("telegram_message_id", sa.BigInteger(), nullable=True))
+    op.execute("UPDATE orders SET publish_state = 'sent' WHERE status = 'published'")
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "telegram_message_id")
+    op.drop_column("orders", "publish_attempts")
+    op.drop_column("orders", "publish_state")
@@ -0,0 +1,34 @@
+"""Add webhook_events table (payment webhook dedup by provider event id).
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("provider", sa.String(32), nullable=False),
+        sa.Column("event_id", sa.String(255), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("provider", "event_id", name="uq_webhook_events_event"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("webhook_events")
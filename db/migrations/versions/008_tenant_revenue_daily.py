@@ -0,0 +1,46 @@
+"""Add tenant_revenue_daily materialized view (admin revenue by tenant and day).
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Успешные платежи по (тенант, день UTC): оборот и доля платформы (revenue_share тенанта).
+    # Обновляется задачей refresh_revenue_view (REFRESH ... CONCURRENTLY) от имени владельца
+    # представления — RLS исходных таблиц к нему не применяется.
+    op.execute(
+        """CREATE MATERIALIZED VIEW tenant_revenue_daily AS
+        SELECT
+            c.tenant_id,
+            (date_trunc('day', p.created_at AT TIME ZONE 'UTC'))::date AS day,
+            count(*) AS payments_count,
+            sum(p.amount) AS gross,
+            round(sum(p.amount * t.revenue_share), 2) AS platform_revenue
+        FROM payments p
+        JOIN orders o ON o.id = p.order_id
+        JOIN channels c ON c.id = o.channel_id
+        JOIN tenants t ON t.id = c.tenant_id
+        WHERE p.status = 'succeeded'
+        GROUP BY c.tenant_id, 2
+        WITH DATA"""
+    )
+    # Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute(
+        "CREATE UNIQUE INDEX ux_tenant_revenue_daily ON tenant_revenue_daily (tenant_id, day)"
+    )
+    op.execute("CREATE INDEX ix_tenant_revenue_daily_day ON tenant_revenue_daily (day)")
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS tenant_revenue_daily")
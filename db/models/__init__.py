@@ -7,11 +7,13 @@
 
 from db.models.api_key import ApiKey
 from db.models.channel import Channel
-from db.models.order import Order, OrderStatus
+from db.models.order import PENDING_PUBLISH_STATUSES, Order, OrderStatus, PublishState
+from db.models.outbox import OutboxMessage
 from db.models.payment import Payment
 from db.models.slot import Slot, SlotStatus
 from db.models.tenant import Tenant
 from db.models.view import View
+from db.models.webhook_event import WebhookEvent
 
 __all__ = [
     "Tenant",
@@ -21,6 +23,10 @@ __all__ = [
     "SlotStatus",
     "Order",
     "OrderStatus",
+    "PENDING_PUBLISH_STATUSES",
+    "PublishState",
+    "OutboxMessage",
     "Payment",
     "View",
+    "WebhookEvent",
 ]
@@ -12,7 +12,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, String
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, Integer, String, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -33,8 +33,30 @@ class OrderStatus(enum.StrEnum):
     CANCELLED = "cancelled"
 
 
+class PublishState(enum.StrEnum):
+    """Исход последней попытки публикации (запись идемпотентности publish_order)."""
+
+    SENDING = "sending"  # отправка начата; при зависании — ручная проверка, повтор запрещён
+    SENT = "sent"  # Telegram принял пост, telegram_message_id сохранён
+    FAILED = "failed"  # Telegram точно не принял пост — можно повторить
+    UNKNOWN = "unknown"  # результат неизвестен (таймаут ответа) — повтор запрещён
+    SKIPPED = "skipped"  # BOT_TOKEN не задан: пост не отправлялся, просмотр записан; повтор можно
+
+
+# Статусы заказов, ожидающих публикации: планировщик переводит их в SCHEDULED в момент слота.
+PENDING_PUBLISH_STATUSES = (OrderStatus.DRAFT, OrderStatus.PAID, OrderStatus.MARKED)
+
+
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Частичный индекс по времени публикации: планировщик читает только «созревшие» заказы.
+        Index(
+            "ix_orders_publish_due",
+            "publish_at",
+            postgresql_where=text("status IN ('draft', 'paid', 'marked')"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     advertiser_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
@@ -54,6 +76,12 @@ class Order(Base):
         default=OrderStatus.DRAFT,
         nullable=False,
     )
+    # Время публикации (копия Slot.datetime на момент создания заказа) — для планировщика.
+    publish_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Идемпотентность публикации: исход попытки, число попыток и id поста в канале
+    publish_state: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    publish_attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    telegram_message_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
@@ -0,0 +1,28 @@
+"""
+@file: outbox.py
+@description: Outbox model - задачи Celery, записанные в той же транзакции, что и изменение данных.
+@dependencies: db.base
+@created: 2026-10-19
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Identity, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.base import Base
+
+
+class OutboxMessage(Base):
+    """Событие для relay: имя задачи Celery + kwargs. Удаляется после отправки в брокер."""
+
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    task_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    kwargs: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<OutboxMessage id={self.id} task_name={self.task_name!r}>"
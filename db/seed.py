@@ -1,6 +1,7 @@
 """
 @file: seed.py
 @description: Тестовые данные для всех сущностей (tenant, channels, slots, orders, views, api_keys).
+    Объёмные данные для замеров: python -m db.seed scale (db/seed_scale.py).
 @dependencies: db.database, db.models
 @created: 2025-02-19
 """
@@ -568,5 +569,9 @@ if __name__ == "__main__":
 
     if len(sys.argv) > 1 and sys.argv[1] == "extra":
         seed_extra()
+    elif len(sys.argv) > 1 and sys.argv[1] == "scale":
+        from db.seed_scale import main as seed_scale
+
+        seed_scale(sys.argv[2:])
     else:
         seed_demo()
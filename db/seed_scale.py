@@ -0,0 +1,315 @@
+"""
+@file: seed_scale.py
+@description: Генератор данных для нагрузочных замеров: тенанты × каналы × слоты × заказы ×
+    платежи × просмотры со скошенными распределениями, загрузка через COPY. Детерминирован:
+    одинаковые параметры (seed, base_date) дают одинаковые строки.
+@dependencies: db.database, psycopg2
+@created: 2026-10-19
+
+Запуск: python -m db.seed scale --tenants 200 --views-per-order 100 --seed 42
+"""
+
+import argparse
+import json
+import math
+import random
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from typing import IO
+
+# telegram_id тенантов генератора: SCALE_TELEGRAM_ID_START + номер (loadtest --telegram-ids)
+SCALE_TELEGRAM_ID_START = 900_000_000
+ADVERTISER_ID_START = 100_000_000
+
+# Порядок загрузки — по внешним ключам
+TABLES: dict[str, tuple[str, ...]] = {
+    "tenants": ("id", "telegram_id", "name", "revenue_share", "created_at", "updated_at"),
+    "channels": (
+        "id",
+        "tenant_id",
+        "username",
+        "slot_duration",
+        "price_per_slot",
+        "is_active",
+        "created_at",
+        "updated_at",
+    ),
+    "slots": ("id", "channel_id", "datetime", "status", "created_at"),
+    "orders": (
+        "id",
+        "advertiser_id",
+        "channel_id",
+        "slot_id",
+        "content",
+        "erid",
+        "status",
+        "publish_at",
+        "publish_state",
+        "publish_attempts",
+        "telegram_message_id",
+        "created_at",
+        "updated_at",
+    ),
+    "payments": (
+        "id",
+        "order_id",
+        "provider",
+        "invoice_id",
+        "amount",
+        "status",
+        "created_at",
+        "updated_at",
+    ),
+    "views": ("id", "order_id", "timestamp"),
+}
+
+PAST_STATUSES = (("published", 0.88), ("cancelled", 0.12))
+FUTURE_STATUSES = (("draft", 0.25), ("paid", 0.35), ("marked", 0.15), ("scheduled", 0.25))
+PAID_STATUSES = {"paid", "marked", "scheduled", "published"}
+
+
+@dataclass(frozen=True)
+class ScaleParams:
+    """Параметры генерации; средние значения — распределения вокруг них скошены."""
+
+    tenants: int = 100
+    channels_per_tenant: float = 5.0  # среднее, Парето: у немногих тенантов десятки каналов
+    slots_per_day: int = 4
+    days_back: int = 90
+    days_ahead: int = 30
+    booking_rate: float = 0.35  # средняя доля занятых слотов; популярные каналы — почти все
+    views_per_order: float = 50.0  # среднее, логнормальное по заказам
+    advertisers: int = 20_000  # степенное распределение: немногие рекламодатели — много заказов
+    seed: int = 42
+    base_date: date = field(default_factory=lambda: datetime.now(UTC).date())
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _choice(rng: random.Random, weighted: tuple[tuple[str, float], ...]) -> str:
+    point = rng.random()
+    for value, weight in weighted:
+        point -= weight
+        if point < 0:
+            return value
+    return weighted[-1][0]
+
+
+def _ts(value: datetime) -> str:
+    return value.isoformat()
+
+
+def _row(values) -> str:
+    """Строка COPY (text): табуляция между полями, \\N — NULL."""
+    out = []
+    for v in values:
+        if v is None:
+            out.append("\\N")
+        else:
+            out.append(str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n"))
+    return "\t".join(out) + "\n"
+
+
+def write_scale_data(params: ScaleParams, files: dict[str, IO[str]]) -> dict[str, int]:
+    """
+    Записать строки COPY в files[table] для каждой таблицы TABLES; вернуть число строк.
+    Все случайные значения — из одного random.Random(seed) в фиксированном порядке.
+    """
+    rng = random.Random(params.seed)
+    counts = dict.fromkeys(TABLES, 0)
+    now = datetime.combine(params.base_date, datetime.min.time(), tzinfo=UTC)
+    first_day = now - timedelta(days=params.days_back)
+    # Слоты дня — равномерно с 09:00 до 22:00
+    slot_offsets = [
+        timedelta(hours=9, minutes=h * 13 * 60 // params.slots_per_day)
+        for h in range(params.slots_per_day)
+    ]
+    # Среднее логнормального(0, 1) — нормировка популярности канала
+    mean_weight = math.exp(0.5)
+    sigma_views = 1.2
+    mu_views = math.log(max(params.views_per_order, 1e-9)) - sigma_views**2 / 2
+    published: list[tuple[uuid.UUID, datetime, float]] = []
+
+    def write(table: str, values) -> None:
+        files[table].write(_row(values))
+        counts[table] += 1
+
+    for t in range(params.tenants):
+        tenant_id = _uuid(rng)
+        tenant_created = first_day - timedelta(days=rng.randint(1, 365))
+        write(
+            "tenants",
+            (
+                tenant_id,
+                SCALE_TELEGRAM_ID_START + t,
+                f"Scale Tenant {t}",
+                "0.2",
+                _ts(tenant_created),
+                _ts(tenant_created),
+            ),
+        )
+        pareto = rng.paretovariate(1.5)  # среднее 3
+        n_channels = max(1, min(round(pareto * params.channels_per_tenant / 3), 200))
+        for c in range(n_channels):
+            channel_id = _uuid(rng)
+            weight = rng.lognormvariate(0, 1) / mean_weight
+            price = max(100, round(rng.lognormvariate(math.log(1500), 0.6), -2))
+            write(
+                "channels",
+                (
+                    channel_id,
+                    tenant_id,
+                    f"scale_{t}_{c}",
+                    3600,
+                    f"{price:.2f}",
+                    "t" if rng.random() > 0.05 else "f",
+                    _ts(tenant_created),
+                    _ts(tenant_created),
+                ),
+            )
+            booking = min(0.98, params.booking_rate * weight)
+            for day in range(params.days_back + params.days_ahead):
+                for offset in slot_offsets:
+                    slot_at = first_day + timedelta(days=day) + offset
+                    slot_id = _uuid(rng)
+                    slot_status = "blocked" if rng.random() < 0.02 else "free"
+                    if slot_status == "free" and rng.random() < booking:
+                        order_status = _choice(
+                            rng, PAST_STATUSES if slot_at < now else FUTURE_STATUSES
+                        )
+                        if order_status in PAID_STATUSES:
+                            slot_status = "paid"
+                        elif order_status == "draft":
+                            slot_status = "reserved"
+                        order_id = _uuid(rng)
+                        created = min(slot_at - timedelta(hours=rng.uniform(2, 14 * 24)), now)
+                        advertiser = ADVERTISER_ID_START + int(
+                            params.advertisers * rng.random() ** 3
+                        )
+                        is_published = order_status == "published"
+                        write(
+                            "orders",
+                            (
+                                order_id,
+                                advertiser,
+                                channel_id,
+                                slot_id,
+                                json.dumps({"text": f"Scale ad {order_id.hex[:8]}"}),
+                                f"scale{order_id.hex[:10]}" if order_status != "draft" else None,
+                                order_status,
+                                _ts(slot_at),
+                                "sent" if is_published else None,
+                                1 if is_published else 0,
+                                rng.randint(1, 10**6) if is_published else None,
+                                _ts(created),
+                                _ts(slot_at if is_published else created),
+                            ),
+                        )
+                        if order_status in PAID_STATUSES:
+                            paid_at = created + timedelta(minutes=rng.uniform(1, 120))
+                            write(
+                                "payments",
+                                (
+                                    _uuid(rng),
+                                    order_id,
+                                    "yookassa" if rng.random() < 0.8 else "stripe",
+                                    f"inv_{order_id.hex}",
+                                    f"{price:.2f}",
+                                    "succeeded",
+                                    _ts(paid_at),
+                                    _ts(paid_at),
+                                ),
+                            )
+                        if is_published:
+                            published.append((order_id, slot_at, weight))
+                    write("slots", (slot_id, channel_id, _ts(slot_at), slot_status, _ts(slot_at)))
+
+    # Просмотры: число на заказ — логнормальное (с поправкой на популярность канала),
+    # время — экспоненциальное затухание от публикации (половина — в первые ~4 часа)
+    # Самая большая таблица: строка собирается без _row (экранировать нечего)
+    views, expovariate = files["views"], rng.expovariate
+    for order_id, published_at, weight in published:
+        mu = mu_views + math.log(max(weight, 0.05)) / 2
+        for _ in range(int(rng.lognormvariate(mu, sigma_views))):
+            seen_at = published_at + timedelta(hours=expovariate(1 / 6))
+            if seen_at < now:
+                views.write(f"{_uuid(rng)}\t{order_id}\t{seen_at.isoformat()}\n")
+                counts["views"] += 1
+    return counts
+
+
+def load_scale_data(params: ScaleParams) -> dict[str, int]:
+    """
+    Сгенерировать данные во временные файлы и загрузить COPY в одной транзакции владельцем
+    таблиц (RLS не применяется). Тенанты генератора уже есть — ошибка (--seed/--tenants другие
+    или очистить БД).
+    """
+    from db.database import engine
+
+    with ExitStack() as stack:
+        files = {
+            table: stack.enter_context(tempfile.TemporaryFile("w+", encoding="utf-8"))
+            for table in TABLES
+        }
+        started = time.perf_counter()
+        counts = write_scale_data(params, files)
+        print(f"generated in {time.perf_counter() - started:.1f}s: {counts}")
+        raw = engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            cur.execute(
+                "SELECT count(*) FROM tenants WHERE telegram_id BETWEEN %s AND %s",
+                (SCALE_TELEGRAM_ID_START, SCALE_TELEGRAM_ID_START + params.tenants - 1),
+            )
+            if cur.fetchone()[0]:
+                raise RuntimeError(
+                    "scale tenants already loaded (telegram_id from "
+                    f"{SCALE_TELEGRAM_ID_START}); use a fresh database"
+                )
+            cur.execute("SET LOCAL synchronous_commit = off")
+            for table, columns in TABLES.items():
+                started = time.perf_counter()
+                files[table].seek(0)
+                cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", files[table])
+                print(f"COPY {table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s")
+            raw.commit()
+            cur.execute(f"ANALYZE {', '.join(TABLES)}")
+            raw.commit()
+        finally:
+            raw.close()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = ScaleParams()
+    parser = argparse.ArgumentParser(prog="python -m db.seed scale", description=__doc__)
+    parser.add_argument("--tenants", type=int, default=defaults.tenants)
+    parser.add_argument("--channels-per-tenant", type=float, default=defaults.channels_per_tenant)
+    parser.add_argument("--slots-per-day", type=int, default=defaults.slots_per_day)
+    parser.add_argument("--days-back", type=int, default=defaults.days_back)
+    parser.add_argument("--days-ahead", type=int, default=defaults.days_ahead)
+    parser.add_argument("--booking-rate", type=float, default=defaults.booking_rate)
+    parser.add_argument("--views-per-order", type=float, default=defaults.views_per_order)
+    parser.add_argument("--advertisers", type=int, default=defaults.advertisers)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--base-date",
+        type=date.fromisoformat,
+        default=defaults.base_date,
+        help="«сегодня» генератора (YYYY-MM-DD); для побайтово одинаковых данных",
+    )
+    args = parser.parse_args(argv)
+    params = ScaleParams(**vars(args))
+    started = time.perf_counter()
+    counts = load_scale_data(params)
+    last = SCALE_TELEGRAM_ID_START + params.tenants - 1
+    print(
+        f"Seed scale OK in {time.perf_counter() - started:.1f}s: {sum(counts.values())} rows. "
+        f"Тенанты: telegram_id {SCALE_TELEGRAM_ID_START}-{last}"
+    )
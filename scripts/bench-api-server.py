@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+@file: bench-api-server.py
+@description: Сравнение запуска API на одной машине: прежний (uvicorn, один процесс, asyncio + h11)
+    и production-профиль (gunicorn + ApiWorker: uvloop, httptools, воркеры по CPU, preload).
+    Поднимает сервер, даёт нагрузку на GET-эндпоинт, печатает RPS и латентности.
+@dependencies: httpx, gunicorn, uvicorn-worker
+@created: 2026-10-19
+
+Запуск:
+    python scripts/bench-api-server.py --duration 20 --concurrency 64
+    python scripts/bench-api-server.py --modes production --workers 4 --path /health
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+root = Path(__file__).resolve().parent.parent
+
+MODES = {
+    # Как CMD в infra/Dockerfile.api до production-профиля
+    "baseline": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "services.api.main:app", "--host", "127.0.0.1",
+        "--port", str(port), "--loop", "asyncio", "--http", "h11", "--no-access-log",
+    ],
+    "production": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "-c", "services/api/gunicorn_conf.py",
+        "services.api.main:app",
+    ],
+}  # fmt: skip
+
+
+def start_server(mode: str, port: int, workers: int | None) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": str(root), "API_HOST": "127.0.0.1", "API_PORT": str(port)}
+    if workers:
+        env["WEB_CONCURRENCY"] = str(workers)
+    return subprocess.Popen(
+        MODES[mode](port, workers),
+        cwd=root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server did not start: {url}")
+
+
+async def load(url: str, duration: float, concurrency: int) -> tuple[int, int, list[float]]:
+    """concurrency клиентов шлют запросы подряд duration секунд; (ok, errors, латентности)."""
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10.0) as client:
+
+        async def user() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(url)
+                    if r.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return len(latencies), errors, latencies
+
+
+def run_mode(mode: str, args: argparse.Namespace) -> None:
+    proc = start_server(mode, args.port, args.workers)
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    try:
+        wait_ready(url)
+        asyncio.run(load(url, min(args.duration, 3.0), args.concurrency))  # прогрев
+        ok, errors, lat = asyncio.run(load(url, args.duration, args.concurrency))
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    lat.sort()
+    p50 = statistics.median(lat) * 1000 if lat else 0.0
+    p99 = lat[int(len(lat) * 0.99) - 1] * 1000 if lat else 0.0
+    print(
+        f"{mode:<11} rps={ok / args.duration:8.0f}  p50={p50:6.1f}ms  p99={p99:6.1f}ms  "
+        f"errors={errors}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="WEB_CONCURRENCY для production")
+    args = parser.parse_args()
+    print(f"cpus={os.cpu_count()} path={args.path} concurrency={args.concurrency}")
+    for mode in args.modes:
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+@file: bench-bot-webhook.py
+@description: Пропускная способность webhook-приёмника бота на синтетических апдейтах:
+    локальный aiohttp-сервер с UpdateReceiver и обработчиком, имитирующим I/O (--handler-ms),
+    параллельные POST как от Telegram (--connections).
+@dependencies: aiohttp, aiogram, services.bot.webhook
+@created: 2026-10-19
+
+Запуск: python scripts/bench-bot-webhook.py [--updates 2000] [--handler-ms 50]
+    [--connections 40] [--concurrency 1,8,64]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import ClientSession, TCPConnector, web
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from services.bot.webhook import SECRET_HEADER, UpdateReceiver  # noqa: E402
+
+SECRET = "bench-secret"
+
+
+def synthetic_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": update_id, "type": "private"},
+            "from": {"id": update_id, "is_bot": False, "first_name": "U"},
+            "text": "/start",
+        },
+    }
+
+
+async def run(updates: int, handler_ms: float, connections: int, max_concurrency: int) -> None:
+    router = Router()
+    done = 0
+
+    @router.message()
+    async def on_message(message: Message) -> None:
+        nonlocal done
+        await asyncio.sleep(handler_ms / 1000)
+        done += 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token="123456:BENCH")
+    receiver = UpdateReceiver(dp, bot, SECRET, max_concurrency, drain_timeout=60)
+    app = web.Application()
+    app.router.add_post("/webhook", receiver.handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(1, updates + 1):
+        queue.put_nowait(i)
+
+    async def sender(session: ClientSession) -> None:
+        while not queue.empty():
+            update_id = queue.get_nowait()
+            async with session.post(
+                f"http://127.0.0.1:{port}/webhook",
+                json=synthetic_update(update_id),
+                headers={SECRET_HEADER: SECRET},
+            ) as r:
+                assert r.status == 200, r.status
+
+    started = time.perf_counter()
+    async with ClientSession(connector=TCPConnector(limit=connections)) as session:
+        await asyncio.gather(*(sender(session) for _ in range(connections)))
+    await receiver.drain()
+    elapsed = time.perf_counter() - started
+    print(
+        f"max_concurrency={max_concurrency:>3}: {done} updates in {elapsed:.2f}s "
+        f"-> {done / elapsed:.0f} updates/s"
+    )
+    await runner.cleanup()
+    await bot.session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--handler-ms", type=float, default=50)
+    parser.add_argument("--connections", type=int, default=40)
+    parser.add_argument("--concurrency", default="1,8,64")
+    args = parser.parse_args()
+    for value in args.concurrency.split(","):
+        asyncio.run(run(args.updates, args.handler_ms, args.connections, int(value)))
+
+
+if __name__ == "__main__":
+    main()
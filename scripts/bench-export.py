@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+@file: bench-export.py
+@description: Выгрузка миллиона просмотров: прежний путь (вся выборка в память + JSON-список)
+    против потоковой (yield_per + services.api.exports.encode_rows, CSV/NDJSON). Каждый режим —
+    в отдельном процессе: пиковый RSS не смешивается. По умолчанию — SQLite в памяти (без
+    сервисов); --url — замер живого эндпоинта (TTFB, строки/с, объём).
+@dependencies: sqlalchemy, orjson, httpx, services.api.exports
+@created: 2026-10-19
+
+Запуск:
+    python scripts/bench-export.py --rows 1000000
+    python scripts/bench-export.py --url http://localhost:8000 --token <JWT> \\
+        --path "/api/analytics/views/export?format=csv&date_from=2026-01-01T00:00:00Z"
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+MODES = ("list-json", "stream-csv", "stream-ndjson")
+
+
+def _rss_mib() -> float:
+    # ru_maxrss в Linux — КиБ
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_local(mode: str, rows: int, batch: int) -> dict:
+    """Наполнить SQLite в памяти и выгрузить выбранным способом в /dev/null."""
+    import orjson
+    from sqlalchemy import Column, DateTime, MetaData, Table, Uuid, create_engine, select
+
+    from services.api.exports import encode_rows
+
+    engine = create_engine("sqlite://")
+    views = Table(
+        "views",
+        MetaData(),
+        Column("id", Uuid, primary_key=True),
+        Column("order_id", Uuid),
+        Column("channel_id", Uuid),
+        Column("timestamp", DateTime),
+    )
+    views.create(engine)
+    # Заполнение в формате хранения SQLite (hex UUID, текст даты) — без обработчиков типов,
+    # пачками: пик RSS наполнения не должен скрыть рост памяти выгрузки
+    orders = [(uuid.uuid4().hex, uuid.uuid4().hex) for _ in range(2000)]
+    start = datetime(2026, 7, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 20_000):
+            conn.exec_driver_sql(
+                "INSERT INTO views VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        uuid.uuid4().hex,
+                        *orders[i % len(orders)],
+                        (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S.%f"),
+                    )
+                    for i in range(offset, min(offset + 20_000, rows))
+                ],
+            )
+    rss_before = _rss_mib()
+    stmt = select(views).order_by(views.c.timestamp)
+    out = open("/dev/null", "wb")  # noqa: SIM115
+    started = time.perf_counter()
+    first_chunk = None
+    size = 0
+    with engine.connect() as conn:
+        if mode == "list-json":
+            # Как списочные эндпоинты: все строки в памяти, затем один JSON-ответ
+            result = conn.execute(stmt).all()
+            body = orjson.dumps([row._asdict() for row in result], option=orjson.OPT_NON_STR_KEYS)
+            first_chunk = time.perf_counter()
+            size = len(body)
+            out.write(body)
+        else:
+            result = conn.execute(stmt.execution_options(yield_per=batch))
+            fmt = mode.removeprefix("stream-")
+            for chunk in encode_rows(list(result.keys()), result.partitions(), fmt):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter()
+                size += len(chunk)
+                out.write(chunk)
+    elapsed = time.perf_counter() - started
+    out.close()
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(rows / elapsed),
+        "ttfb_ms": round((first_chunk - started) * 1000, 1),
+        "mib": round(size / 2**20, 1),
+        "rss_growth_mib": round(_rss_mib() - rss_before, 1),
+    }
+
+
+def run_url(url: str, path: str, token: str) -> dict:
+    import httpx
+
+    started = time.perf_counter()
+    first_chunk = None
+    size = lines = 0
+    with httpx.stream(
+        "GET", url + path, headers={"Authorization": f"Bearer {token}"}, timeout=None
+    ) as r:
+        r.raise_for_status()
+        for chunk in r.iter_bytes():
+            if first_chunk is None:
+                first_chunk = time.perf_counter()
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "lines": lines,
+        "seconds": round(elapsed, 2),
+        "lines_per_s": round(lines / elapsed),
+        "ttfb_ms": round(((first_chunk or time.perf_counter()) - started) * 1000, 1),
+        "mib": round(size / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=2000, help="как EXPORT_BATCH_ROWS")
+    parser.add_argument("--mode", choices=MODES, help="один режим в этом процессе")
+    parser.add_argument("--url", help="замер живого API вместо SQLite")
+    parser.add_argument("--path", default="/api/analytics/views/export?format=csv")
+    parser.add_argument("--token", default="")
+    args = parser.parse_args()
+
+    if args.url:
+        print(json.dumps(run_url(args.url, args.path, args.token), ensure_ascii=False))
+        return
+    if args.mode:
+        print(json.dumps(run_local(args.mode, args.rows, args.batch)))
+        return
+    print(f"{'mode':<14} {'rows/s':>10} {'s':>7} {'TTFB ms':>9} {'MiB':>7} {'RSS +MiB':>9}")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows)]
+            + ["--batch", str(args.batch)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:<14} {r['rows_per_s']:>10} {r['seconds']:>7} {r['ttfb_ms']:>9} "
+            f"{r['mib']:>7} {r['rss_growth_mib']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
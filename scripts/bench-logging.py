@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+@file: bench-logging.py
+@description: Пропускная способность логирования при конкурентных запросах: N потоков
+    (как пул потоков sync-обработчиков FastAPI) пишут info-события с контекстом. Сравнение:
+    baseline (прежняя конфигурация: PrintLogger + TimeStamper + JSONRenderer в потоке вызова),
+    sync (orjson в потоке вызова) и queue (очередь + фоновый поток).
+@dependencies: structlog, orjson, services.api.logging_config
+@created: 2026-10-19
+
+Запуск:
+    python scripts/bench-logging.py --threads 32 --events 20000
+    python scripts/bench-logging.py --slow-write-ms 2   # медленный stdout (pipe, сборщик логов)
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import structlog
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from services.api import logging_config  # noqa: E402
+from services.api.logging_config import (  # noqa: E402
+    configure_json_logging,
+    flush_logs,
+    get_logger,
+    set_request_id,
+)
+
+
+class Sink:
+    """Поток вывода: выбрасывает данные, по желанию имитирует медленную запись."""
+
+    def __init__(self, slow_ms: float) -> None:
+        self.slow = slow_ms / 1000
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.lines = 0
+
+    def write(self, data) -> int:
+        with self.lock:  # stdout один на процесс: запись сериализована
+            self.writes += 1
+            self.lines += data.count(b"\n" if isinstance(data, bytes) else "\n")
+            if self.slow:
+                time.sleep(self.slow)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def configure_baseline(out: Sink) -> None:
+    """Конфигурация до очереди: рендер и запись в stdout в потоке вызова."""
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            logging_config._add_context,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        context_class=dict,
+        logger_factory=structlog.PrintLoggerFactory(file=out),
+        cache_logger_on_first_use=True,
+    )
+
+
+def run(mode: str, args: argparse.Namespace) -> None:
+    out = Sink(args.slow_write_ms)
+    logging_config.LOG_QUEUE_SIZE = args.queue_size
+    if mode == "baseline":
+        configure_baseline(out)
+    else:
+        configure_json_logging(mode=mode, stream=out, sample_rate=args.sample_rate)
+    logger = get_logger("bench")
+    per_thread = args.events // args.threads
+    latencies: list[list[float]] = [[] for _ in range(args.threads)]
+    barrier = threading.Barrier(args.threads + 1)
+
+    def worker(i: int) -> None:
+        set_request_id(f"req-{i}")
+        lat = latencies[i]
+        barrier.wait()
+        for n in range(per_thread):
+            t0 = time.perf_counter()
+            logger.info("order status changed", order_id=n, status="paid", tenant="t-1")
+            lat.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    if mode == "queue":
+        flush_logs(timeout=60)
+    drained = time.perf_counter() - t0
+    flat = sorted(x for lat in latencies for x in lat)
+    total = len(flat)
+    print(
+        f"{mode:<9} calls/s={total / elapsed:9.0f}  p50={statistics.median(flat) * 1e6:7.1f}us  "
+        f"p99={flat[int(total * 0.99) - 1] * 1e6:8.1f}us  drained={drained:5.2f}s  "
+        f"writes={out.writes}  lines={out.lines}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", nargs="+", default=["baseline", "sync", "queue"])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--events", type=int, default=64000)
+    parser.add_argument("--slow-write-ms", type=float, default=0.0)
+    parser.add_argument("--sample-rate", type=float, default=1.0)
+    parser.add_argument("--queue-size", type=int, default=logging_config.LOG_QUEUE_SIZE)
+    args = parser.parse_args()
+    print(f"threads={args.threads} events={args.events} slow_write_ms={args.slow_write_ms}")
+    for mode in args.modes:
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
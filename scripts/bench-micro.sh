@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+# @file: bench-micro.sh
+# @description: Микробенчмарки горячих путей (benchmarks/, pytest-benchmark): базовая линия и
+#   сравнение с ней. Базовые линии — в .benchmarks/<машина>/, сравнивать на той же машине.
+# @dependencies: pip install -e ".[dev]" (pytest-benchmark)
+# @created: 2026-10-19
+#
+# Использование:
+#   ./scripts/bench-micro.sh save [имя]       # базовая линия (по умолчанию — имя ветки)
+#   ./scripts/bench-micro.sh compare [имя]    # сравнить; медиана хуже на BENCH_MAX_REGRESSION% (15) — код ≠ 0
+#   ./scripts/bench-micro.sh [аргументы pytest]  # просто прогнать, например -k jwt
+set -e
+cd "$(dirname "$0")/.."
+if [ -x ".venv/bin/python3" ]; then
+  PYTHON=".venv/bin/python3"
+else
+  PYTHON="python3"
+fi
+if ! "$PYTHON" -c "import pytest_benchmark" 2>/dev/null; then
+  echo "Ошибка: нет pytest-benchmark. Установите: pip install -e \".[dev]\""
+  exit 1
+fi
+# Имя базовой линии — второй аргумент, если это не флаг pytest
+cmd="$1"
+[ $# -gt 0 ] && shift
+name=""
+if [ -n "$1" ] && [ "${1#-}" = "$1" ]; then
+  name="${1//\//-}"
+  shift
+fi
+BENCH=("$PYTHON" -m pytest benchmarks --benchmark-only --benchmark-sort=name
+  --benchmark-columns=min,median,iqr,ops,rounds)
+case "$cmd" in
+  save)
+    [ -n "$name" ] || name="$(git rev-parse --abbrev-ref HEAD 2>/dev/null | tr / -)"
+    exec "${BENCH[@]}" --benchmark-save="${name:-baseline}" "$@"
+    ;;
+  compare)
+    name="${name:-main}"
+    # Последний сохранённый прогон с этим именем (номера прогонов растут)
+    baseline="$(ls .benchmarks/*/[0-9]*_"$name".json 2>/dev/null | sort -t/ -k3 | tail -1)"
+    if [ -z "$baseline" ]; then
+      echo "Ошибка: нет базовой линии «$name». Сначала: ./scripts/bench-micro.sh save $name"
+      exit 1
+    fi
+    exec "${BENCH[@]}" --benchmark-compare="$baseline" \
+      --benchmark-compare-fail="median:${BENCH_MAX_REGRESSION:-15}%" "$@"
+    ;;
+  *)
+    exec "${BENCH[@]}" ${cmd:+"$cmd"} ${name:+"$name"} "$@"
+    ;;
+esac
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+@file: bench-notifications.py
+@description: Бенчмарк отправки уведомлений против локального mock Telegram Bot API:
+    по одному клиенту на сообщение (старый путь) vs общий пул vs пакетная отправка (threads/async)
+    и симуляция очереди notifications: prefork-процесс vs пул потоков с async I/O.
+@dependencies: httpx, services.worker.telegram
+@created: 2026-10-19
+
+Запуск: python scripts/bench-notifications.py [--messages 500] [--latency-ms 100] [--concurrency 16]
+    [--pool-threads 32]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+
+def start_mock_server(latency: float) -> ThreadingHTTPServer:
+    """Mock sendMessage: ждёт latency секунд и отвечает {"ok": true}."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            body = json.dumps({"ok": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _timed(label: str, count: int, fn) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed:8.2f} s  {count / elapsed:10.1f} msg/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-threads", type=int, default=32)
+    args = parser.parse_args()
+
+    server = start_mock_server(args.latency_ms / 1000)
+    os.environ["TELEGRAM_API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+    from services.worker import telegram
+
+    messages = [(100000 + i, f"Уведомление {i}") for i in range(args.messages)]
+    print(f"messages={args.messages} latency={args.latency_ms} ms concurrency={args.concurrency}\n")
+
+    def per_message_client():
+        for chat_id, text in messages:
+            with httpx.Client(timeout=30.0) as client:
+                telegram.send_message("token", chat_id, text, client=client)
+
+    def pooled_sequential():
+        for chat_id, text in messages:
+            telegram.send_message("token", chat_id, text)
+
+    def batched(mode: str):
+        return lambda: telegram.send_many(
+            "token", messages, concurrency=args.concurrency, mode=mode
+        )
+
+    # Очередь notifications: задача = 2 сообщения (владелец + рекламодатель)
+    notify_tasks = [messages[i : i + 2] for i in range(0, len(messages), 2)]
+
+    def queue_prefork_child():
+        for task_messages in notify_tasks:
+            telegram.send_many("token", task_messages, concurrency=1, mode="threads")
+
+    def queue_thread_pool_async():
+        with ThreadPoolExecutor(max_workers=args.pool_threads) as pool:
+            list(pool.map(lambda m: telegram.send_many("token", m, mode="async"), notify_tasks))
+
+    _timed("client per message, sequential", args.messages, per_message_client)
+    _timed("pooled client, sequential", args.messages, pooled_sequential)
+    _timed(f"send_many threads, concurrency={args.concurrency}", args.messages, batched("threads"))
+    _timed(f"send_many async, concurrency={args.concurrency}", args.messages, batched("async"))
+    _timed("queue: 1 prefork child", args.messages, queue_prefork_child)
+    _timed(
+        f"queue: --pool threads x{args.pool_threads}, async",
+        args.messages,
+        queue_thread_pool_async,
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+@file: bench-webhooks.py
+@description: Генератор нагрузки на POST /webhooks/stripe: тысячи подписанных событий,
+    часть — повторы (как ретраи провайдера); отчёт RPS, латентности и кодов ответа.
+@dependencies: httpx, services.api.webhook_auth
+@created: 2026-10-19
+
+Запуск (API с тем же STRIPE_WEBHOOK_SECRET):
+    python scripts/bench-webhooks.py --url http://localhost:8000 --events 5000 --duplicates 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from services.api.webhook_auth import sign_stripe_payload  # noqa: E402
+
+
+def build_events(count: int, duplicate_ratio: float, seed: int) -> list[bytes]:
+    """count уникальных событий + повторы случайных из них (доля duplicate_ratio), перемешано."""
+    rng = random.Random(seed)
+    unique = [
+        json.dumps(
+            {
+                "id": f"evt_bench_{uuid4().hex}",
+                "type": "payment_intent.succeeded",
+                "data": {"object": {"id": f"pi_bench_{uuid4().hex}"}},
+            }
+        ).encode()
+        for _ in range(count)
+    ]
+    events = unique + [rng.choice(unique) for _ in range(int(count * duplicate_ratio))]
+    rng.shuffle(events)
+    return events
+
+
+async def run(url: str, secret: str, events: list[bytes], concurrency: int) -> None:
+    statuses: Counter[int | str] = Counter()
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+
+        async def _post(body: bytes) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    r = await client.post(
+                        "/webhooks/stripe",
+                        content=body,
+                        headers={"Stripe-Signature": sign_stripe_payload(body, secret)},
+                    )
+                    statuses[r.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_post(body) for body in events))
+        elapsed = time.perf_counter() - started
+
+    ms = sorted(x * 1000 for x in latencies)
+    pct = statistics.quantiles(ms, n=100) if len(ms) > 1 else ms * 99
+    print(f"requests: {len(events)} in {elapsed:.2f}s -> {len(events) / elapsed:.0f} req/s")
+    print(f"latency ms: p50={pct[49]:.1f} p95={pct[94]:.1f} p99={pct[98]:.1f} max={ms[-1]:.1f}")
+    print("statuses:", dict(statuses))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--secret", default=os.getenv("STRIPE_WEBHOOK_SECRET", ""))
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if not args.secret:
+        parser.error("STRIPE_WEBHOOK_SECRET or --secret is required")
+    events = build_events(args.events, args.duplicates, args.seed)
+    asyncio.run(run(args.url, args.secret, events, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
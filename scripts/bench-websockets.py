@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+@file: bench-websockets.py
+@description: Нагрузочный тест WebSocket дашборда: поднимает один процесс API (uvicorn),
+    держит N простаивающих соединений и печатает прирост RSS сервера на соединение; при
+    доступном Redis — время доставки всплеска событий всем сокетам тенанта.
+@dependencies: websockets, redis, uvicorn, services.api.auth
+@created: 2026-10-19
+
+Запуск: python scripts/bench-websockets.py --connections 10000 [--tenants 100] [--burst 500]
+    10k сокетов требуют ulimit -n > 20000 (клиент и сервер в одной машине).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import redis
+from websockets.asyncio.client import connect
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+from services.api.auth import create_access_token  # noqa: E402
+
+
+def rss_kb(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, ws: str) -> subprocess.Popen:
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "services.api.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--ws",
+            ws,
+            "--backlog",
+            "4096",
+        ],
+        cwd=root,
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("API did not start")
+
+
+async def open_sockets(port: int, tenants: list[str], count: int, batch: int) -> list:
+    tokens = {t: create_access_token(1, tenant_id=t) for t in tenants}
+    sockets = []
+    for start in range(0, count, batch):
+        chunk = [tenants[i % len(tenants)] for i in range(start, min(start + batch, count))]
+        sockets += await asyncio.gather(
+            *(
+                connect(
+                    f"ws://127.0.0.1:{port}/ws/dashboard/{t}?token={tokens[t]}",
+                    ping_interval=None,
+                    max_queue=16,
+                )
+                for t in chunk
+            )
+        )
+    return sockets
+
+
+async def measure_burst(sockets: list, tenant: str, burst: int, redis_url: str) -> None:
+    """Всплеск burst событий одному тенанту: время до получения кадра всеми его сокетами."""
+    targets = sockets[:: max(len(sockets) // 1000, 1)]
+    targets = [ws for ws in targets if f"/{tenant}?" in ws.request.path]
+    client = redis.from_url(redis_url)
+    started = time.perf_counter()
+    pipe = client.pipeline(transaction=False)
+    for i in range(burst):
+        pipe.publish(f"dashboard:{tenant}", json.dumps({"type": "order", "id": str(i % 10)}))
+    pipe.execute()
+    frames = await asyncio.gather(*(ws.recv() for ws in targets))
+    elapsed = time.perf_counter() - started
+    events = len(json.loads(frames[0])["events"])
+    print(
+        f"burst: {burst} events -> {events} coalesced, delivered to {len(targets)} sockets "
+        f"in {elapsed * 1000:.0f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--tenants", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=500)
+    parser.add_argument("--hold", type=float, default=5.0, help="сек простоя перед замером")
+    parser.add_argument("--ws", default="websockets-sansio", help="реализация WebSocket uvicorn")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < args.connections * 2 + 100:
+        print(f"warning: RLIMIT_NOFILE={hard} is low for {args.connections} sockets")
+
+    port = free_port()
+    server = start_server(port, args.ws)
+    try:
+        await asyncio.sleep(1.0)
+        base = rss_kb(server.pid)
+        tenants = [str(uuid4()) for _ in range(args.tenants)]
+        started = time.perf_counter()
+        sockets = await open_sockets(port, tenants, args.connections, args.batch)
+        opened = time.perf_counter() - started
+        await asyncio.sleep(args.hold)
+        loaded = rss_kb(server.pid)
+        print(f"connections: {len(sockets)} opened in {opened:.1f}s")
+        print(f"server RSS: {base / 1024:.1f} MiB -> {loaded / 1024:.1f} MiB")
+        print(f"per connection: {(loaded - base) / len(sockets):.1f} KiB")
+        try:
+            redis.from_url(args.redis_url).ping()
+        except redis.RedisError:
+            print("redis unavailable: burst delivery skipped")
+        else:
+            await measure_burst(sockets, tenants[0], args.burst, args.redis_url)
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
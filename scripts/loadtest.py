@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+@file: loadtest.py
+@description: Нагрузочные сценарии API (asyncio + httpx): заказ через бота, опрос дашборда
+    (/api/analytics/*), просмотр слотов, конкурентное создание заказов на «горячие» слоты.
+    Отчёт — RPS, p50/p95/p99 по сценариям и эндпоинтам; JSON для сравнения между коммитами.
+@dependencies: httpx
+@created: 2026-10-19
+
+Стенд (PostgreSQL/TimescaleDB и Redis в контейнерах, API на хосте):
+    ./scripts/podman-up-db-redis.sh && ./scripts/db-migrate.sh && python -m db.seed
+    ENABLE_DEV_LOGIN=true RATE_LIMIT_PER_MINUTE=1000000 ./scripts/run-api.sh --prod
+
+Запуск:
+    python scripts/loadtest.py --duration 60 --report .loadtest/$(git rev-parse --short HEAD).json
+    python scripts/loadtest.py --mix dashboard=50 --compare .loadtest/abc1234.json
+    python scripts/loadtest.py --telegram-ids 123456789,111,200-299
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+root = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = "bot_order_flow=16,dashboard=16,slot_browsing=24,order_contention=8"
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank (ранг ⌈p/100·n⌉): p-й перцентиль отсортированного списка (0 для пустого)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Латентности и ошибки по ключу «сценарий / METHOD шаблон-пути»."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self.errors: dict[tuple[str, str], int] = defaultdict(int)
+        self.rate_limited = 0
+        self.recording = False
+
+    def add(self, scenario: str, name: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        if ok:
+            self.latencies[(scenario, name)].append(seconds)
+        else:
+            self.errors[(scenario, name)] += 1
+
+
+class User:
+    """Виртуальный пользователь: свой JWT, общий клиент; запросы с именем для отчёта."""
+
+    def __init__(
+        self, scenario: str, client: httpx.AsyncClient, token: str, rec: Recorder, rng
+    ) -> None:
+        self.scenario = scenario
+        self.client = client
+        self.token = token
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.rec = rec
+        self.rng = rng
+
+    async def call(self, method: str, url: str, name: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.rec.add(self.scenario, name, 0.0, ok=False)
+            return None
+        if r.status_code == 429:
+            self.rec.rate_limited += 1
+        self.rec.add(self.scenario, name, time.perf_counter() - started, ok=r.status_code < 400)
+        return r if r.status_code < 400 else None
+
+
+class World:
+    """Каналы и свободные слоты тенантов — общие для сценариев, загружаются один раз."""
+
+    def __init__(self) -> None:
+        self.tokens: list[str] = []
+        self.channels: dict[str, list[dict]] = {}  # token -> каналы тенанта
+        self.hot_slots: dict[str, list[tuple[str, str]]] = {}  # token -> (channel_id, slot_id)
+
+
+async def bot_order_flow(user: User, world: World, args) -> None:
+    """Путь бота: каналы → свободные слоты канала → заказ → пауза пользователя."""
+    r = await user.call("GET", "/api/channels", "GET /api/channels")
+    channels = r.json() if r else []
+    if not channels:
+        return
+    channel = user.rng.choice(channels)
+    r = await user.call(
+        "GET",
+        "/api/slots",
+        "GET /api/slots?status=free",
+        params={"channel_id": channel["id"], "status": "free"},
+    )
+    slots = r.json() if r else []
+    if slots:
+        slot = user.rng.choice(slots[:50])
+        await user.call(
+            "POST",
+            "/api/orders",
+            "POST /api/orders",
+            json={
+                "channel_id": channel["id"],
+                "slot_id": slot["id"],
+                "content": {"text": f"loadtest {user.rng.random():.6f}"},
+            },
+        )
+    await asyncio.sleep(user.rng.uniform(0, 2 * args.think_time))
+
+
+async def dashboard(user: User, world: World, args) -> None:
+    """Дашборд: сводка, график просмотров (весь тенант и канал), список заказов; опрос раз в N с."""
+    await user.call("GET", "/api/analytics/summary", "GET /api/analytics/summary")
+    await user.call("GET", "/api/analytics/views", "GET /api/analytics/views")
+    channels = world.channels.get(user.token, [])
+    if channels:
+        await user.call(
+            "GET",
+            "/api/analytics/views",
+            "GET /api/analytics/views?channel_id",
+            params={"channel_id": user.rng.choice(channels)["id"]},
+        )
+    await user.call("GET", "/api/orders", "GET /api/orders")
+    await asyncio.sleep(args.poll_interval)
+
+
+async def slot_browsing(user: User, world: World, args) -> None:
+    """Листание календаря: окно в 7 дней по случайному каналу, затем карточка слота."""
+    channels = world.channels.get(user.token, [])
+    if not channels:
+        return
+    start = datetime.now(UTC) + timedelta(days=user.rng.randint(-7, 21))
+    r = await user.call(
+        "GET",
+        "/api/slots",
+        "GET /api/slots?date_from&date_to",
+        params={
+            "channel_id": user.rng.choice(channels)["id"],
+            "date_from": start.isoformat(),
+            "date_to": (start + timedelta(days=7)).isoformat(),
+        },
+    )
+    slots = r.json() if r else []
+    if slots:
+        slot = user.rng.choice(slots)
+        await user.call("GET", f"/api/slots/{slot['id']}", "GET /api/slots/{slot_id}")
+    await asyncio.sleep(user.rng.uniform(0, args.think_time))
+
+
+async def order_contention(user: User, world: World, args) -> None:
+    """Все пользователи сценария создают заказы на несколько одних и тех же слотов, без пауз."""
+    hot = world.hot_slots.get(user.token, [])
+    if not hot:
+        await asyncio.sleep(1.0)
+        return
+    channel_id, slot_id = user.rng.choice(hot)
+    await user.call(
+        "POST",
+        "/api/orders",
+        "POST /api/orders (hot slot)",
+        json={"channel_id": channel_id, "slot_id": slot_id, "content": {"text": "contention"}},
+    )
+
+
+SCENARIOS = {
+    "bot_order_flow": bot_order_flow,
+    "dashboard": dashboard,
+    "slot_browsing": slot_browsing,
+    "order_contention": order_contention,
+}
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, users = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; known: {', '.join(SCENARIOS)}")
+        mix[name.strip()] = int(users or 1)
+    return mix
+
+
+def parse_ids(value: str) -> list[int]:
+    ids: list[int] = []
+    for part in value.split(","):
+        first, _, last = part.partition("-")
+        ids.extend(range(int(first), int(last or first) + 1))
+    return ids
+
+
+async def prepare(client: httpx.AsyncClient, telegram_ids: list[int], hot: int) -> World:
+    """dev-login тенантов, их каналы и «горячие» слоты (первые свободные) для contention."""
+    world = World()
+    for telegram_id in telegram_ids:
+        r = await client.post("/api/auth/dev-login", json={"telegram_id": telegram_id})
+        r.raise_for_status()
+        token = r.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        channels = (await client.get("/api/channels", headers=headers)).json()
+        world.channels[token] = channels
+        hot_slots = []
+        for channel in channels[:hot]:
+            slots = await client.get(
+                "/api/slots",
+                params={"channel_id": channel["id"], "status": "free"},
+                headers=headers,
+            )
+            hot_slots += [(channel["id"], s["id"]) for s in slots.json()[:1]]
+        world.hot_slots[token] = hot_slots
+        world.tokens.append(token)
+    if not any(world.channels.values()):
+        raise SystemExit("no channels for given telegram ids: run python -m db.seed first")
+    return world
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    users_total = sum(mix.values())
+    limits = httpx.Limits(max_connections=users_total, max_keepalive_connections=users_total)
+    rec = Recorder()
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        world = await prepare(client, parse_ids(args.telegram_ids), args.hot_slots)
+        stop_at = time.monotonic() + args.warmup + args.duration
+        rng = random.Random(args.seed)
+
+        async def loop(scenario: str, index: int) -> None:
+            token = world.tokens[index % len(world.tokens)]
+            user = User(scenario, client, token, rec, random.Random(rng.random()))
+            # Плавный старт за время прогрева: опросы дашборда не синхронизированы
+            await asyncio.sleep(user.rng.uniform(0, args.warmup))
+            while time.monotonic() < stop_at:
+                await SCENARIOS[scenario](user, world, args)
+
+        async def measure() -> float:
+            await asyncio.sleep(args.warmup)
+            rec.recording = True
+            started = time.monotonic()
+            await asyncio.sleep(args.duration)
+            rec.recording = False
+            return time.monotonic() - started
+
+        tasks = [loop(s, i) for s, n in mix.items() for i in range(n)]
+        elapsed, *_ = await asyncio.gather(measure(), *tasks)
+    return build_report(args, mix, rec, elapsed)
+
+
+def _stats(latencies: list[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    out = {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1),
+    }
+    for p in PERCENTILES:
+        out[f"p{p}_ms"] = round(percentile(values, p) * 1000, 2)
+    out["max_ms"] = round(values[-1] * 1000, 2) if values else 0.0
+    return out
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def build_report(args, mix: dict[str, int], rec: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    scenarios: dict[str, tuple[list[float], int]] = {}
+    for key in sorted(set(rec.latencies) | set(rec.errors)):
+        scenario, name = key
+        endpoints[f"{scenario} / {name}"] = _stats(rec.latencies[key], rec.errors[key], elapsed)
+        lat, err = scenarios.setdefault(scenario, ([], 0))
+        scenarios[scenario] = (lat + rec.latencies[key], err + rec.errors[key])
+    all_lat = [v for lat, _ in scenarios.values() for v in lat]
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(UTC).isoformat(),
+        "base_url": args.base_url,
+        "duration_s": round(elapsed, 1),
+        "mix": mix,
+        "seed": args.seed,
+        "rate_limited": rec.rate_limited,
+        "total": _stats(all_lat, sum(err for _, err in scenarios.values()), elapsed),
+        "scenarios": {name: _stats(lat, err, elapsed) for name, (lat, err) in scenarios.items()},
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    header = f"{'':<58}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}"
+    print(f"commit={report['commit']} duration={report['duration_s']}s mix={report['mix']}")
+    print(header)
+    rows = [("TOTAL", report["total"], (baseline or {}).get("total"))]
+    for section in ("scenarios", "endpoints"):
+        for name, stats in report[section].items():
+            rows.append((name, stats, (baseline or {}).get(section, {}).get(name)))
+    for name, s, base in rows:
+        line = (
+            f"{name:<58}{s['rps']:>8.1f}{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}"
+            f"{s['p99_ms']:>9.1f}{s['errors']:>8}"
+        )
+        if base and base["p95_ms"]:
+            line += f"   p95 {100 * (s['p95_ms'] / base['p95_ms'] - 1):+.0f}%"
+            line += f" rps {100 * (s['rps'] / base['rps'] - 1) if base['rps'] else 0:+.0f}%"
+        print(line)
+    if report["rate_limited"]:
+        print(
+            f"WARNING: {report['rate_limited']} ответов 429 — запускайте API с большим "
+            "RATE_LIMIT_PER_MINUTE, иначе меряется rate limit",
+            file=sys.stderr,
+        )
+
+
+def regressions(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Сценарии, у которых p95 вырос больше чем на threshold процентов."""
+    out = []
+    for name, stats in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base and base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + threshold / 100):
+            out.append(f"{name}: p95 {base['p95_ms']} -> {stats['p95_ms']} ms")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        "--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://127.0.0.1:8000")
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="сценарий=пользователей,...")
+    parser.add_argument("--telegram-ids", default="123456789", help="тенанты: 1,2,10-20")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--warmup", type=float, default=10.0)
+    parser.add_argument(
+        "--think-time", type=float, default=1.0, help="средняя пауза пользователя, с"
+    )
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="опрос дашборда, с")
+    parser.add_argument(
+        "--hot-slots", type=int, default=2, help="каналов с горячим слотом на тенанта"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", type=Path, help="сохранить JSON-отчёт")
+    parser.add_argument("--compare", type=Path, help="JSON-отчёт базового коммита")
+    parser.add_argument(
+        "--max-p95-regression", type=float, default=None, help="%%: код выхода 1 при росте p95"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    if baseline and args.max_p95_regression is not None:
+        failed = regressions(report, baseline, args.max_p95_regression)
+        if failed:
+            print("p95 regression:\n  " + "\n  ".join(failed), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env bash
 # @file: run-api.sh
-# @description: Запуск FastAPI (uvicorn). Использует .venv, если есть.
+# @description: Запуск FastAPI: uvicorn --reload (разработка) или --prod — gunicorn с
+#   production-профилем (services/api/gunicorn_conf.py). Использует .venv, если есть.
 # @dependencies: pip install -e . (в venv)
 # @created: 2025-02-20
 set -e
@@ -19,4 +20,7 @@ if ! "$PYTHON" -c "import fastapi" 2>/dev/null; then
   echo "Или создайте venv: python3 -m venv .venv && source .venv/bin/activate && pip install -e ."
   exit 1
 fi
+if [ "${1:-}" = "--prod" ]; then
+  exec "$PYTHON" -m gunicorn -c services/api/gunicorn_conf.py services.api.main:app
+fi
 exec "$UVICORN" services.api.main:app --reload --host 0.0.0.0 --port 8000
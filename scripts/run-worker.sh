@@ -1,6 +1,7 @@
 #!/usr/bin/env bash
 # @file: run-worker.sh
-# @description: Запуск Celery worker (очереди default, publish, notifications, analytics).
+# @description: Запуск Celery worker (очереди default, publish, notifications, analytics) со встроенным
+#   beat (-B): планировщик публикаций schedule_due_orders раз в минуту.
 # @dependencies: Redis, pip install -e . (в venv)
 # @created: 2025-02-20
 set -e
@@ -17,4 +18,4 @@ if ! "$CELERY" --help &>/dev/null; then
   exit 1
 fi
 export REDIS_URL="${REDIS_URL:-redis://localhost:6379/0}"
-exec "$CELERY" -A services.worker.celery_app worker -l info -Q default,publish,notifications,analytics
+exec "$CELERY" -A services.worker.celery_app worker -B -l info -Q default,publish,notifications,analytics
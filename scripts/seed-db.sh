@@ -17,6 +17,11 @@ if ! "$PYTHON" -c "import db.seed" 2>/dev/null; then
 fi
 echo "=== Тестовые данные (demo tenant telegram_id=123456789) ==="
 "$PYTHON" -m db.seed
+if [ "$1" = "scale" ]; then
+  shift
+  echo "=== Объёмные данные для замеров (python -m db.seed scale $*) ==="
+  exec "$PYTHON" -m db.seed scale "$@"
+fi
 if [ "$1" = "extra" ]; then
   echo "=== Дополнительные слоты и просмотры ==="
   "$PYTHON" -m db.seed extra
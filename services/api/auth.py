@@ -58,6 +58,11 @@ def verify_telegram_login_init_data(init_data: str) -> dict:
     return parsed
 
 
+def hash_api_key(raw: str) -> str:
+    """В БД хранится только SHA-256 ключа."""
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
 def create_access_token(telegram_id: int, tenant_id: UUID | None = None) -> str:
     payload = {
         "sub": str(telegram_id),
@@ -41,6 +41,39 @@ class Settings(BaseSettings):
     enable_dev_login: bool = Field(default=False, validation_alias="ENABLE_DEV_LOGIN")
     admin_telegram_ids: str = Field(default="", validation_alias="ADMIN_TELEGRAM_IDS")
     sentry_dsn: str = Field(default="", validation_alias="SENTRY_DSN")
+    # GET /metrics (Prometheus) — только с Authorization: Bearer <METRICS_TOKEN>; без токена 404
+    # (маршруты, пулы, счётчики rate limit не отдаются на публичном порту без авторизации)
+    metrics_enabled: bool = True
+    metrics_token: str = ""
+    # Число SQL-запросов и время БД на запрос (Server-Timing, лог «request»); порог лога медленных
+    # запросов в мс (0 — выключен)
+    query_stats_enabled: bool = True
+    slow_query_ms: float = 200.0
+    # POST /api/admin/profile — сэмплирующий профиль процесса (только админы, выключен по умолчанию)
+    profiling_enabled: bool = False
+    profiling_max_seconds: float = 30.0
+    # Потоковая выгрузка CSV/NDJSON: строк на одну выборку серверного курсора и кусок ответа
+    export_batch_rows: int = 2000
+    stripe_webhook_secret: str = Field(default="", validation_alias="STRIPE_WEBHOOK_SECRET")
+    stripe_webhook_tolerance_seconds: int = 300
+    # IP-адреса уведомлений ЮKassa (CIDR через запятую); "*" — без проверки (только для dev)
+    yookassa_allowed_ips: str = Field(
+        default=(
+            "185.71.76.0/27,185.71.77.0/27,77.75.153.0/25,77.75.156.11/32,"
+            "77.75.156.35/32,77.75.154.128/25,2a02:5180::/32"
+        ),
+        validation_alias="YOOKASSA_ALLOWED_IPS",
+    )
+
+    # Окно склейки событий дашборда (мс) и таймаут отправки кадра одному WebSocket (сек)
+    realtime_coalesce_ms: int = 200
+    ws_send_timeout_seconds: float = 5.0
+    # SSE /api/orders/events: блокировка XREAD (мс), keep-alive (сек), retry клиента (мс),
+    # допустимое отставание подписчика (записей) до принудительного переподключения
+    sse_block_ms: int = 1000
+    sse_keepalive_seconds: float = 15.0
+    sse_retry_ms: int = 3000
+    sse_queue_size: int = 1000
 
     def get_admin_telegram_ids(self) -> list[int]:
         """Список telegram_id админов из ADMIN_TELEGRAM_IDS (через запятую)."""
@@ -1,18 +1,25 @@
 """
 @file: deps.py
-@description: FastAPI dependencies: DB session with tenant context.
+@description: FastAPI dependencies: DB session with tenant context, tenant by API key or JWT.
 @dependencies: db.database, services.api.auth
 @created: 2025-02-19
 """
 
 from uuid import UUID
 
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from db.database import SessionLocal
-from services.api.auth import get_current_tenant_id, get_current_user_id, get_optional_tenant_id
+from db.models import ApiKey
+from services.api.auth import (
+    get_current_tenant_id,
+    get_current_user_id,
+    get_optional_tenant_id,
+    hash_api_key,
+)
 from services.api.logging_config import set_tenant_id
 
 
@@ -64,3 +71,33 @@ def get_db_with_required_tenant(
         text("SELECT set_config(:key, :val, true)"), {"key": "app.tenant_id", "val": str(tenant_id)}
     )
     return db
+
+
+_optional_bearer = HTTPBearer(auto_error=False)
+
+
+def get_integration_tenant_id(
+    x_api_key: str | None = Header(None, alias="X-API-Key"),
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+) -> UUID:
+    """
+    Tenant по API-ключу (X-API-Key) или по JWT. Сессия БД закрывается сразу после проверки —
+    долгие соединения (SSE) не держат подключение из пула.
+    """
+    if x_api_key:
+        db = SessionLocal()
+        try:
+            tenant_id = (
+                db.query(ApiKey.tenant_id)
+                .filter(ApiKey.key_hash == hash_api_key(x_api_key))
+                .scalar()
+            )
+        finally:
+            db.close()
+        if tenant_id is None:
+            raise HTTPException(status_code=401, detail="Invalid API key")
+        set_tenant_id(str(tenant_id))
+        return tenant_id
+    tenant_id = get_current_tenant_id(get_optional_tenant_id(credentials))
+    set_tenant_id(str(tenant_id))
+    return tenant_id
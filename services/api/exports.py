@@ -0,0 +1,214 @@
+"""
+@file: exports.py
+@description: Потоковая выгрузка заказов и просмотров в CSV/NDJSON. Строки читаются курсором на
+    стороне сервера (yield_per → именованный курсор psycopg2) пачками по EXPORT_BATCH_ROWS и
+    сразу отдаются клиенту: память не зависит от числа строк.
+@dependencies: sqlalchemy, orjson, fastapi, db.models
+@created: 2026-10-19
+"""
+
+import csv
+import io
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any, Literal
+from uuid import UUID
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from db.database import SessionLocal
+from db.models import Channel, Order, View
+from services.api.config import settings
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def orders_export_query(
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    channel_id: UUID | None = None,
+    status: str | None = None,
+    tenant_id: UUID | None = None,
+) -> Select:
+    """Заказы (created_at в [date_from, date_to)); tenant_id — фильтр админской выгрузки."""
+    stmt = select(
+        Order.id,
+        Order.channel_id,
+        Order.slot_id,
+        Order.advertiser_id,
+        Order.status,
+        Order.erid,
+        Order.content,
+        Order.publish_at,
+        Order.created_at,
+        Order.updated_at,
+    ).order_by(Order.created_at, Order.id)
+    if date_from is not None:
+        stmt = stmt.where(Order.created_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Order.created_at < date_to)
+    if channel_id is not None:
+        stmt = stmt.where(Order.channel_id == channel_id)
+    if status is not None:
+        stmt = stmt.where(Order.status == status)
+    if tenant_id is not None:
+        stmt = stmt.join(Channel, Channel.id == Order.channel_id).where(
+            Channel.tenant_id == tenant_id
+        )
+    return stmt
+
+
+def views_export_query(
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    channel_id: UUID | None = None,
+    tenant_id: UUID | None = None,
+) -> Select:
+    """
+    Просмотры в [date_from, date_to); по умолчанию — последние 30 дней, как /analytics/views.
+    Период ограничивает чанки гипертаблицы, которые читает запрос.
+    """
+    end = date_to or datetime.now(UTC)
+    start = date_from or (end - timedelta(days=30))
+    stmt = (
+        select(View.id, View.order_id, Order.channel_id, View.timestamp)
+        .join(Order, Order.id == View.order_id)
+        .where(View.timestamp >= start, View.timestamp < end)
+        .order_by(View.timestamp)
+    )
+    if channel_id is not None:
+        stmt = stmt.where(Order.channel_id == channel_id)
+    if tenant_id is not None:
+        stmt = stmt.join(Channel, Channel.id == Order.channel_id).where(
+            Channel.tenant_id == tenant_id
+        )
+    return stmt
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict | list):
+        return orjson.dumps(value).decode()
+    return value
+
+
+def _csv_rows(batch: Sequence[Sequence[Any]]) -> Iterator[Sequence[Any]]:
+    """
+    Привести к CSV только колонки, которым это нужно (datetime, JSON, NULL в первой строке);
+    UUID, числа и StrEnum csv.writer пишет сам. Тип колонки в пачке один — смотрим первую строку.
+    """
+    if not batch:
+        return
+    convert = [
+        i for i, v in enumerate(batch[0]) if v is None or isinstance(v, datetime | dict | list)
+    ]
+    if not convert:
+        yield from batch
+        return
+    for row in batch:
+        row = list(row)
+        for i in convert:
+            row[i] = _csv_value(row[i])
+        yield row
+
+
+def encode_rows(
+    columns: Sequence[str], batches: Iterable[Sequence[Sequence[Any]]], fmt: ExportFormat
+) -> Iterator[bytes]:
+    """Кодировать пачки строк: один кусок ответа на пачку (CSV — с заголовком в первом куске)."""
+    # Ключи результата SQLAlchemy — quoted_name (подкласс str): orjson принимает только str
+    columns = [str(c) for c in columns]
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(_csv_rows(batch))
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode()
+        return
+    for batch in batches:
+        # orjson сериализует UUID, datetime, StrEnum и JSONB-словари без преобразований
+        yield b"".join(
+            orjson.dumps(dict(zip(columns, row, strict=True)), option=orjson.OPT_APPEND_NEWLINE)
+            for row in batch
+        )
+
+
+def stream_export(
+    stmt: Select,
+    fmt: ExportFormat,
+    tenant_id: UUID | None,
+    session_factory: sessionmaker[Session] = SessionLocal,
+) -> Iterator[bytes]:
+    """
+    Выполнить stmt в собственной сессии (соединение занято только на время выгрузки) и отдавать
+    пачки строк по мере чтения. tenant_id — RLS тенанта; None — админская выгрузка без RLS.
+    """
+    db = session_factory()
+    started = time.perf_counter()
+    rows = 0
+
+    def counted(partitions: Iterable[Sequence[Any]]) -> Iterator[Sequence[Any]]:
+        nonlocal rows
+        for batch in partitions:
+            rows += len(batch)
+            yield batch
+
+    try:
+        if tenant_id is not None:
+            db.execute(
+                text("SELECT set_config(:key, :val, true)"),
+                {"key": "app.tenant_id", "val": str(tenant_id)},
+            )
+        else:
+            db.execute(text("SET LOCAL row_level_security = off"))
+        result = db.execute(stmt.execution_options(yield_per=settings.export_batch_rows))
+        columns = list(result.keys())
+        yield from encode_rows(columns, counted(result.partitions()), fmt)
+    except Exception:
+        # Заголовки уже отправлены: клиент увидит оборванный ответ
+        logger.exception("export failed", rows=rows)
+        raise
+    finally:
+        db.close()
+    logger.info(
+        "export finished",
+        format=fmt,
+        rows=rows,
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+
+def export_response(
+    stmt: Select, fmt: ExportFormat, name: str, tenant_id: UUID | None
+) -> StreamingResponse:
+    """StreamingResponse с вложением <name>-<дата>.<fmt>; sync-генератор идёт в threadpool."""
+    filename = f"{name}-{datetime.now(UTC):%Y%m%d}.{fmt}"
+    return StreamingResponse(
+        stream_export(stmt, fmt, tenant_id),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # nginx не копит ответ целиком в буфере/на диске
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,67 @@
+"""
+@file: gunicorn_conf.py
+@description: Конфигурация gunicorn для API в production: предзагрузка приложения в master,
+    воркеры ApiWorker по числу CPU, таймауты мягкой остановки, перезапуск воркеров по счётчику.
+@dependencies: gunicorn, services.api.server, db.database
+@created: 2026-10-19
+
+Запуск: gunicorn -c services/api/gunicorn_conf.py services.api.main:app
+Переменные: API_HOST, API_PORT, WEB_CONCURRENCY, GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT,
+    GUNICORN_KEEPALIVE, GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER.
+"""
+
+import os
+import tempfile
+
+# До импорта приложения: prometheus_client выбирает хранилище метрик при импорте
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "lytslot-api-metrics")
+)
+
+from services.api.server import default_workers  # noqa: E402
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = default_workers()
+worker_class = "services.api.server.ApiWorker"
+
+# Приложение импортируется один раз в master: воркеры стартуют быстрее, общий код — copy-on-write
+preload_app = True
+
+# Воркер, не отвечающий heartbeat дольше timeout, перезапускается (async: только зависший loop)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+# SIGTERM: столько секунд на завершение текущих запросов (меньше terminationGracePeriodSeconds)
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "25"))
+# Keep-alive дольше idle timeout балансировщика — иначе гонка закрытия соединения (502)
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+# Плановый перезапуск воркеров против роста памяти; jitter — чтобы не все одновременно
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "20000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "2000"))
+# heartbeat-файлы воркеров в памяти, а не на overlay-FS контейнера
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Access-лог выключен по умолчанию: на тысячах RPS это заметная доля CPU воркера
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    """Файлы метрик прошлого запуска удаляются до старта воркеров."""
+    from services.api.metrics import clear_multiprocess_dir
+
+    clear_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    """Gauge завершившегося воркера (запросы в обработке, пул БД) больше не суммируются."""
+    from services.api.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Пул соединений БД, созданный в master при preload, не должен делиться между процессами."""
+    from db.database import engine
+
+    engine.dispose(close=False)
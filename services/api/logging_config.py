@@ -1,17 +1,42 @@
 """
 @file: logging_config.py
 @description: Structured JSON logging with request_id and tenant_id in context.
-@dependencies: structlog
+    Режим queue (по умолчанию): запись в очередь, JSON (orjson) и вывод в stdout — в фоновом
+    потоке; sync — запись в stdout в вызывающем потоке. Сэмплирование info/debug.
+@dependencies: structlog, orjson (опционально)
 @created: 2025-02-20
 """
 
+import atexit
+import contextlib
+import io
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
 from contextvars import ContextVar
-from typing import Any
+from datetime import UTC, datetime
+from typing import IO, Any
 
 import structlog
 
+try:
+    import orjson
+except ImportError:  # без orjson — stdlib json (медленнее в разы)
+    orjson = None
+
+# queue — вывод в фоновом потоке; sync — в потоке вызова (скрипты, отладка)
+LOG_MODE = os.getenv("LOG_MODE", "queue").strip().lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+# Доля сохраняемых info/debug-событий (warning и выше пишутся всегда)
+LOG_INFO_SAMPLE_RATE = float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0"))
+# Переполнение очереди: события отбрасываются (не блокируем запрос), число пишется в лог
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "50000"))
+LOG_BATCH_SIZE = 256
+
 # Контекстные переменные для сквозного request_id и tenant_id в рамках запроса/задачи
 request_id_ctx: ContextVar[str | None] = ContextVar("request_id", default=None)
 tenant_id_ctx: ContextVar[str | None] = ContextVar("tenant_id", default=None)
@@ -45,28 +70,207 @@ def _add_context(
     return event_dict
 
 
-def configure_json_logging() -> None:
+def _add_timestamp(
+    logger: logging.Logger, method_name: str, event_dict: dict[str, Any]
+) -> dict[str, Any]:
+    """Время события — число; в ISO-строку превращается при выводе (в фоновом потоке)."""
+    event_dict["timestamp"] = datetime.now(UTC).timestamp()
+    return event_dict
+
+
+def _sampler(rate: float):
+    """Пропускать долю rate info/debug-событий; sample=False в событии — писать всегда."""
+
+    def sample(
+        logger: logging.Logger, method_name: str, event_dict: dict[str, Any]
+    ) -> dict[str, Any]:
+        sampled = event_dict.pop("sample", True) and method_name in ("debug", "info")
+        if sampled and rate < 1.0 and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+    return sample
+
+
+def render_json(event_dict: dict[str, Any]) -> bytes:
+    """Одна строка JSON (без перевода строки). Значения, не сериализуемые в JSON, — через str()."""
+    ts = event_dict.get("timestamp")
+    if isinstance(ts, float):
+        iso = datetime.fromtimestamp(ts, UTC).isoformat()
+        event_dict["timestamp"] = iso.replace("+00:00", "Z")
+    if orjson is not None:
+        return orjson.dumps(event_dict, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(event_dict, default=str, ensure_ascii=False).encode()
+
+
+def _render_sync(logger: logging.Logger, method_name: str, event_dict: dict[str, Any]) -> bytes:
+    return render_json(event_dict)
+
+
+def _write(stream: IO, data: bytes) -> None:
+    binary = getattr(stream, "buffer", stream)
+    try:
+        binary.write(data)
+    except TypeError:  # текстовый поток без buffer (например, подменённый stdout)
+        stream.write(data.decode())
+    stream.flush()
+
+
+_STOP = object()
+
+
+class QueueLogSink:
+    """
+    Очередь событий и фоновый поток: события пачкой (до LOG_BATCH_SIZE) рендерятся в JSON и
+    пишутся одним write. При переполнении put не ждёт — событие отбрасывается и учитывается.
+    После fork (gunicorn preload, prefork Celery) поток и очередь создаются заново.
     """
-    Настроить structlog: JSON в stdout, уровень INFO.
+
+    def __init__(self, stream: IO | None = None, maxsize: int | None = None) -> None:
+        self._stream = stream
+        self._maxsize = LOG_QUEUE_SIZE if maxsize is None else maxsize
+        self.dropped = 0
+        self._start()
+
+    def _start(self) -> None:
+        self._queue: queue.Queue = queue.Queue(self._maxsize)
+        self._thread = threading.Thread(target=self._drain, name="log-sink", daemon=True)
+        self._thread.start()
+
+    def put(self, event_dict: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(event_dict)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> None:
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not _STOP]
+            stop = len(events) < len(batch)
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                events.append(
+                    {
+                        "event": "log events dropped",
+                        "count": dropped,
+                        "level": "warning",
+                        "timestamp": datetime.now(UTC).timestamp(),
+                    }
+                )
+            if events:
+                data = b"".join(render_json(e) + b"\n" for e in events)
+                # Вывод недоступен — события теряются, но поток продолжает разбирать очередь
+                with contextlib.suppress(Exception):
+                    _write(self._stream or sys.stdout, data)
+            if stop:
+                return
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Дописать накопленное и остановить поток (atexit, тесты)."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class _QueueLogger:
+    """Логгер structlog: готовый event_dict уходит в очередь, рендер и вывод — в QueueLogSink."""
+
+    def __init__(self, sink: QueueLogSink) -> None:
+        self._sink = sink
+
+    def msg(self, **event_dict: Any) -> None:
+        self._sink.put(event_dict)
+
+    debug = info = warning = warn = error = critical = exception = fatal = log = msg
+
+
+_sink: QueueLogSink | None = None
+
+
+def _restart_sink_after_fork() -> None:
+    if _sink is not None:
+        _sink._start()
+
+
+def _close_sink() -> None:
+    if _sink is not None:
+        _sink.close()
+
+
+os.register_at_fork(after_in_child=_restart_sink_after_fork)
+atexit.register(_close_sink)
+
+
+def configure_json_logging(
+    mode: str | None = None,
+    stream: IO | None = None,
+    sample_rate: float | None = None,
+) -> None:
+    """
+    Настроить structlog: JSON в stdout, уровень LOG_LEVEL (INFO).
     После вызова использовать structlog.get_logger() с request_id/tenant_id.
+    mode/stream/sample_rate по умолчанию — LOG_MODE, stdout, LOG_INFO_SAMPLE_RATE.
     """
+    global _sink
+    mode = mode or LOG_MODE
+    rate = LOG_INFO_SAMPLE_RATE if sample_rate is None else sample_rate
+    processors: list[Any] = [
+        _sampler(rate),
+        structlog.contextvars.merge_contextvars,
+        _add_context,
+        structlog.processors.add_log_level,
+        _add_timestamp,
+        # Стек и исключение можно снять только в потоке вызова
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+    ]
+    if mode == "queue":
+        # Один sink на процесс: логгеры, закэшированные до повторной настройки, пишут в него же
+        if _sink is None:
+            _sink = QueueLogSink(stream)
+        else:
+            flush_logs()
+            _sink._stream = stream
+        sink = _sink
+        logger_factory: Any = lambda *args: _QueueLogger(sink)  # noqa: E731
+    else:
+        out = stream or sys.stdout
+        binary = getattr(out, "buffer", None if isinstance(out, io.TextIOBase) else out)
+        if binary is not None:
+            processors.append(_render_sync)
+            logger_factory = structlog.BytesLoggerFactory(file=binary)
+        else:
+            processors.append(lambda _, __, event_dict: render_json(event_dict).decode())
+            logger_factory = structlog.PrintLoggerFactory(file=out)
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            _add_context,
-            structlog.processors.add_log_level,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer(),
-        ],
-        wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelNamesMapping().get(LOG_LEVEL, logging.INFO)
+        ),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(file=sys.stdout),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
 
+def flush_logs(timeout: float = 2.0) -> None:
+    """Дождаться вывода событий, уже поставленных в очередь (тесты, завершение процесса)."""
+    if _sink is not None:
+        _sink.close(timeout)
+        _sink._start()
+
+
 def get_logger(name: str | None = None):
     """Логгер с контекстом request_id/tenant_id. name — имя модуля (__name__)."""
     return structlog.get_logger(name)
@@ -1,41 +1,75 @@
 """
 @file: main.py
-@description: FastAPI app - auth, middleware, routers, WebSocket dashboard.
+@description: FastAPI app - auth, middleware, routers, WebSocket dashboard (Redis pub/sub push),
+    Prometheus /metrics.
 @dependencies: fastapi, services.api.*
 @created: 2025-02-19
 """
 
+import hmac
 import json
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from db.database import engine
 from db.models import Tenant
 from services.api.auth import create_access_token, verify_telegram_login_init_data
 from services.api.config import settings
 from services.api.deps import get_db
 from services.api.logging_config import configure_json_logging, get_logger
+from services.api.metrics import MetricsMiddleware, instrument_engine, render_metrics
+from services.api.order_stream import close_order_stream_hub
+from services.api.query_stats import instrument_queries
+from services.api.realtime import authorize_dashboard, close_dashboard_hub, get_dashboard_hub
 from services.api.routers import admin, analytics, api_keys, channels, orders, slots, webhooks
 
 configure_json_logging()
 logger = get_logger(__name__)
 
-if settings.sentry_dsn.strip():
+
+def _init_sentry(dsn: str) -> None:
+    """
+    Sentry импортируется только при заданном SENTRY_DSN. Интеграции перечислены явно:
+    автоподключение импортирует все установленные библиотеки (aiogram, celery, ...), +0.5 с старта.
+    """
     import sentry_sdk
     from sentry_sdk.integrations.fastapi import FastApiIntegration
+    from sentry_sdk.integrations.redis import RedisIntegration
+    from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+    from sentry_sdk.integrations.starlette import StarletteIntegration
 
     sentry_sdk.init(
-        dsn=settings.sentry_dsn.strip(),
-        integrations=[FastApiIntegration()],
+        dsn=dsn,
+        integrations=[
+            StarletteIntegration(),
+            FastApiIntegration(),
+            SqlalchemyIntegration(),
+            RedisIntegration(),
+        ],
+        auto_enabling_integrations=False,
         traces_sample_rate=0.1,
         environment="production",
     )
     logger.info("Sentry initialized")
 
 
+if settings.sentry_dsn.strip():
+    _init_sentry(settings.sentry_dsn.strip())
+
+
 class AuthCallbackBody(BaseModel):
     init_data: str
 
@@ -47,7 +81,8 @@ class DevLoginBody(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     yield
-    # shutdown: close redis etc.
+    await close_dashboard_hub()
+    await close_order_stream_hub()
 
 
 OPENAPI_TAGS = [
@@ -82,12 +117,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 try:
-    from services.api.middleware import RateLimitMiddleware, RequestIdMiddleware
+    from services.api.middleware import (
+        QueryStatsMiddleware,
+        RateLimitMiddleware,
+        RequestIdMiddleware,
+    )
 
     app.add_middleware(RateLimitMiddleware)
+    if settings.query_stats_enabled:
+        # Внутри RequestIdMiddleware: строка лога «request» уже с request_id
+        app.add_middleware(QueryStatsMiddleware)
     app.add_middleware(RequestIdMiddleware)
 except Exception:
     logger.warning("Middleware not added", exc_info=True)
+instrument_queries(engine, settings.slow_query_ms)
+if settings.metrics_enabled:
+    # Внешний слой: время запроса включает остальные middleware
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    if not settings.metrics_token:
+        logger.warning("METRICS_TOKEN not set: /metrics is disabled")
 
 app.include_router(channels.router, prefix="/api")
 app.include_router(orders.router, prefix="/api")
@@ -180,14 +229,27 @@ def dev_login(body: DevLoginBody, db: Session = Depends(get_db)):
 
 
 @app.websocket("/ws/dashboard/{tenant_id}")
-async def websocket_dashboard(websocket: WebSocket, tenant_id: str):
+async def websocket_dashboard(websocket: WebSocket, tenant_id: str, token: str | None = None):
+    """
+    Push событий тенанта (заказы, оплаты, просмотры): кадры {"events": [...]}.
+    Авторизация: /ws/dashboard/{tenant_id}?token=<JWT этого tenant>; "ping" -> "pong".
+    """
+    try:
+        authorize_dashboard(token, tenant_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
     await websocket.accept()
+    hub = get_dashboard_hub()
+    await hub.connect(tenant_id, websocket)
     try:
         while True:
-            data = await websocket.receive_text()
-            await websocket.send_text(f"echo:{data}")
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
     except WebSocketDisconnect:
         pass
+    finally:
+        await hub.disconnect(tenant_id, websocket)
 
 
 @app.get("/health")
@@ -196,6 +258,18 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(None)):
+    """Prometheus: метрики всех воркеров процесса gunicorn (PROMETHEUS_MULTIPROC_DIR)."""
+    token = settings.metrics_token
+    if not settings.metrics_enabled or not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/ready")
 def ready():
     """
@@ -238,6 +312,7 @@ def ready():
 
 
 if __name__ == "__main__":
+    # Разработка (reload, один процесс). Production: gunicorn -c services/api/gunicorn_conf.py
     import uvicorn
 
     uvicorn.run(
@@ -0,0 +1,136 @@
+"""
+@file: metrics.py
+@description: Prometheus-метрики API: латентность и число запросов по шаблону маршрута,
+    запросы в обработке, пул соединений БД, отказы rate limit; выдача /metrics. С
+    PROMETHEUS_MULTIPROC_DIR (gunicorn, несколько воркеров) значения собираются со всех процессов.
+@dependencies: prometheus_client, sqlalchemy
+@created: 2026-10-19
+"""
+
+import os
+import time
+from pathlib import Path
+
+# Каталог multiprocess-метрик должен существовать до создания первой метрики
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+HTTP_REQUESTS = Counter(
+    "lytslot_http_requests_total",
+    "HTTP-запросы API по маршруту и коду ответа",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "lytslot_http_request_duration_seconds",
+    "Время обработки запроса API (до конца ответа)",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "lytslot_http_requests_in_progress",
+    "Запросы API в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "lytslot_db_pool_checked_out",
+    "Соединения пула БД, выданные сессиям",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "lytslot_db_pool_connections",
+    "Открытые соединения пула БД",
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "lytslot_rate_limit_rejections_total",
+    "Запросы, отклонённые rate limit (429)",
+)
+
+# Путь без совпавшего маршрута (404, сканеры) — одна метка, а не кардинальность по URL
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def multiprocess_dir() -> str | None:
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def clear_multiprocess_dir() -> None:
+    """Удалить файлы метрик прошлого запуска (при старте master-процесса, до fork воркеров)."""
+    path = multiprocess_dir()
+    if path:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for f in Path(path).glob("*.db"):
+            f.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Воркер завершился: его livesum-gauge больше не учитываются."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Текст экспозиции: со всех процессов (multiprocess) или из реестра текущего процесса."""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Счётчики пула по событиям checkout/checkin/connect/close — без опроса пула на scrape."""
+    event.listen(engine, "checkout", lambda *_: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine, "checkin", lambda *_: DB_POOL_CHECKED_OUT.dec())
+    event.listen(engine, "connect", lambda *_: DB_POOL_CONNECTIONS.inc())
+    event.listen(engine, "close", lambda *_: DB_POOL_CONNECTIONS.dec())
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware (без BaseHTTPMiddleware): метка route — шаблон пути из scope["route"],
+    который роутер выставляет при сопоставлении, поэтому /api/orders/<uuid> не плодит серии.
+    """
+
+    def __init__(self, app, skip_paths: tuple[str, ...] = ("/metrics", "/health")) -> None:
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
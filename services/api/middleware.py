@@ -1,10 +1,12 @@
 """
 @file: middleware.py
-@description: Request ID, tenant context and rate limit middleware.
-@dependencies: fastapi, redis, services.api.config, services.api.logging_config
+@description: Request ID, tenant context, rate limit and per-request SQL stats middleware.
+@dependencies: fastapi, redis, services.api.config, services.api.logging_config,
+    services.api.metrics, services.api.query_stats
 @created: 2025-02-19
 """
 
+import time
 import uuid
 from uuid import UUID
 
@@ -14,6 +16,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from services.api.config import settings
 from services.api.logging_config import get_logger, set_request_id
+from services.api.metrics import RATE_LIMIT_REJECTIONS, UNMATCHED_ROUTE
+from services.api.query_stats import start_query_stats
 
 _redis: redis.Redis | None = None
 logger = get_logger(__name__)
@@ -42,6 +46,33 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Число SQL-запросов и время в БД за запрос: заголовок Server-Timing (видно в DevTools) и
+    строка лога «request» с request_id — по ней ищутся эндпоинты с N+1.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = start_query_stats()
+        response = await call_next(request)
+        total_ms = round((time.perf_counter() - stats.started) * 1000, 2)
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.db_ms};desc="{stats.count} queries", app;dur={total_ms}'
+        )
+        route = getattr(request.scope.get("route"), "path", None) or UNMATCHED_ROUTE
+        logger.info(
+            "request",
+            method=request.method,
+            route=route,
+            status=response.status_code,
+            duration_ms=total_ms,
+            db_queries=stats.count,
+            db_ms=stats.db_ms,
+            slow_queries=stats.slow,
+        )
+        return response
+
+
 class TenantMiddleware(BaseHTTPMiddleware):
     """Set app.tenant_id in DB session from JWT (handled in dependencies, not here)."""
 
@@ -75,6 +106,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             if n == 1:
                 await r.expire(redis_key, 60)
             if n > settings.rate_limit_per_minute:
+                RATE_LIMIT_REJECTIONS.inc()
                 return Response(
                     status_code=429,
                     content="Too Many Requests",
@@ -0,0 +1,186 @@
+"""
+@file: order_stream.py
+@description: SSE смен статуса заказов: один читатель Redis Streams на процесс API (XREAD по
+    потокам всех тенантов с подписчиками) раздаёт записи очередям подписчиков; возобновление
+    по Last-Event-ID — дочитывание хвоста потока через XRANGE.
+@dependencies: redis, services.api.config, db.events
+@created: 2026-10-19
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+import redis.asyncio as redis
+
+from db.events import ORDER_STREAM_PREFIX, order_stream_key
+from services.api.config import settings
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Запись потока: (id вида "<ms>-<seq>", поля order_id/status/ts)
+StreamEntry = tuple[str, dict[str, str]]
+
+# Маркер для подписчика, отставшего больше чем на sse_queue_size записей: поток закрывается,
+# клиент переподключается с Last-Event-ID и дочитывает пропущенное из Redis
+_OVERFLOW = object()
+
+
+def parse_stream_id(value: str | None) -> tuple[int, int] | None:
+    """Id записи потока ("<ms>-<seq>") -> (ms, seq); None для пустого/некорректного значения."""
+    if not value:
+        return None
+    ms, _, seq = value.strip().partition("-")
+    try:
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return None
+
+
+def format_sse(entry: StreamEntry) -> str:
+    entry_id, fields = entry
+    return f"id: {entry_id}\nevent: order.status\ndata: {json.dumps(fields)}\n\n"
+
+
+class OrderStreamHub:
+    """
+    Подписчики SSE по тенантам. Сколько бы ни было подписчиков, процесс держит одно блокирующее
+    XREAD по всем нужным потокам; подписчик стоит одну asyncio.Queue.
+    """
+
+    def __init__(self, client: redis.Redis, block_ms: int, queue_size: int) -> None:
+        self._redis = client
+        self._block_ms = block_ms
+        self._queue_size = queue_size
+        self._followers: dict[str, set[asyncio.Queue]] = {}
+        self._cursors: dict[str, str] = {}
+        self._reader: asyncio.Task | None = None
+
+    async def follow(self, tenant_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        followers = self._followers.setdefault(tenant_id, set())
+        followers.add(queue)
+        if tenant_id not in self._cursors:
+            # Курсор — последняя запись на момент подписки: всё новее дойдёт через XREAD
+            latest = await self._redis.xrevrange(order_stream_key(tenant_id), count=1)
+            self._cursors[tenant_id] = latest[0][0] if latest else "0-0"
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read_loop())
+        return queue
+
+    def unfollow(self, tenant_id: str, queue: asyncio.Queue) -> None:
+        followers = self._followers.get(tenant_id)
+        if followers is None:
+            return
+        followers.discard(queue)
+        if not followers:
+            del self._followers[tenant_id]
+            self._cursors.pop(tenant_id, None)
+
+    async def replay(self, tenant_id: str, last_event_id: str) -> AsyncIterator[StreamEntry | None]:
+        """
+        Записи после last_event_id, страницами. None первым элементом — часть истории уже
+        вытеснена (MAXLEN): клиенту нужно перечитать состояние через REST.
+        """
+        key = order_stream_key(tenant_id)
+        last = parse_stream_id(last_event_id)
+        first = await self._redis.xrange(key, count=1)
+        if first and last is not None and parse_stream_id(first[0][0]) > last:
+            yield None
+        cursor = f"({last[0]}-{last[1]}"
+        while True:
+            page = await self._redis.xrange(key, min=cursor, count=500)
+            for entry in page:
+                yield entry
+            if len(page) < 500:
+                return
+            cursor = f"({page[-1][0]}"
+
+    async def _read_loop(self) -> None:
+        while self._followers:
+            try:
+                response = await self._redis.xread(
+                    {order_stream_key(t): c for t, c in self._cursors.items()},
+                    count=500,
+                    block=self._block_ms,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Order stream read error: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            # RESP2 — список [key, entries], RESP3 — словарь
+            items = response.items() if isinstance(response, dict) else response or ()
+            for key, entries in items:
+                tenant_id = key.removeprefix(ORDER_STREAM_PREFIX)
+                if tenant_id not in self._cursors or not entries:
+                    continue
+                self._cursors[tenant_id] = entries[-1][0]
+                for queue in list(self._followers.get(tenant_id, ())):
+                    if queue.qsize() >= self._queue_size:
+                        self.unfollow(tenant_id, queue)
+                        queue.put_nowait(_OVERFLOW)
+                        continue
+                    for entry in entries:
+                        queue.put_nowait(entry)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        await self._redis.aclose()
+
+
+async def order_event_stream(
+    hub: OrderStreamHub, tenant_id: str, last_event_id: str | None
+) -> AsyncIterator[str]:
+    """Тело text/event-stream: хвост после Last-Event-ID, затем живые события и keep-alive."""
+    queue = await hub.follow(tenant_id)
+    try:
+        yield f"retry: {settings.sse_retry_ms}\n\n"
+        last = None
+        if parse_stream_id(last_event_id) is not None:
+            async for entry in hub.replay(tenant_id, last_event_id):
+                if entry is None:
+                    yield "event: reset\ndata: {}\n\n"
+                    continue
+                last = parse_stream_id(entry[0])
+                yield format_sse(entry)
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), settings.sse_keepalive_seconds)
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _OVERFLOW:
+                return
+            entry_id = parse_stream_id(item[0])
+            if last is not None and entry_id <= last:
+                continue
+            last = entry_id
+            yield format_sse(item)
+    finally:
+        hub.unfollow(tenant_id, queue)
+
+
+_hub: OrderStreamHub | None = None
+
+
+def get_order_stream_hub() -> OrderStreamHub:
+    global _hub
+    if _hub is None:
+        _hub = OrderStreamHub(
+            redis.from_url(settings.redis_url, decode_responses=True),
+            block_ms=settings.sse_block_ms,
+            queue_size=settings.sse_queue_size,
+        )
+    return _hub
+
+
+async def close_order_stream_hub() -> None:
+    global _hub
+    if _hub is not None:
+        await _hub.close()
+        _hub = None
@@ -0,0 +1,31 @@
+"""
+@file: outbox.py
+@description: Transactional outbox: задача Celery пишется в таблицу outbox в той же транзакции,
+    что и изменение данных; в брокер её отправляет relay (services.worker.outbox_relay).
+@dependencies: sqlalchemy, db.models, services.api.config
+@created: 2026-10-19
+"""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from db.models import OutboxMessage
+from services.api.config import settings
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TASKS_MODULE = "services.worker.tasks"
+
+
+def enqueue_task(db: Session, task: str, **kwargs: Any) -> None:
+    """
+    Добавить задачу в outbox текущей транзакции (commit — на стороне вызывающего).
+    task — короткое имя задачи из services.worker.tasks, kwargs — JSON-сериализуемые аргументы.
+    Если worker отключён (CELERY_BROKER_URL не задан) — только лог.
+    """
+    if not settings.celery_broker_url:
+        logger.info("Worker disabled (CELERY_BROKER_URL not set); skipping %s", task)
+        return
+    db.add(OutboxMessage(task_name=f"{TASKS_MODULE}.{task}", kwargs=kwargs))
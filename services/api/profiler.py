@@ -0,0 +1,74 @@
+"""
+@file: profiler.py
+@description: Сэмплирующий профилировщик процесса API: фоновый поток раз в interval снимает
+    стеки всех потоков (sys._current_frames) и считает одинаковые стеки. Вывод — collapsed
+    stacks (flamegraph.pl, speedscope, inferno). Пока профиль не запрошен, ничего не работает.
+@dependencies: stdlib
+@created: 2026-10-19
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+# Глубина стека: дальше — обрезается от корня (рамки ближе к листу важнее)
+MAX_STACK_DEPTH = 128
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """В этом процессе уже идёт профилирование."""
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    marker = f"{os.sep}site-packages{os.sep}"
+    if marker in filename:
+        filename = filename.split(marker, 1)[1]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _fold(frame: FrameType | None, thread_name: str) -> str:
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(f"thread:{thread_name}")
+    # collapsed-формат: корень слева, «;» — разделитель рамок
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float) -> tuple[Counter[str], int]:
+    """
+    Сэмплировать стеки всех потоков процесса (кроме своего) seconds секунд с шагом interval.
+    Вернуть счётчик свёрнутых стеков и число снимков. Один профиль на процесс — иначе ProfilerBusy.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy
+    try:
+        own = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        snapshots = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    stacks[_fold(frame, names.get(ident, str(ident)))] += 1
+            snapshots += 1
+            time.sleep(interval)
+        return stacks, snapshots
+    finally:
+        _lock.release()
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    """Строки «frame;frame;frame count» — вход flamegraph.pl / speedscope / inferno."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
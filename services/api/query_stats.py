@@ -0,0 +1,119 @@
+"""
+@file: query_stats.py
+@description: SQL-инструментирование: число запросов и время в БД на HTTP-запрос (contextvar),
+    лог медленных запросов с нормализованным текстом, подсчёт запросов для тестов бюджета.
+@dependencies: sqlalchemy, services.api.logging_config
+@created: 2026-10-19
+"""
+
+import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Длина нормализованного текста в логе медленных запросов
+SLOW_QUERY_MAX_CHARS = 2000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class QueryStats:
+    """Счётчики одного HTTP-запроса; объект общий для event loop и потоков threadpool."""
+
+    count: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def db_ms(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+
+query_stats_ctx: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """Начать учёт для текущего запроса (middleware); потоки запроса видят тот же объект."""
+    stats = QueryStats()
+    query_stats_ctx.set(stats)
+    return stats
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Текст запроса без значений: литералы и плейсхолдеры → ?, IN (?, ?, …) → IN (...),
+    пробелы схлопнуты. Одинаковые по форме запросы группируются в логе в одну строку.
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()[:SLOW_QUERY_MAX_CHARS]
+
+
+def instrument_queries(engine: Engine, slow_query_ms: float) -> None:
+    """
+    before/after_cursor_execute: время каждого запроса идёт в QueryStats текущего HTTP-запроса;
+    запросы дольше slow_query_ms (0 — выкл.) пишутся в лог warning'ом с нормализованным текстом.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = query_stats_ctx.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        if slow_query_ms and elapsed * 1000 >= slow_query_ms:
+            if stats is not None:
+                stats.slow += 1
+            logger.warning(
+                "slow query",
+                duration_ms=round(elapsed * 1000, 2),
+                statement=normalize_sql(statement),
+                executemany=executemany,
+            )
+
+    # Ошибка запроса: after_cursor_execute не вызывается — снять время начала со стека
+    @event.listens_for(engine, "handle_error")
+    def _on_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+@contextmanager
+def capture_queries(engine: Engine) -> Iterator[list[str]]:
+    """
+    Собрать тексты всех запросов через engine внутри блока (любой поток, без contextvar).
+    Для тестов бюджета: with capture_queries(engine) as queries: ...; len(queries) <= N.
+    """
+    queries: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "after_cursor_execute", _record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "after_cursor_execute", _record)
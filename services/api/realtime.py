@@ -0,0 +1,202 @@
+"""
+@file: realtime.py
+@description: Real-time дашборд: один подписчик Redis pub/sub на процесс API раздаёт события
+    тенанта всем его WebSocket; всплески событий склеиваются в один кадр за окно coalesce.
+@dependencies: redis, fastapi, services.api.config, db.events
+@created: 2026-10-19
+"""
+
+import asyncio
+import contextlib
+import json
+from typing import Any
+
+import redis.asyncio as redis
+from fastapi import HTTPException, WebSocket
+from jose import JWTError, jwt
+
+from db.events import DASHBOARD_CHANNEL_PREFIX, dashboard_channel
+from services.api.config import settings
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def authorize_dashboard(token: str | None, tenant_id: str) -> None:
+    """JWT из ?token= (браузер не шлёт заголовки в WebSocket) должен быть выдан этому tenant."""
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token") from None
+    if not payload.get("sub") or payload.get("tenant_id") != tenant_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def _coalesce_key(event: dict[str, Any]) -> str:
+    """События об одной сущности склеиваются: в кадр попадает последнее состояние."""
+    return f"{event.get('type')}:{event.get('id', '')}"
+
+
+class DashboardHub:
+    """
+    Подписки на каналы dashboard:<tenant_id> со счётчиком сокетов: канал подписан, пока у
+    тенанта есть хотя бы одно соединение. На сокет не заводится ни задачи, ни очереди —
+    простаивающее соединение стоит только корутину обработчика.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        coalesce_seconds: float,
+        send_timeout: float,
+    ) -> None:
+        self._redis_url = redis_url
+        self._coalesce_seconds = coalesce_seconds
+        self._send_timeout = send_timeout
+        self._sockets: dict[str, set[WebSocket]] = {}
+        self._pending: dict[str, dict[str, dict[str, Any]]] = {}
+        self._flushing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._redis: redis.Redis | None = None
+        self._pubsub: redis.client.PubSub | None = None
+        self._reader: asyncio.Task | None = None
+        self._resubscribe = False
+
+    def connection_count(self) -> int:
+        return sum(len(s) for s in self._sockets.values())
+
+    async def connect(self, tenant_id: str, websocket: WebSocket) -> None:
+        sockets = self._sockets.setdefault(tenant_id, set())
+        sockets.add(websocket)
+        if len(sockets) == 1:
+            await self._subscribe(tenant_id)
+
+    async def disconnect(self, tenant_id: str, websocket: WebSocket) -> None:
+        sockets = self._sockets.get(tenant_id)
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self._sockets[tenant_id]
+            self._pending.pop(tenant_id, None)
+            if self._pubsub is not None and not self._resubscribe:
+                try:
+                    await self._pubsub.unsubscribe(dashboard_channel(tenant_id))
+                except redis.RedisError:
+                    self._resubscribe = True
+
+    async def _subscribe(self, tenant_id: str) -> None:
+        if self._pubsub is None:
+            self._redis = redis.from_url(self._redis_url)
+            self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_loop())
+        try:
+            await self._pubsub.subscribe(dashboard_channel(tenant_id))
+        except (redis.RedisError, OSError) as e:
+            # Соединение остаётся открытым; подписку восстановит цикл чтения
+            logger.warning("Dashboard subscribe failed: %s", e)
+            self._resubscribe = True
+
+    async def _restore_subscriptions(self) -> None:
+        """После сбоя Redis: переподписаться на каналы всех тенантов с открытыми сокетами."""
+        channels = [dashboard_channel(t) for t in self._sockets]
+        await self._pubsub.reset()
+        if channels:
+            await self._pubsub.subscribe(*channels)
+        self._resubscribe = False
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                if self._resubscribe:
+                    await self._restore_subscriptions()
+                if self._pubsub.connection is None:
+                    await asyncio.sleep(0.5)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message and message.get("type") == "message":
+                    self._on_message(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Dashboard pub/sub error: %s", e)
+                self._resubscribe = True
+                await asyncio.sleep(1.0)
+
+    def _on_message(self, channel: bytes | str, data: bytes | str) -> None:
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        tenant_id = channel.removeprefix(DASHBOARD_CHANNEL_PREFIX)
+        if tenant_id not in self._sockets:
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning("Dashboard event is not JSON: %r", data[:200])
+            return
+        self.enqueue(tenant_id, event)
+
+    def enqueue(self, tenant_id: str, event: dict[str, Any]) -> None:
+        """Положить событие в окно склейки тенанта; первый элемент окна планирует отправку."""
+        self._pending.setdefault(tenant_id, {})[_coalesce_key(event)] = event
+        if tenant_id not in self._flushing:
+            self._flushing.add(tenant_id)
+            task = asyncio.create_task(self._flush(tenant_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, tenant_id: str) -> None:
+        await asyncio.sleep(self._coalesce_seconds)
+        self._flushing.discard(tenant_id)
+        events = self._pending.pop(tenant_id, None)
+        sockets = list(self._sockets.get(tenant_id, ()))
+        if not events or not sockets:
+            return
+        # Кадр сериализуется один раз на тенанта, а не на каждое соединение
+        frame = json.dumps({"events": list(events.values())}, default=str)
+        await asyncio.gather(*(self._send(tenant_id, ws, frame) for ws in sockets))
+
+    async def _send(self, tenant_id: str, websocket: WebSocket, frame: str) -> None:
+        try:
+            await asyncio.wait_for(websocket.send_text(frame), self._send_timeout)
+        except Exception:
+            # Медленный или оборванный клиент не задерживает остальных: отключаем его
+            await self.disconnect(tenant_id, websocket)
+            with contextlib.suppress(Exception):
+                await websocket.close(code=1011)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+_hub: DashboardHub | None = None
+
+
+def get_dashboard_hub() -> DashboardHub:
+    """Хаб процесса: создаётся лениво при первом WebSocket (после fork воркера uvicorn)."""
+    global _hub
+    if _hub is None:
+        _hub = DashboardHub(
+            settings.redis_url,
+            coalesce_seconds=settings.realtime_coalesce_ms / 1000,
+            send_timeout=settings.ws_send_timeout_seconds,
+        )
+    return _hub
+
+
+async def close_dashboard_hub() -> None:
+    global _hub
+    if _hub is not None:
+        await _hub.close()
+        _hub = None
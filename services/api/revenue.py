@@ -0,0 +1,93 @@
+"""
+@file: revenue.py
+@description: Выручка платформы по тенантам: материализованное представление tenant_revenue_daily
+    (успешные платежи × Tenant.revenue_share по дням, миграция 008), агрегация по дням, неделям
+    и месяцам для админки и его обновление (REFRESH ... CONCURRENTLY) из воркера.
+@dependencies: sqlalchemy, db.models
+@created: 2026-10-19
+"""
+
+import time
+from datetime import date
+from typing import Literal
+from uuid import UUID
+
+from sqlalchemy import (
+    Date,
+    Integer,
+    Numeric,
+    Select,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from db.models import Tenant
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RevenuePeriod = Literal["day", "week", "month"]
+
+# Не в metadata моделей: представление создаёт миграция, а не create_all
+tenant_revenue_daily = table(
+    "tenant_revenue_daily",
+    column("tenant_id", PG_UUID(as_uuid=True)),
+    column("day", Date),
+    column("payments_count", Integer),
+    column("gross", Numeric(14, 2)),
+    column("platform_revenue", Numeric(14, 2)),
+)
+
+
+def revenue_query(
+    period: RevenuePeriod = "month",
+    date_from: date | None = None,
+    date_to: date | None = None,
+    tenant_id: UUID | None = None,
+) -> Select:
+    """
+    Выручка по (тенант, начало периода) за дни [date_from, date_to). Период, начатый до
+    date_from, попадает в выборку частично.
+    """
+    mv = tenant_revenue_daily.c
+    # Период — литерал, а не параметр: иначе date_trunc в SELECT и GROUP BY получают разные
+    # bind-параметры и Postgres не считает выражения одинаковыми
+    period_start = func.date_trunc(literal_column(f"'{period}'"), mv.day).cast(Date)
+    stmt = (
+        select(
+            mv.tenant_id,
+            Tenant.name.label("tenant_name"),
+            period_start.label("period_start"),
+            func.sum(mv.payments_count).label("payments_count"),
+            func.sum(mv.gross).label("gross"),
+            func.sum(mv.platform_revenue).label("platform_revenue"),
+        )
+        .join(Tenant, Tenant.id == mv.tenant_id)
+        .group_by(mv.tenant_id, Tenant.name, period_start)
+        .order_by(period_start, mv.tenant_id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(mv.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(mv.day < date_to)
+    if tenant_id is not None:
+        stmt = stmt.where(mv.tenant_id == tenant_id)
+    return stmt
+
+
+def refresh_revenue_view(db: Session) -> float:
+    """
+    Пересчитать tenant_revenue_daily без блокировки чтения (CONCURRENTLY: админка во время
+    обновления видит прежние данные). Фиксирует вызывающий. Возвращает длительность, мс.
+    """
+    started = time.perf_counter()
+    db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY tenant_revenue_daily"))
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info("revenue view refreshed", duration_ms=duration_ms)
+    return duration_ms
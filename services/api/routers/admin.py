@@ -1,19 +1,40 @@
 """
 @file: admin.py
-@description: Admin - list channels, revenue. Доступ только для ADMIN_TELEGRAM_IDS.
-@dependencies: fastapi, db.models
+@description: Admin - list channels (keyset-пагинация), revenue по тенантам и периодам,
+    выгрузка заказов и просмотров, профиль процесса API (flamegraph).
+    Доступ только для ADMIN_TELEGRAM_IDS.
+@dependencies: fastapi, db.models, services.api.exports, services.api.profiler,
+    services.api.revenue
 @created: 2025-02-19
 """
 
+import os
+from datetime import date, datetime
+from decimal import Decimal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from db.models import Channel
+from db.models import Channel, OrderStatus
 from services.api.auth import get_current_admin_user_id
+from services.api.config import settings
 from services.api.deps import get_db_admin
+from services.api.exports import (
+    ExportFormat,
+    export_response,
+    orders_export_query,
+    views_export_query,
+)
+from services.api.logging_config import get_logger
+from services.api.profiler import ProfilerBusy, render_collapsed, sample_stacks
+from services.api.revenue import RevenuePeriod, revenue_query
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -30,18 +51,133 @@ class ChannelAdminResponse(BaseModel):
         from_attributes = True
 
 
+class TenantRevenueResponse(BaseModel):
+    tenant_id: UUID
+    tenant_name: str
+    period_start: date
+    payments_count: int
+    gross: float
+    platform_revenue: float
+
+    class Config:
+        from_attributes = True
+
+
+class RevenueResponse(BaseModel):
+    period: RevenuePeriod
+    total_gross: float
+    total_revenue: float
+    by_tenant: list[TenantRevenueResponse]
+
+
 @router.get("/channels", response_model=list[ChannelAdminResponse], summary="Все каналы (админ)")
 def admin_list_channels(
+    response: Response,
+    after: UUID | None = Query(None, description="id последнего канала предыдущей страницы"),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db_admin),
     _admin_id: int = Depends(get_current_admin_user_id),
 ):
-    return [ChannelAdminResponse.model_validate(c) for c in db.query(Channel).all()]
+    """
+    Каналы всех тенантов по id, страницами: только колонки ответа, без загрузки слотов и заказов.
+    Полная страница — id для следующей в заголовке X-Next-Cursor (параметр after).
+    """
+    stmt = (
+        select(
+            Channel.id,
+            Channel.tenant_id,
+            Channel.username,
+            Channel.slot_duration,
+            Channel.price_per_slot,
+            Channel.is_active,
+        )
+        .order_by(Channel.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(Channel.id > after)
+    rows = db.execute(stmt).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return [ChannelAdminResponse.model_validate(row) for row in rows]
 
 
-@router.get("/revenue", summary="Выручка (админ)")
+@router.get("/revenue", response_model=RevenueResponse, summary="Выручка (админ)")
 def admin_revenue(
+    period: RevenuePeriod = Query("month", description="day, week или month"),
+    date_from: date | None = Query(None, description="День платежа от (включительно)"),
+    date_to: date | None = Query(None, description="День платежа до (не включительно)"),
+    tenant_id: UUID | None = Query(None),
     db: Session = Depends(get_db_admin),
     _admin_id: int = Depends(get_current_admin_user_id),
 ):
-    # Placeholder: sum payments or order amounts grouped by tenant
-    return {"total_revenue": 0, "by_tenant": []}
+    """
+    Успешные платежи по тенантам и периодам (дни UTC): gross — оборот, platform_revenue — доля
+    платформы (Tenant.revenue_share). Читается из tenant_revenue_daily: данные отстают на
+    интервал REVENUE_REFRESH_INTERVAL_SECONDS.
+    """
+    rows = db.execute(revenue_query(period, date_from, date_to, tenant_id)).all()
+    return RevenueResponse(
+        period=period,
+        total_gross=sum((row.gross for row in rows), Decimal(0)),
+        total_revenue=sum((row.platform_revenue for row in rows), Decimal(0)),
+        by_tenant=[TenantRevenueResponse.model_validate(row) for row in rows],
+    )
+
+
+@router.get("/export/orders", summary="Выгрузка заказов всех тенантов (админ)")
+def admin_export_orders(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv или ndjson"),
+    date_from: datetime | None = Query(None, description="created_at от (включительно)"),
+    date_to: datetime | None = Query(None, description="created_at до (не включительно)"),
+    channel_id: UUID | None = Query(None),
+    status: OrderStatus | None = Query(None),
+    tenant_id: UUID | None = Query(None, description="Только заказы каналов тенанта"),
+    _admin_id: int = Depends(get_current_admin_user_id),
+):
+    stmt = orders_export_query(date_from, date_to, channel_id, status, tenant_id)
+    return export_response(stmt, fmt, "orders", None)
+
+
+@router.get("/export/views", summary="Выгрузка просмотров всех тенантов (админ)")
+def admin_export_views(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv или ndjson"),
+    date_from: datetime | None = Query(None, description="Начало периода (включительно)"),
+    date_to: datetime | None = Query(None, description="Конец периода (не включительно)"),
+    channel_id: UUID | None = Query(None),
+    tenant_id: UUID | None = Query(None, description="Только просмотры каналов тенанта"),
+    _admin_id: int = Depends(get_current_admin_user_id),
+):
+    stmt = views_export_query(date_from, date_to, channel_id, tenant_id)
+    return export_response(stmt, fmt, "views", None)
+
+
+@router.post(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Профиль процесса API (админ)",
+    responses={409: {"description": "В этом воркере уже идёт профилирование"}},
+)
+async def admin_profile(
+    seconds: float = Query(10.0, gt=0, description="Длительность сэмплирования, с"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Шаг сэмплирования, мс"),
+    admin_id: int = Depends(get_current_admin_user_id),
+):
+    """
+    Сэмплировать стеки всех потоков воркера, принявшего запрос (pid — в X-Profile-Pid), и
+    вернуть collapsed stacks: flamegraph.pl, speedscope, inferno. Сэмплер работает в отдельном
+    потоке — event loop в это время продолжает обслуживать запросы и попадает в профиль.
+    Включается PROFILING_ENABLED; длительность ограничена PROFILING_MAX_SECONDS.
+    """
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    seconds = min(seconds, settings.profiling_max_seconds)
+    logger.info("admin profile started", admin_id=admin_id, seconds=seconds, sample=False)
+    try:
+        stacks, snapshots = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Profiling already in progress") from None
+    return PlainTextResponse(
+        render_collapsed(stacks),
+        headers={"X-Profile-Pid": str(os.getpid()), "X-Profile-Samples": str(snapshots)},
+    )
@@ -1,6 +1,6 @@
 """
 @file: analytics.py
-@description: Analytics - views by day, summary (tenant-scoped).
+@description: Analytics - views by day, summary, views export CSV/NDJSON (tenant-scoped).
 @dependencies: fastapi, db.models, sqlalchemy
 @created: 2025-02-20
 """
@@ -13,7 +13,8 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from db.models import Channel, Order, View
-from services.api.deps import get_db_with_required_tenant
+from services.api.deps import get_db_with_required_tenant, get_integration_tenant_id
+from services.api.exports import ExportFormat, export_response, views_export_query
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -54,6 +55,22 @@ def get_views_by_day(
     return out
 
 
+@router.get("/views/export", summary="Выгрузка просмотров (CSV/NDJSON)")
+def export_views(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv или ndjson"),
+    date_from: datetime | None = Query(None, description="Начало периода (включительно)"),
+    date_to: datetime | None = Query(None, description="Конец периода (не включительно)"),
+    channel_id: UUID | None = Query(None, description="Фильтр по каналу"),
+    tenant_id: UUID = Depends(get_integration_tenant_id),
+):
+    """
+    Просмотры tenant потоком (id, order_id, channel_id, timestamp), по времени. По умолчанию —
+    последние 30 дней. Авторизация — X-API-Key или Bearer JWT.
+    """
+    stmt = views_export_query(date_from, date_to, channel_id)
+    return export_response(stmt, fmt, "views", tenant_id)
+
+
 @router.get("/summary", summary="Сводка (каналы, заказы, просмотры, выручка)")
 def get_summary(db: Session = Depends(get_db_with_required_tenant)):
     """Сводные счётчики tenant: channels_count, orders_count, views_total, revenue_total."""
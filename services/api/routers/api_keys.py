@@ -5,7 +5,6 @@
 @created: 2025-02-20
 """
 
-import hashlib
 import secrets
 from datetime import datetime
 from uuid import UUID
@@ -15,7 +14,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from db.models import ApiKey
-from services.api.auth import get_current_tenant_id
+from services.api.auth import get_current_tenant_id, hash_api_key
 from services.api.deps import get_db_with_required_tenant
 
 router = APIRouter(prefix="/api-keys", tags=["api-keys"])
@@ -23,10 +22,6 @@ router = APIRouter(prefix="/api-keys", tags=["api-keys"])
 PREFIX = "lytslot_"
 
 
-def _hash_key(raw: str) -> str:
-    return hashlib.sha256(raw.encode()).hexdigest()
-
-
 def _generate_key() -> str:
     return PREFIX + secrets.token_urlsafe(32)
 
@@ -70,7 +65,7 @@ def create_api_key(
 ):
     """Создаёт ключ и возвращает его один раз. Сохраните ключ — повторно он не показывается."""
     raw_key = _generate_key()
-    key_hash = _hash_key(raw_key)
+    key_hash = hash_api_key(raw_key)
     api_key = ApiKey(tenant_id=tenant_id, key_hash=key_hash, name=body.name or None)
     db.add(api_key)
     db.commit()
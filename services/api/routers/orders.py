@@ -1,6 +1,7 @@
 """
 @file: orders.py
-@description: Orders - create, list, get by id, update status (tenant-scoped).
+@description: Orders - create, list, get by id, update status, SSE status stream, CSV/NDJSON
+    export (tenant-scoped).
 @dependencies: fastapi, db.models, shared.schemas
 @created: 2025-02-19
 """
@@ -8,15 +9,19 @@
 from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from db.models import Order, OrderStatus
-from services.api.auth import get_current_user_id
-from services.api.config import settings
-from services.api.deps import get_db_with_required_tenant
+from db.events import record_event
+from db.models import Order, OrderStatus, Slot
+from services.api.auth import get_current_tenant_id, get_current_user_id
+from services.api.deps import get_db_with_required_tenant, get_integration_tenant_id
+from services.api.exports import ExportFormat, export_response, orders_export_query
 from services.api.logging_config import get_logger
+from services.api.order_stream import get_order_stream_hub, order_event_stream
+from services.api.outbox import enqueue_task
 from shared.schemas import OrderCreate, OrderUpdate
 
 logger = get_logger(__name__)
@@ -46,6 +51,40 @@ def list_orders(db: Session = Depends(get_db_with_required_tenant)):
     return [OrderResponse.model_validate(o) for o in orders]
 
 
+@router.get("/events", summary="Поток смен статуса заказов (SSE)")
+async def order_events(
+    tenant_id: UUID = Depends(get_integration_tenant_id),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """
+    text/event-stream: `event: order.status`, data {order_id, status, ts}. Авторизация —
+    X-API-Key или Bearer JWT. После обрыва клиент шлёт Last-Event-ID и получает пропущенное;
+    `event: reset` — часть истории вытеснена, состояние нужно перечитать через GET /api/orders.
+    """
+    return StreamingResponse(
+        order_event_stream(get_order_stream_hub(), str(tenant_id), last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/export", summary="Выгрузка заказов (CSV/NDJSON)")
+def export_orders(
+    fmt: ExportFormat = Query("csv", alias="format", description="csv или ndjson"),
+    date_from: datetime | None = Query(None, description="created_at от (включительно)"),
+    date_to: datetime | None = Query(None, description="created_at до (не включительно)"),
+    channel_id: UUID | None = Query(None, description="Фильтр по каналу"),
+    status: OrderStatus | None = Query(None, description="Фильтр по статусу"),
+    tenant_id: UUID = Depends(get_integration_tenant_id),
+):
+    """
+    Все заказы tenant потоком, по created_at. Авторизация — X-API-Key или Bearer JWT. Строки
+    читаются серверным курсором пачками: память не растёт с объёмом выгрузки.
+    """
+    stmt = orders_export_query(date_from, date_to, channel_id, status)
+    return export_response(stmt, fmt, "orders", tenant_id)
+
+
 @router.get("/{order_id}", response_model=OrderResponse, summary="Заказ по ID")
 def get_order(order_id: UUID, db: Session = Depends(get_db_with_required_tenant)):
     order = db.query(Order).filter(Order.id == order_id).first()
@@ -60,7 +99,11 @@ def create_order(
     body: OrderCreate,
     db: Session = Depends(get_db_with_required_tenant),
     user_id: int = Depends(get_current_user_id),
+    tenant_id: UUID = Depends(get_current_tenant_id),
 ):
+    slot_datetime = db.query(Slot.datetime).filter(Slot.id == body.slot_id).scalar()
+    if slot_datetime is None:
+        raise HTTPException(status_code=404, detail="Slot not found")
     order = Order(
         advertiser_id=user_id,
         channel_id=body.channel_id,
@@ -68,23 +111,21 @@ def create_order(
         content=body.content,
         erid=body.erid,
         status=OrderStatus.DRAFT,
+        publish_at=slot_datetime,
     )
     db.add(order)
+    db.flush()
+    # Публикацию ставит планировщик (schedule_due_orders) по publish_at, здесь — только уведомление.
+    # Outbox в той же транзакции: событие не теряется при сбое брокера и не тормозит ответ.
+    enqueue_task(
+        db,
+        "notify_new_order",
+        order_id=str(order.id),
+        request_id=getattr(request.state, "request_id", None),
+    )
+    record_event(db, tenant_id, "order", id=str(order.id), status=order.status)
     db.commit()
     db.refresh(order)
-    request_id = getattr(request.state, "request_id", None)
-    if settings.celery_broker_url:
-        try:
-            from services.worker.tasks import notify_new_order, publish_order
-
-            publish_order.delay(str(order.id), request_id=request_id)
-            notify_new_order.delay(str(order.id), request_id=request_id)
-        except Exception:
-            logger.warning("Failed to enqueue tasks", exc_info=True)
-    else:
-        logger.info(
-            "Worker disabled (CELERY_BROKER_URL not set); skipping publish_order, notify_new_order"
-        )
     return OrderResponse.model_validate(order)
 
 
@@ -94,6 +135,7 @@ def update_order(
     order_id: UUID,
     body: OrderUpdate,
     db: Session = Depends(get_db_with_required_tenant),
+    tenant_id: UUID = Depends(get_current_tenant_id),
 ):
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
@@ -104,16 +146,14 @@ def update_order(
         raise HTTPException(
             status_code=400, detail=f"Invalid status. Allowed: {[s.value for s in OrderStatus]}"
         ) from None
+    if order.status == OrderStatus.CANCELLED:
+        enqueue_task(
+            db,
+            "notify_order_cancelled",
+            order_id=str(order.id),
+            request_id=getattr(request.state, "request_id", None),
+        )
+    record_event(db, tenant_id, "order", id=str(order.id), status=order.status)
     db.commit()
     db.refresh(order)
-    request_id = getattr(request.state, "request_id", None)
-    if order.status == OrderStatus.CANCELLED and settings.celery_broker_url:
-        try:
-            from services.worker.tasks import notify_order_cancelled
-
-            notify_order_cancelled.delay(str(order.id), request_id=request_id)
-        except Exception:
-            logger.warning("Failed to enqueue notify_order_cancelled", exc_info=True)
-    elif order.status == OrderStatus.CANCELLED and not settings.celery_broker_url:
-        logger.info("Worker disabled; skipping notify_order_cancelled")
     return OrderResponse.model_validate(order)
@@ -9,7 +9,7 @@ from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, noload
 
 from db.models import Channel, Slot, SlotStatus
 from services.api.deps import get_db_with_required_tenant
@@ -23,9 +23,13 @@ def list_slots(
     channel_id: UUID = Query(..., description="Filter by channel"),
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
+    status: SlotStatus | None = Query(None, description="Filter by status, e.g. free"),
     db: Session = Depends(get_db_with_required_tenant),
 ):
-    q = db.query(Slot).filter(Slot.channel_id == channel_id)
+    # Заказы слота в ответ не входят — без selectin-подгрузки orders на каждый список
+    q = db.query(Slot).options(noload(Slot.orders)).filter(Slot.channel_id == channel_id)
+    if status is not None:
+        q = q.filter(Slot.status == status)
     if date_from is not None:
         q = q.filter(Slot.datetime >= date_from)
     if date_to is not None:
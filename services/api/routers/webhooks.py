@@ -1,22 +1,78 @@
 """
 @file: webhooks.py
-@description: Stripe and YooKassa webhooks -> Celery task to update payment.
-@dependencies: fastapi, services.api.config
+@description: Stripe and YooKassa webhooks: проверка подлинности, дедупликация по id события,
+    запись сырого события + задачи process_webhook (outbox) в одной транзакции, быстрый ответ.
+@dependencies: fastapi, db.models, services.api.webhook_auth, services.api.outbox
 @created: 2025-02-19
 """
 
-from fastapi import APIRouter, BackgroundTasks, Request, Response
+import json
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+from db.database import SessionLocal
+from db.models import WebhookEvent
+from services.api.logging_config import get_logger
+from services.api.outbox import enqueue_task
+from services.api.webhook_auth import verify_stripe_signature, verify_yookassa_ip
+from shared.schemas.payment import PaymentEvent
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
 
-@router.post("/stripe", summary="Webhook Stripe")
-async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
-    _body = await request.body()  # TODO: verify signature, process_webhook.delay("stripe", _body)
+def _parse_event(provider: str, body: bytes) -> tuple[PaymentEvent, dict]:
+    try:
+        payload = json.loads(body)
+        return PaymentEvent.parse(provider, payload), payload
+    except (ValueError, KeyError, TypeError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid webhook payload") from None
+
+
+def _accept_event(event: PaymentEvent, payload: dict) -> bool:
+    """
+    Сохранить событие и поставить process_webhook в outbox. False — дубликат (уже принято).
+    Уникальность (provider, event_id) обеспечивает БД: повтор от провайдера не создаёт задачу.
+    """
+    db = SessionLocal()
+    try:
+        inserted = db.execute(
+            insert(WebhookEvent)
+            .values(provider=event.provider, event_id=event.event_id, payload=payload)
+            .on_conflict_do_nothing(constraint="uq_webhook_events_event")
+            .returning(WebhookEvent.id)
+        ).scalar()
+        if inserted is not None:
+            enqueue_task(db, "process_webhook", provider=event.provider, event_id=event.event_id)
+        db.commit()
+        return inserted is not None
+    finally:
+        db.close()
+
+
+async def _handle(provider: str, body: bytes) -> Response:
+    event, payload = _parse_event(provider, body)
+    if event.status is None or not event.invoice_id:
+        # Событие не влияет на оплату — подтверждаем, чтобы провайдер не повторял
+        return Response(status_code=200)
+    accepted = await run_in_threadpool(_accept_event, event, payload)
+    if not accepted:
+        logger.info("Webhook %s duplicate event %s", provider, event.event_id)
     return Response(status_code=200)
 
 
+@router.post("/stripe", summary="Webhook Stripe")
+async def stripe_webhook(request: Request):
+    body = await request.body()
+    verify_stripe_signature(body, request.headers.get("Stripe-Signature"))
+    return await _handle("stripe", body)
+
+
 @router.post("/yookassa", summary="Webhook ЮKassa")
-async def yookassa_webhook(request: Request, background_tasks: BackgroundTasks):
-    _body = await request.json()  # TODO: verify signature, process_webhook.delay("yookassa", _body)
-    return Response(status_code=200)
+async def yookassa_webhook(request: Request):
+    verify_yookassa_ip(request.client.host if request.client else None)
+    return await _handle("yookassa", await request.body())
@@ -0,0 +1,54 @@
+"""
+@file: server.py
+@description: Production-профиль API: gunicorn-воркер uvicorn с uvloop и httptools, число
+    воркеров по CPU (с учётом квоты cgroup контейнера).
+@dependencies: gunicorn, uvicorn-worker, uvloop, httptools
+@created: 2026-10-19
+
+Запуск: gunicorn -c services/api/gunicorn_conf.py services.api.main:app
+"""
+
+import os
+from pathlib import Path
+
+from uvicorn_worker import UvicornWorker
+
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+
+def available_cpus() -> int:
+    """CPU, доступные процессу: affinity и квота cgroup v2 (limits.cpu пода), минимум 1."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # не Linux
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = CGROUP_CPU_MAX.read_text().split()
+        if quota != "max":
+            cpus = min(cpus, -(-int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def default_workers() -> int:
+    """
+    WEB_CONCURRENCY, иначе по воркеру на CPU: воркеры асинхронные, блокирующие обработчики
+    уходят в пул потоков — больше процессов, чем ядер, только добавляет переключений.
+    """
+    value = os.getenv("WEB_CONCURRENCY", "").strip()
+    if value:
+        return max(int(value), 1)
+    return available_cpus()
+
+
+class ApiWorker(UvicornWorker):
+    """Uvicorn-воркер с явными uvloop и httptools (без тихого отката на asyncio/h11)."""
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "loop": "uvloop",
+        "http": "httptools",
+        "proxy_headers": True,
+        "server_header": False,
+    }
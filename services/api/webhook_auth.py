@@ -0,0 +1,78 @@
+"""
+@file: webhook_auth.py
+@description: Проверка подлинности webhook: подпись Stripe (HMAC-SHA256), IP-allowlist ЮKassa.
+@dependencies: services.api.config
+@created: 2026-10-19
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import time
+
+from fastapi import HTTPException
+
+from services.api.config import settings
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def verify_stripe_signature(payload: bytes, sig_header: str | None) -> None:
+    """
+    Заголовок Stripe-Signature: t=<ts>,v1=<hex>[,v1=...]; подпись — HMAC-SHA256(secret,
+    "t.payload"). Отклоняет устаревшие события (защита от повторного воспроизведения).
+    """
+    secret = settings.stripe_webhook_secret
+    if not secret:
+        raise HTTPException(status_code=503, detail="Stripe webhook secret not configured")
+    if not sig_header:
+        raise HTTPException(status_code=400, detail="Missing Stripe-Signature")
+    timestamp = None
+    signatures: list[str] = []
+    for part in sig_header.split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if not timestamp or not signatures:
+        raise HTTPException(status_code=400, detail="Invalid Stripe-Signature")
+    try:
+        ts = int(timestamp)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Stripe-Signature") from None
+    if abs(time.time() - ts) > settings.stripe_webhook_tolerance_seconds:
+        raise HTTPException(status_code=400, detail="Stripe event expired")
+    expected = hmac.new(
+        secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256
+    ).hexdigest()
+    if not any(hmac.compare_digest(expected, s) for s in signatures):
+        raise HTTPException(status_code=401, detail="Invalid Stripe signature")
+
+
+def sign_stripe_payload(payload: bytes, secret: str, timestamp: int | None = None) -> str:
+    """Заголовок Stripe-Signature для payload (тесты и генератор нагрузки)."""
+    ts = int(timestamp if timestamp is not None else time.time())
+    sig = hmac.new(secret.encode(), f"{ts}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={sig}"
+
+
+def verify_yookassa_ip(client_host: str | None) -> None:
+    """
+    ЮKassa не подписывает уведомления: проверяем, что запрос пришёл из её сетей. client_host —
+    адрес из X-Forwarded-For, только если прокси входит в FORWARDED_ALLOW_IPS (gunicorn/uvicorn).
+    """
+    allowed = settings.yookassa_allowed_ips.strip()
+    if allowed == "*":
+        return
+    try:
+        ip = ipaddress.ip_address(client_host or "")
+    except ValueError:
+        raise HTTPException(status_code=403, detail="Forbidden") from None
+    for cidr in allowed.split(","):
+        if cidr.strip() and ip in ipaddress.ip_network(cidr.strip(), strict=False):
+            return
+    # Адрес прокси вместо адреса ЮKassa — FORWARDED_ALLOW_IPS не включает прокси
+    logger.warning("yookassa webhook from disallowed address", client_host=str(ip))
+    raise HTTPException(status_code=403, detail="Forbidden")
@@ -1,39 +1,157 @@
 """
 @file: api_client.py
-@description: HTTP client for FastAPI (auth, channels, slots, orders).
-@dependencies: httpx
+@description: HTTP client for FastAPI (auth, channels, slots, orders): один httpx.AsyncClient
+    на процесс бота (keep-alive, опционально HTTP/2), повтор идемпотентных GET с backoff,
+    латентность каждого вызова (гистограмма API_LATENCY); JWT из TokenCache, сбрасывается
+    при 401.
+@dependencies: httpx, services.bot.token_cache, services.bot.metrics
 @created: 2025-02-19
 """
 
+import asyncio
+import logging
+import random
+import time
 from datetime import datetime
+from typing import Any
 from uuid import UUID
 
 import httpx
+import redis.asyncio as redis
 
 from services.bot.config import settings
+from services.bot.metrics import API_LATENCY
+from services.bot.token_cache import TokenCache, token_subject
 
+logger = logging.getLogger(__name__)
 
-async def get_token(telegram_id: int) -> str | None:
+# Ответы, после которых GET безопасно повторить (API перезапускается / перегружен)
+RETRY_STATUSES = {502, 503, 504}
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_enabled() -> bool:
+    if not settings.api_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("API_HTTP2=true, but h2 is not installed (pip install 'httpx[http2]')")
+        return False
+    return True
+
+
+def create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.api_base_url,
+        http2=_http2_enabled(),
+        timeout=httpx.Timeout(settings.api_timeout_seconds),
+        limits=httpx.Limits(
+            max_connections=settings.api_max_connections,
+            max_keepalive_connections=settings.api_max_keepalive_connections,
+            keepalive_expiry=settings.api_keepalive_expiry_seconds,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Общий клиент процесса; создаётся при старте бота (start_client) или при первом вызове."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def start_client() -> None:
+    get_client()
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: случайная пауза в [0, base * 2^attempt]."""
+    return random.uniform(0, settings.api_retry_backoff_seconds * (2**attempt))
+
+
+async def _request(
+    method: str, path: str, token: str | None = None, **kwargs: Any
+) -> httpx.Response:
+    """
+    Запрос к API через общий клиент. GET повторяется при сетевой ошибке и 502/503/504 до
+    api_get_retries раз; POST/PATCH — никогда (не идемпотентны). На 401 токен пользователя
+    удаляется из кэша: следующий get_token выдаст новый, а не отозванный.
+    """
+    if token:
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Authorization": f"Bearer {token}"}
+    attempts = settings.api_get_retries + 1 if method == "GET" else 1
+    route = path.split("?")[0]
+    attempt = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            response = await get_client().request(method, path, **kwargs)
+        except httpx.TransportError:
+            elapsed = time.perf_counter() - started
+            API_LATENCY.labels(method, route, "transport_error").observe(elapsed)
+            if attempt + 1 >= attempts:
+                raise
+        else:
+            elapsed = time.perf_counter() - started
+            API_LATENCY.labels(method, route, f"{response.status_code // 100}xx").observe(elapsed)
+            logger.debug(
+                "API %s %s -> %s in %.1f ms", method, path, response.status_code, elapsed * 1000
+            )
+            if response.status_code == 401 and token:
+                telegram_id = token_subject(token)
+                if telegram_id is not None:
+                    await _token_cache.invalidate(telegram_id)
+            if response.status_code not in RETRY_STATUSES or attempt + 1 >= attempts:
+                return response
+        await asyncio.sleep(_backoff(attempt))
+        attempt += 1
+
+
+async def _issue_token(telegram_id: int) -> str | None:
     """Получить JWT по telegram_id (POST /api/auth/dev-login). Требует ENABLE_DEV_LOGIN=true."""
-    async with httpx.AsyncClient() as client:
-        r = await client.post(
-            f"{settings.api_base_url}/api/auth/dev-login",
-            json={"telegram_id": telegram_id},
-        )
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        return data.get("access_token")
+    r = await _request("POST", "/api/auth/dev-login", json={"telegram_id": telegram_id})
+    if r.status_code != 200:
+        return None
+    return r.json().get("access_token")
+
+
+def _create_token_cache(client: redis.Redis | None) -> TokenCache:
+    return TokenCache(
+        _issue_token,
+        client,
+        settings.token_refresh_margin_seconds,
+        settings.token_cache_max_entries,
+    )
+
+
+_token_cache = _create_token_cache(None)
+
+
+def setup_token_cache(client: redis.Redis | None) -> None:
+    """Общий Redis для кэша токенов (вызывается при старте бота); None — только память процесса."""
+    global _token_cache
+    _token_cache = _create_token_cache(client)
+
+
+async def get_token(telegram_id: int) -> str | None:
+    """JWT пользователя из кэша; новый запрашивается, только когда до exp осталось меньше margin."""
+    return await _token_cache.get(telegram_id)
 
 
 async def get_channels(token: str) -> list[dict]:
-    async with httpx.AsyncClient() as client:
-        r = await client.get(
-            f"{settings.api_base_url}/api/channels",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        r.raise_for_status()
-        return r.json()
+    r = await _request("GET", "/api/channels", token)
+    r.raise_for_status()
+    return r.json()
 
 
 async def get_slots(
@@ -41,35 +159,33 @@ async def get_slots(
     channel_id: UUID,
     date_from: datetime | None = None,
     date_to: datetime | None = None,
+    status: str | None = None,
 ) -> list[dict]:
-    async with httpx.AsyncClient() as client:
-        params = {"channel_id": str(channel_id)}
-        if date_from is not None:
-            params["date_from"] = date_from.isoformat()
-        if date_to is not None:
-            params["date_to"] = date_to.isoformat()
-        r = await client.get(
-            f"{settings.api_base_url}/api/slots",
-            headers={"Authorization": f"Bearer {token}"},
-            params=params,
-        )
-        r.raise_for_status()
-        return r.json()
+    params = {"channel_id": str(channel_id)}
+    if status is not None:
+        params["status"] = status
+    if date_from is not None:
+        params["date_from"] = date_from.isoformat()
+    if date_to is not None:
+        params["date_to"] = date_to.isoformat()
+    r = await _request("GET", "/api/slots", token, params=params)
+    r.raise_for_status()
+    return r.json()
 
 
 async def create_order(
     token: str, channel_id: UUID, slot_id: UUID, content: dict, erid: str | None = None
 ) -> dict:
-    async with httpx.AsyncClient() as client:
-        r = await client.post(
-            f"{settings.api_base_url}/api/orders",
-            headers={"Authorization": f"Bearer {token}"},
-            json={
-                "channel_id": str(channel_id),
-                "slot_id": str(slot_id),
-                "content": content,
-                "erid": erid,
-            },
-        )
-        r.raise_for_status()
-        return r.json()
+    r = await _request(
+        "POST",
+        "/api/orders",
+        token,
+        json={
+            "channel_id": str(channel_id),
+            "slot_id": str(slot_id),
+            "content": content,
+            "erid": erid,
+        },
+    )
+    r.raise_for_status()
+    return r.json()
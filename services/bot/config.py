@@ -11,6 +11,40 @@ from pydantic_settings import BaseSettings
 class BotSettings(BaseSettings):
     bot_token: str = ""
     api_base_url: str = "http://localhost:8000"
+    redis_url: str = "redis://localhost:6379/0"
+    # redis — FSM переживает рестарт и общая для нескольких реплик; memory — только для разработки
+    fsm_storage: str = "redis"
+    # TTL незавершённого сценария заказа в Redis (сек)
+    fsm_state_ttl_seconds: int = 86400
+    fsm_data_ttl_seconds: int = 86400
+    # За сколько секунд до exp JWT запрашивается новый
+    token_refresh_margin_seconds: int = 120
+    # Сколько пользователей держит кэш JWT в памяти процесса (LRU; остальные — из Redis)
+    token_cache_max_entries: int = 10000
+    # Общий httpx.AsyncClient к API: пул соединений, HTTP/2 (нужен пакет h2), повторы GET
+    api_timeout_seconds: float = 10.0
+    api_max_connections: int = 100
+    api_max_keepalive_connections: int = 20
+    api_keepalive_expiry_seconds: float = 30.0
+    api_http2: bool = False
+    api_get_retries: int = 2
+    api_retry_backoff_seconds: float = 0.2
+    # Свободные слоты канала в пикере: кэш на пользователя, сбрасывается при занятии слота
+    slot_cache_ttl_seconds: int = 300
+    slot_days_per_page: int = 7
+    slot_times_per_page: int = 24
+    # polling — один процесс long polling; webhook — aiohttp-приёмник, реплик может быть несколько
+    bot_mode: str = "polling"
+    webhook_url: str = ""  # публичный https-адрес бота (без пути); пусто — setWebhook не вызывается
+    webhook_path: str = "/webhook"
+    webhook_secret: str = ""  # X-Telegram-Bot-Api-Secret-Token: A-Z, a-z, 0-9, _ и -
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8081
+    webhook_max_concurrency: int = 64
+    webhook_max_connections: int = 40
+    webhook_drain_timeout_seconds: float = 25.0
+    # Prometheus: внутренний порт в обоих режимах (0 — выкл.); публичный webhook метрик не отдаёт
+    bot_metrics_port: int = 9809
 
     class Config:
         env_file = ".env"
@@ -1,7 +1,10 @@
 """
 @file: order_flow.py
-@description: FSM: выбор канала -> слот -> текст рекламы -> подтверждение заказа.
-@dependencies: aiogram, services.bot.api_client, services.bot.handlers.states
+@description: FSM: выбор канала -> день -> время слота -> текст рекламы -> подтверждение заказа.
+    Свободные слоты кэшируются на пользователя (services.bot.slot_cache); страницы дней и
+    времени листаются без запросов к API.
+@dependencies: aiogram, services.bot.api_client, services.bot.handlers.states,
+    services.bot.slot_cache
 @created: 2025-02-20
 """
 
@@ -9,16 +12,23 @@ import logging
 from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
+import httpx
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
 from services.bot.api_client import create_order, get_channels, get_slots, get_token
+from services.bot.config import settings
 from services.bot.handlers.states import OrderStates
+from services.bot.slot_cache import SlotDays, get_slot_cache, group_free_slots
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+SLOT_HORIZON_DAYS = 14
+SLOT_TIMES_PER_ROW = 4
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
 
 def _channel_keyboard(channels: list[dict]) -> InlineKeyboardMarkup:
     rows = []
@@ -30,26 +40,73 @@ def _channel_keyboard(channels: list[dict]) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def _slot_keyboard(slots: list[dict]) -> InlineKeyboardMarkup:
-    rows = []
-    for s in slots:
-        if s.get("status") != "free":
-            continue
-        dt = s.get("datetime", "")
-        try:
-            if "T" in dt:
-                d = datetime.fromisoformat(dt.replace("Z", "+00:00"))
-            else:
-                d = datetime.strptime(dt, "%Y-%m-%d %H:%M:%S")
-            label = d.strftime("%d.%m %H:%M")
-        except Exception:
-            label = dt[:16] if len(dt) > 16 else dt
-        rows.append([InlineKeyboardButton(text=label, callback_data=f"slot:{s['id']}")])
+def _pager_row(prev_data: str | None, label: str, next_data: str | None) -> list:
+    row = []
+    if prev_data:
+        row.append(InlineKeyboardButton(text="«", callback_data=prev_data))
+    row.append(InlineKeyboardButton(text=label, callback_data="slot_noop"))
+    if next_data:
+        row.append(InlineKeyboardButton(text="»", callback_data=next_data))
+    return row
+
+
+def _page_count(total: int, per_page: int) -> int:
+    return max((total + per_page - 1) // per_page, 1)
+
+
+def _day_label(day: str, count: int) -> str:
+    d = datetime.strptime(day, "%Y%m%d")
+    return f"{WEEKDAYS[d.weekday()]} {d.strftime('%d.%m')} · {count}"
+
+
+def _day_keyboard(days: SlotDays, page: int = 0) -> InlineKeyboardMarkup:
+    """Первый уровень: дни со свободными слотами, slot_days_per_page на страницу."""
+    per_page = settings.slot_days_per_page
+    pages = _page_count(len(days), per_page)
+    page = min(max(page, 0), pages - 1)
+    rows = [
+        [InlineKeyboardButton(text=_day_label(day, len(slots)), callback_data=f"slot_day:{day}:0")]
+        for day, slots in days[page * per_page : (page + 1) * per_page]
+    ]
+    if pages > 1:
+        rows.append(
+            _pager_row(
+                f"slot_days:{page - 1}" if page > 0 else None,
+                f"{page + 1}/{pages}",
+                f"slot_days:{page + 1}" if page < pages - 1 else None,
+            )
+        )
     rows.append([InlineKeyboardButton(text="Назад к каналам", callback_data="order_back_channels")])
     rows.append([InlineKeyboardButton(text="Отмена", callback_data="order_cancel")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+def _slot_keyboard(day: str, slots: list[tuple[str, str]], page: int = 0) -> InlineKeyboardMarkup:
+    """Второй уровень: время свободных слотов дня сеткой по SLOT_TIMES_PER_ROW, с пагинацией."""
+    per_page = settings.slot_times_per_page
+    pages = _page_count(len(slots), per_page)
+    page = min(max(page, 0), pages - 1)
+    chunk = slots[page * per_page : (page + 1) * per_page]
+    rows = [
+        [
+            InlineKeyboardButton(text=hm, callback_data=f"slot:{slot_id}")
+            for slot_id, hm in chunk[i : i + SLOT_TIMES_PER_ROW]
+        ]
+        for i in range(0, len(chunk), SLOT_TIMES_PER_ROW)
+    ]
+    if pages > 1:
+        rows.append(
+            _pager_row(
+                f"slot_day:{day}:{page - 1}" if page > 0 else None,
+                f"{page + 1}/{pages}",
+                f"slot_day:{day}:{page + 1}" if page < pages - 1 else None,
+            )
+        )
+    rows.append([InlineKeyboardButton(text="Назад к дням", callback_data="slot_days:0")])
+    rows.append([InlineKeyboardButton(text="Отмена", callback_data="order_cancel")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
 def _confirm_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -77,11 +134,17 @@ async def start_order_flow(callback: CallbackQuery, state: FSMContext):
             "затем снова выберите «Выбрать слот»."
         )
         return
-    await state.update_data(token=token)
+    # Список каналов нужен и на шаге «назад» — храним в FSM, а не запрашиваем у API повторно
+    await state.update_data(channels=[{"id": c["id"], "username": c["username"]} for c in channels])
     await state.set_state(OrderStates.choosing_channel)
     await callback.message.edit_text("Выберите канал:", reply_markup=_channel_keyboard(channels))
 
 
+async def _cached_channels(state: FSMContext, token: str) -> list[dict]:
+    channels = (await state.get_data()).get("channels")
+    return channels if channels is not None else await get_channels(token)
+
+
 @router.callback_query(F.data.startswith("channel:"), OrderStates.choosing_channel)
 async def on_channel_selected(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
@@ -92,42 +155,109 @@ async def on_channel_selected(callback: CallbackQuery, state: FSMContext):
         UUID(channel_id)
     except ValueError:
         return
-    data = await state.get_data()
-    token = data.get("token")
-    if not token:
+    days = await _load_slot_days(callback.from_user.id, channel_id)
+    if days is None:
         await state.clear()
         await callback.message.edit_text("Сессия истекла. Нажмите /start.")
         return
-    now = datetime.now(UTC)
-    date_from = now
-    date_to = now + timedelta(days=14)
-    slots = await get_slots(token, UUID(channel_id), date_from=date_from, date_to=date_to)
-    free_slots = [s for s in slots if s.get("status") == "free"]
+    if not days:
+        token = await get_token(callback.from_user.id)
+        await callback.message.edit_text(
+            f"В этом канале нет свободных слотов на ближайшие {SLOT_HORIZON_DAYS} дней. "
+            "Выберите другой канал или добавьте слоты в веб-кабинете.",
+            reply_markup=_channel_keyboard(await _cached_channels(state, token)),
+        )
+        return
     await state.update_data(channel_id=channel_id)
     await state.set_state(OrderStates.choosing_slot)
-    if not free_slots:
+    await callback.message.edit_text("Выберите день:", reply_markup=_day_keyboard(days))
+
+
+async def _load_slot_days(user_id: int, channel_id: str) -> SlotDays | None:
+    """
+    Свободные слоты канала по дням: из кэша пользователя или одним запросом к API
+    (фильтр status=free на сервере). None — не удалось получить токен.
+    """
+    cache = get_slot_cache()
+    days = await cache.get(user_id, channel_id)
+    if days is not None:
+        return days
+    # Токен не хранится в FSM (данные живут сутки, JWT — меньше): берём актуальный из кэша
+    token = await get_token(user_id)
+    if not token:
+        return None
+    now = datetime.now(UTC)
+    slots = await get_slots(
+        token,
+        UUID(channel_id),
+        date_from=now,
+        date_to=now + timedelta(days=SLOT_HORIZON_DAYS),
+        status="free",
+    )
+    days = group_free_slots(slots)
+    await cache.put(user_id, channel_id, days)
+    return days
+
+
+async def _slot_days_for_state(callback: CallbackQuery, state: FSMContext) -> SlotDays | None:
+    channel_id = (await state.get_data()).get("channel_id")
+    days = await _load_slot_days(callback.from_user.id, channel_id) if channel_id else None
+    if days is None:
+        await state.clear()
+        await callback.message.edit_text("Сессия истекла. Нажмите /start.")
+    return days
+
+
+def _parse_page(value: str) -> int:
+    return int(value) if value.isdigit() else 0
+
+
+@router.callback_query(F.data.startswith("slot_days:"), OrderStates.choosing_slot)
+async def on_days_page(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    days = await _slot_days_for_state(callback, state)
+    if days is None:
+        return
+    page = _parse_page(callback.data.removeprefix("slot_days:"))
+    text = "Выберите день:" if days else "Свободных слотов больше нет. Выберите другой канал."
+    await callback.message.edit_text(text, reply_markup=_day_keyboard(days, page))
+
+
+@router.callback_query(F.data.startswith("slot_day:"), OrderStates.choosing_slot)
+async def on_day_selected(callback: CallbackQuery, state: FSMContext):
+    await callback.answer()
+    day, _, page = callback.data.removeprefix("slot_day:").partition(":")
+    days = await _slot_days_for_state(callback, state)
+    if days is None:
+        return
+    slots = dict(days).get(day)
+    if not slots:
+        # День уже занят целиком (кэш сброшен и перечитан) — возвращаемся к списку дней
         await callback.message.edit_text(
-            "В этом канале нет свободных слотов на ближайшие 14 дней. "
-            "Выберите другой канал или добавьте слоты в веб-кабинете.",
-            reply_markup=_channel_keyboard(await get_channels(token)),
+            "На этот день свободных слотов не осталось. Выберите другой день:",
+            reply_markup=_day_keyboard(days),
         )
-        await state.set_state(OrderStates.choosing_channel)
         return
+    label = _day_label(day, len(slots)).rsplit(" · ", 1)[0]
     await callback.message.edit_text(
-        "Выберите слот (дата и время):", reply_markup=_slot_keyboard(free_slots)
+        f"{label}: выберите время:", reply_markup=_slot_keyboard(day, slots, _parse_page(page))
     )
 
 
+@router.callback_query(F.data == "slot_noop")
+async def on_pager_label(callback: CallbackQuery):
+    await callback.answer()
+
+
 @router.callback_query(F.data == "order_back_channels", OrderStates.choosing_slot)
 async def back_to_channels(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
-    data = await state.get_data()
-    token = data.get("token")
+    token = await get_token(callback.from_user.id)
     if not token:
         await state.clear()
         await callback.message.edit_text("Сессия истекла. Нажмите /start.")
         return
-    channels = await get_channels(token)
+    channels = await _cached_channels(state, token)
     await state.set_state(OrderStates.choosing_channel)
     await callback.message.edit_text("Выберите канал:", reply_markup=_channel_keyboard(channels))
 
@@ -170,7 +300,7 @@ async def on_content_entered(message: Message, state: FSMContext):
 async def on_order_confirm(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
     data = await state.get_data()
-    token = data.get("token")
+    token = await get_token(callback.from_user.id)
     channel_id = data.get("channel_id")
     slot_id = data.get("slot_id")
     content_text = data.get("content_text", "Реклама")
@@ -187,7 +317,14 @@ async def on_order_confirm(callback: CallbackQuery, state: FSMContext):
             erid=None,
         )
         await state.clear()
+        # Слот занят: кэш страниц канала сбрасывается у всех пользователей бота
+        await get_slot_cache().invalidate(channel_id)
         await callback.message.edit_text(f"Заказ создан. ID: {order.get('id', '')[:8]}…")
+    except httpx.HTTPStatusError as e:
+        # Слот мог занять кто-то другой — следующий показ пикера перечитает слоты из API
+        logger.warning("create_order rejected: %s", e.response.status_code)
+        await get_slot_cache().invalidate(channel_id)
+        await callback.message.edit_text(f"Ошибка создания заказа: {e}")
     except Exception as e:
         logger.exception("create_order failed")
         await callback.message.edit_text(f"Ошибка создания заказа: {e}")
@@ -1,33 +1,103 @@
 """
 @file: main.py
 @description: aiogram 3 dispatcher - FSM: channel -> slot -> content -> confirm -> order.
-@dependencies: aiogram, services.bot.handlers
+    FSM и кэш JWT в Redis: сценарий переживает рестарт, реплик бота может быть несколько.
+    Режимы: long polling (по умолчанию) или webhook (BOT_MODE=webhook).
+@dependencies: aiogram, redis, prometheus_client, services.bot.handlers
 @created: 2025-02-19
 """
 
 import asyncio
 import logging
+import sys
 
+import redis.asyncio as redis
 from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisEventIsolation, RedisStorage
+from aiohttp import web
+from prometheus_client import start_http_server
 
+from services.bot.api_client import close_client, setup_token_cache, start_client
 from services.bot.config import settings
 from services.bot.handlers.order_flow import router as order_flow_router
 from services.bot.handlers.start import router as start_router
+from services.bot.metrics import HandlerMetricsMiddleware
+from services.bot.slot_cache import setup_slot_cache
+from services.bot.webhook import create_webhook_app
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    bot = Bot(token=settings.bot_token, parse_mode=ParseMode.HTML)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
+def create_storage() -> tuple[BaseStorage, BaseEventIsolation]:
+    """
+    Redis: состояние и данные FSM с TTL; RedisEventIsolation сериализует апдейты одного
+    пользователя между репликами (иначе два воркера могут одновременно менять его FSM).
+    """
+    if settings.fsm_storage == "memory":
+        setup_token_cache(None)
+        setup_slot_cache(None)
+        return MemoryStorage(), SimpleEventIsolation()
+    client = redis.from_url(settings.redis_url)
+    setup_token_cache(client)
+    setup_slot_cache(client)
+    key_builder = DefaultKeyBuilder(prefix="fsm", with_bot_id=True)
+    storage = RedisStorage(
+        client,
+        key_builder=key_builder,
+        state_ttl=settings.fsm_state_ttl_seconds,
+        data_ttl=settings.fsm_data_ttl_seconds,
+    )
+    return storage, RedisEventIsolation(client, key_builder=key_builder)
+
+
+def create_dispatcher() -> Dispatcher:
+    storage, isolation = create_storage()
+    dp = Dispatcher(storage=storage, events_isolation=isolation)
+    # Один HTTP-клиент к API на процесс: создаётся при старте, закрывается при остановке
+    dp.startup.register(start_client)
+    dp.shutdown.register(close_client)
     dp.include_router(start_router)
     dp.include_router(order_flow_router)
-    await dp.start_polling(bot)
+    # Inner-middleware: срабатывает только для апдейтов, нашедших обработчик
+    dp.message.middleware(HandlerMetricsMiddleware("message"))
+    dp.callback_query.middleware(HandlerMetricsMiddleware("callback_query"))
+    return dp
+
+
+def create_bot() -> Bot:
+    return Bot(token=settings.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+def start_metrics_server() -> None:
+    """Prometheus на внутреннем BOT_METRICS_PORT (не на публичном порту webhook)."""
+    if settings.bot_metrics_port:
+        start_http_server(settings.bot_metrics_port)
+
+
+async def main():
+    start_metrics_server()
+    await create_dispatcher().start_polling(create_bot())
+
+
+def run_webhook() -> None:
+    """Webhook: aiohttp-сервер на WEBHOOK_HOST:WEBHOOK_PORT (за балансировщиком — N реплик)."""
+    start_metrics_server()
+    app = create_webhook_app(create_dispatcher(), create_bot())
+    web.run_app(
+        app,
+        host=settings.webhook_host,
+        port=settings.webhook_port,
+        shutdown_timeout=settings.webhook_drain_timeout_seconds + 5,
+    )
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if settings.bot_mode == "webhook" or "--webhook" in sys.argv:
+        run_webhook()
+    else:
+        asyncio.run(main())
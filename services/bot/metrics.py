@@ -0,0 +1,67 @@
+"""
+@file: metrics.py
+@description: Prometheus-метрики бота: латентность и ошибки обработчиков aiogram, вызовы API,
+    попадания в кэши (JWT, слоты). Экспозиция — отдельный внутренний порт BOT_METRICS_PORT
+    (в обоих режимах; публичный порт webhook метрики не отдаёт).
+@dependencies: prometheus_client, aiogram
+@created: 2026-10-19
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from prometheus_client import Counter, Histogram
+
+HANDLER_LATENCY = Histogram(
+    "lytslot_bot_handler_duration_seconds",
+    "Время обработчика бота",
+    ["event", "handler"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HANDLER_ERRORS = Counter(
+    "lytslot_bot_handler_errors_total",
+    "Исключения в обработчиках бота",
+    ["event", "handler"],
+)
+API_LATENCY = Histogram(
+    "lytslot_bot_api_request_duration_seconds",
+    "Вызовы API из бота (каждая попытка)",
+    ["method", "path", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+CACHE_REQUESTS = Counter(
+    "lytslot_cache_requests_total",
+    "Обращения к кэшам по результату (hit/miss)",
+    ["cache", "result"],
+)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware наблюдателя: метка handler — имя функции-обработчика, а не текст апдейта."""
+
+    def __init__(self, event: str) -> None:
+        self._event = event
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.labels(self._event, name).inc()
+            raise
+        finally:
+            HANDLER_LATENCY.labels(self._event, name).observe(time.perf_counter() - started)
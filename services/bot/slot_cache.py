@@ -0,0 +1,117 @@
+"""
+@file: slot_cache.py
+@description: Кэш свободных слотов для пикера бота: слоты канала, сгруппированные по дням, на
+    пользователя (Redis, TTL); версия канала сбрасывает кэш всех пользователей, когда слот занят.
+@dependencies: redis, services.bot.config, services.bot.metrics
+@created: 2026-10-19
+"""
+
+import contextlib
+import json
+import time
+from datetime import datetime
+
+import redis.asyncio as redis
+
+from services.bot.config import settings
+from services.bot.metrics import cache_result
+
+# [("YYYYMMDD", [(slot_id, "HH:MM"), ...]), ...] — дни и время по возрастанию
+SlotDays = list[tuple[str, list[tuple[str, str]]]]
+
+
+def group_free_slots(slots: list[dict]) -> SlotDays:
+    """Свободные слоты по дням. Дата разбирается один раз при загрузке, а не на каждой странице."""
+    days: dict[str, list[tuple[str, str]]] = {}
+    for s in sorted(slots, key=lambda s: str(s.get("datetime", ""))):
+        if s.get("status") != "free":
+            continue
+        try:
+            d = datetime.fromisoformat(str(s.get("datetime", "")).replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        days.setdefault(d.strftime("%Y%m%d"), []).append((str(s["id"]), d.strftime("%H:%M")))
+    return sorted(days.items())
+
+
+class SlotPageCache:
+    """
+    bot:slots:<user>:<channel> — слоты с версией канала на момент загрузки (TTL);
+    bot:slots:ver:<channel> — версия канала, растёт при каждом занятом слоте.
+    Проверка свежести — один MGET. Без Redis (FSM_STORAGE=memory) — словарь процесса.
+    """
+
+    def __init__(self, client: redis.Redis | None, ttl: int) -> None:
+        self._redis = client
+        self._ttl = ttl
+        self._local: dict[str, tuple[float, str]] = {}
+
+    @staticmethod
+    def _key(user_id: int, channel_id: str) -> str:
+        return f"bot:slots:{user_id}:{channel_id}"
+
+    @staticmethod
+    def _version_key(channel_id: str) -> str:
+        return f"bot:slots:ver:{channel_id}"
+
+    def _local_get(self, key: str) -> str | None:
+        item = self._local.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    async def _mget(self, *keys: str) -> list[str | None]:
+        if self._redis is None:
+            return [self._local_get(k) for k in keys]
+        try:
+            values = await self._redis.mget(keys)
+        except redis.RedisError:
+            return [None] * len(keys)
+        return [v.decode() if isinstance(v, bytes) else v for v in values]
+
+    async def get(self, user_id: int, channel_id: str) -> SlotDays | None:
+        """Слоты из кэша или None (нет, истёк TTL или в канале с тех пор заняли слот)."""
+        cached, version = await self._mget(
+            self._key(user_id, channel_id), self._version_key(channel_id)
+        )
+        data = json.loads(cached) if cached is not None else None
+        if data is None or data["version"] != (version or "0"):
+            cache_result("bot_slots", hit=False)
+            return None
+        cache_result("bot_slots", hit=True)
+        return [(day, [(sid, hm) for sid, hm in slots]) for day, slots in data["days"]]
+
+    async def put(self, user_id: int, channel_id: str, days: SlotDays) -> None:
+        (version,) = await self._mget(self._version_key(channel_id))
+        value = json.dumps({"version": version or "0", "days": days})
+        key = self._key(user_id, channel_id)
+        if self._redis is None:
+            self._local[key] = (time.monotonic() + self._ttl, value)
+            return
+        with contextlib.suppress(redis.RedisError):
+            await self._redis.set(key, value, ex=self._ttl)
+
+    async def invalidate(self, channel_id: str) -> None:
+        """Слот канала занят: страницы этого канала устаревают у всех пользователей."""
+        key = self._version_key(channel_id)
+        if self._redis is None:
+            version = int(self._local_get(key) or 0) + 1
+            self._local[key] = (float("inf"), str(version))
+            return
+        with contextlib.suppress(redis.RedisError):
+            await self._redis.incr(key)
+
+
+_slot_cache: SlotPageCache | None = None
+
+
+def setup_slot_cache(client: redis.Redis | None) -> None:
+    """Подключить кэш к Redis бота (или к памяти процесса, если client=None)."""
+    global _slot_cache
+    _slot_cache = SlotPageCache(client, settings.slot_cache_ttl_seconds)
+
+
+def get_slot_cache() -> SlotPageCache:
+    if _slot_cache is None:
+        setup_slot_cache(None)
+    return _slot_cache
@@ -0,0 +1,152 @@
+"""
+@file: token_cache.py
+@description: Кэш JWT бота по telegram_id: память процесса + Redis (общий для реплик бота),
+    обновление заранее, до exp; одновременные запросы одного пользователя делят одну выдачу.
+    Память ограничена (LRU на max_entries пользователей), токен сбрасывается при 401 от API.
+@dependencies: redis, services.bot.metrics
+@created: 2026-10-19
+"""
+
+import asyncio
+import base64
+import contextlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import redis.asyncio as redis
+
+from services.bot.metrics import cache_result
+
+# Выдача нового токена: telegram_id -> JWT или None (API недоступен / вход запрещён)
+IssueFn = Callable[[int], Awaitable[str | None]]
+
+
+def _claim(token: str, name: str) -> Any:
+    """Поле payload JWT без проверки подписи (секрета у бота нет; проверяет API)."""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))[name]
+
+
+def token_expires_at(token: str) -> float | None:
+    """exp из payload JWT."""
+    try:
+        return float(_claim(token, "exp"))
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def token_subject(token: str) -> int | None:
+    """telegram_id (sub) из payload JWT."""
+    try:
+        return int(_claim(token, "sub"))
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """
+    Токен берётся из памяти, затем из Redis (bot:jwt:<telegram_id>, TTL до момента обновления),
+    и только потом выдаётся заново. refresh_margin — за сколько секунд до exp токен считается
+    устаревшим, чтобы запрос к API не упал на истёкшем JWT. В памяти — не больше max_entries
+    пользователей (давно не обращавшиеся вытесняются), блокировка живёт, пока её кто-то ждёт.
+    """
+
+    def __init__(
+        self,
+        issue: IssueFn,
+        client: redis.Redis | None,
+        refresh_margin: float = 60.0,
+        max_entries: int = 10_000,
+    ) -> None:
+        self._issue = issue
+        self._redis = client
+        self._refresh_margin = refresh_margin
+        self._max_entries = max_entries
+        self._local: OrderedDict[int, tuple[str, float]] = OrderedDict()
+        # telegram_id -> [блокировка, сколько корутин её держат или ждут]
+        self._locks: dict[int, list] = {}
+
+    @staticmethod
+    def _key(telegram_id: int) -> str:
+        return f"bot:jwt:{telegram_id}"
+
+    def _fresh(self, telegram_id: int) -> str | None:
+        cached = self._local.get(telegram_id)
+        if cached is None:
+            return None
+        if cached[1] <= time.time():
+            del self._local[telegram_id]
+            return None
+        self._local.move_to_end(telegram_id)
+        return cached[0]
+
+    def _remember(self, telegram_id: int, token: str) -> float:
+        """Сохранить в памяти; вернуть секунды до обновления (0 — токен уже не годится)."""
+        exp = token_expires_at(token)
+        refresh_at = (exp if exp is not None else time.time() + 300) - self._refresh_margin
+        ttl = refresh_at - time.time()
+        if ttl > 0:
+            self._local[telegram_id] = (token, refresh_at)
+            self._local.move_to_end(telegram_id)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+        return max(ttl, 0)
+
+    @contextlib.asynccontextmanager
+    async def _user_lock(self, telegram_id: int) -> AsyncIterator[None]:
+        """Одна выдача на пользователя; запись удаляется, когда последний ждущий вышел."""
+        entry = self._locks.get(telegram_id)
+        if entry is None:
+            entry = self._locks[telegram_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[telegram_id]
+
+    async def get(self, telegram_id: int) -> str | None:
+        token = self._fresh(telegram_id)
+        if token:
+            cache_result("bot_jwt", hit=True)
+            return token
+        async with self._user_lock(telegram_id):
+            token = self._fresh(telegram_id)
+            if token:
+                cache_result("bot_jwt", hit=True)
+                return token
+            token = await self._from_redis(telegram_id)
+            if token and self._remember(telegram_id, token) > 0:
+                cache_result("bot_jwt", hit=True)
+                return token
+            cache_result("bot_jwt", hit=False)
+            token = await self._issue(telegram_id)
+            if not token:
+                return None
+            ttl = self._remember(telegram_id, token)
+            if ttl > 0 and self._redis is not None:
+                with contextlib.suppress(redis.RedisError):
+                    await self._redis.set(self._key(telegram_id), token, ex=int(ttl))
+            return token
+
+    async def _from_redis(self, telegram_id: int) -> str | None:
+        if self._redis is None:
+            return None
+        try:
+            value = await self._redis.get(self._key(telegram_id))
+        except redis.RedisError:
+            return None
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """Сбросить токен (например, API ответил 401)."""
+        self._local.pop(telegram_id, None)
+        if self._redis is not None:
+            with contextlib.suppress(redis.RedisError):
+                await self._redis.delete(self._key(telegram_id))
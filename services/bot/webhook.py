@@ -0,0 +1,131 @@
+"""
+@file: webhook.py
+@description: Приём апдейтов Telegram через webhook (aiohttp): проверка секретного токена,
+    ограничение числа одновременно обрабатываемых апдейтов, корректное завершение (drain).
+@dependencies: aiohttp, aiogram, services.bot.config
+@created: 2026-10-19
+"""
+
+import asyncio
+import hmac
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from pydantic import ValidationError
+
+from services.bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class UpdateReceiver:
+    """
+    POST с апдейтом подтверждается сразу после постановки обработчика; одновременно работает не
+    больше max_concurrency обработчиков. Когда все слоты заняты, запрос ждёт свободного —
+    Telegram (max_connections) сам притормаживает доставку, очередь в памяти не растёт.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        secret_token: str,
+        max_concurrency: int,
+        drain_timeout: float,
+    ) -> None:
+        self._dp = dp
+        self._bot = bot
+        self._secret_token = secret_token
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self._drain_timeout = drain_timeout
+        self._tasks: set[asyncio.Task] = set()
+        self._accepting = True
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        received = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(received, self._secret_token):
+            return web.Response(status=401)
+        if not self._accepting:
+            # Telegram повторит доставку: апдейт заберёт другая реплика или процесс после рестарта
+            return web.Response(status=503)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self._bot})
+        except (ValueError, ValidationError):
+            return web.Response(status=400)
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self._dp.feed_update(self._bot, update)
+        except Exception:
+            logger.exception("Update %s failed", update.update_id)
+        finally:
+            self._semaphore.release()
+
+    async def drain(self) -> None:
+        """Перестать принимать апдейты и дождаться начатых обработчиков (до drain_timeout)."""
+        self._accepting = False
+        if not self._tasks:
+            return
+        logger.info("Draining %s update handlers", len(self._tasks))
+        _, pending = await asyncio.wait(set(self._tasks), timeout=self._drain_timeout)
+        if pending:
+            logger.warning("Drain timeout: cancelling %s update handlers", len(pending))
+            for task in pending:
+                task.cancel()
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, register_webhook: bool = True) -> web.Application:
+    """
+    aiohttp-приложение: POST {webhook_path} — апдейты, GET /health — liveness. Метрики на
+    публичный порт приёмника не выводятся — только внутренний BOT_METRICS_PORT.
+    При старте — startup-хуки диспетчера и (если задан WEBHOOK_URL) setWebhook; при остановке —
+    drain и shutdown-хуки. deleteWebhook не вызывается: остальные реплики продолжают работу.
+    """
+    if not settings.webhook_secret:
+        raise RuntimeError("WEBHOOK_SECRET is required in webhook mode")
+    receiver = UpdateReceiver(
+        dp,
+        bot,
+        secret_token=settings.webhook_secret,
+        max_concurrency=settings.webhook_max_concurrency,
+        drain_timeout=settings.webhook_drain_timeout_seconds,
+    )
+
+    async def health(_: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "in_flight": receiver.in_flight})
+
+    async def on_startup(_: web.Application) -> None:
+        await dp.emit_startup(bot=bot, dispatcher=dp)
+        if register_webhook and settings.webhook_url:
+            await bot.set_webhook(
+                settings.webhook_url.rstrip("/") + settings.webhook_path,
+                secret_token=settings.webhook_secret,
+                max_connections=settings.webhook_max_connections,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+
+    async def on_shutdown(_: web.Application) -> None:
+        await receiver.drain()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await bot.session.close()
+
+    app = web.Application()
+    app["receiver"] = receiver
+    app.router.add_post(settings.webhook_path, receiver.handle)
+    app.router.add_get("/health", health)
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    return app
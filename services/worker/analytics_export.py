@@ -0,0 +1,286 @@
+"""
+@file: analytics_export.py
+@description: Инкрементальная выгрузка просмотров и заказов в Parquet для аналитиков: строки
+    читаются серверным курсором пачками, превращаются в Arrow RecordBatch и пишутся в файлы
+    <корень>/<набор>/tenant_id=<uuid>/date=<YYYY-MM-DD>/part-<водяной знак>.parquet
+    (Hive-разбиение: pyarrow.dataset, DuckDB, polars, Spark). Корень — локальный путь или
+    s3://… (pyarrow.fs).
+    После набора в <корень>/_watermarks.json сохраняется водяной знак: следующий запуск пишет
+    только новое.
+@dependencies: pyarrow, orjson, sqlalchemy, db.models
+@created: 2026-10-19
+"""
+
+import json
+import os
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import orjson
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from sqlalchemy import Select, select, text
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from db.models import Channel, Order, View
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Строк на выборку курсора и на один row group Parquet
+ANALYTICS_EXPORT_BATCH_ROWS = int(os.getenv("ANALYTICS_EXPORT_BATCH_ROWS", "50000"))
+# Не выгружаем последние N секунд: транзакции, начатые до запуска, ещё могут добавить строки
+ANALYTICS_EXPORT_LAG_SECONDS = float(os.getenv("ANALYTICS_EXPORT_LAG_SECONDS", "300"))
+ANALYTICS_EXPORT_COMPRESSION = os.getenv("ANALYTICS_EXPORT_COMPRESSION", "zstd")
+
+WATERMARKS_FILE = "_watermarks.json"
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+# Ключ pg_try_advisory_xact_lock: одна выгрузка на кластер
+EXPORT_LOCK_KEY = 4_901_001
+
+UUID_TYPE = pa.string()
+TS_TYPE = pa.timestamp("us", tz="UTC")
+
+
+def _uuids(values: Sequence[Any]) -> list[str | None]:
+    return [None if v is None else str(v) for v in values]
+
+
+def _json(values: Sequence[Any]) -> list[str | None]:
+    return [None if v is None else orjson.dumps(v).decode() for v in values]
+
+
+def _strs(values: Sequence[Any]) -> list[str | None]:
+    # StrEnum → значение
+    return [None if v is None else str(v) for v in values]
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """
+    Набор выгрузки. query(since, until) возвращает строки (tenant_id, время разбиения, *колонки)
+    с сортировкой по (tenant_id, время разбиения) — файлы разбиения пишутся по одному.
+    """
+
+    name: str
+    columns: tuple[tuple[str, pa.DataType, Callable[[Sequence[Any]], list] | None], ...]
+    query: Callable[[datetime, datetime], Select]
+
+    @property
+    def schema(self) -> pa.Schema:
+        return pa.schema([(name, type_) for name, type_, _ in self.columns])
+
+
+def _views_query(since: datetime, until: datetime) -> Select:
+    """Просмотры по времени события: пишутся в момент появления, поздних строк нет."""
+    return (
+        select(
+            Channel.tenant_id,
+            View.timestamp.label("partition_at"),
+            View.id,
+            View.order_id,
+            Order.channel_id,
+            View.timestamp,
+        )
+        .join(Order, Order.id == View.order_id)
+        .join(Channel, Channel.id == Order.channel_id)
+        .where(View.timestamp >= since, View.timestamp < until)
+        .order_by(Channel.tenant_id, View.timestamp)
+    )
+
+
+def _orders_query(since: datetime, until: datetime) -> Select:
+    """
+    Заказы, изменённые в [since, until) (updated_at), в разбиении дня создания. Заказ меняется —
+    в разбиении появляется новая версия строки: актуальная — с максимальным updated_at по id.
+    """
+    return (
+        select(
+            Channel.tenant_id,
+            Order.created_at.label("partition_at"),
+            Order.id,
+            Order.channel_id,
+            Order.slot_id,
+            Order.advertiser_id,
+            Order.status,
+            Order.erid,
+            Order.content,
+            Order.publish_at,
+            Order.publish_state,
+            Order.telegram_message_id,
+            Order.created_at,
+            Order.updated_at,
+        )
+        .join(Channel, Channel.id == Order.channel_id)
+        .where(Order.updated_at >= since, Order.updated_at < until)
+        .order_by(Channel.tenant_id, Order.created_at)
+    )
+
+
+DATASETS: tuple[ExportDataset, ...] = (
+    ExportDataset(
+        "views",
+        (
+            ("id", UUID_TYPE, _uuids),
+            ("order_id", UUID_TYPE, _uuids),
+            ("channel_id", UUID_TYPE, _uuids),
+            ("timestamp", TS_TYPE, None),
+        ),
+        _views_query,
+    ),
+    ExportDataset(
+        "orders",
+        (
+            ("id", UUID_TYPE, _uuids),
+            ("channel_id", UUID_TYPE, _uuids),
+            ("slot_id", UUID_TYPE, _uuids),
+            ("advertiser_id", pa.int64(), None),
+            ("status", pa.string(), _strs),
+            ("erid", pa.string(), None),
+            ("content_json", pa.string(), _json),
+            ("publish_at", TS_TYPE, None),
+            ("publish_state", pa.string(), None),
+            ("telegram_message_id", pa.int64(), None),
+            ("created_at", TS_TYPE, None),
+            ("updated_at", TS_TYPE, None),
+        ),
+        _orders_query,
+    ),
+)
+
+
+def to_record_batch(dataset: ExportDataset, rows: Sequence[Sequence[Any]]) -> pa.RecordBatch:
+    """Строки (без tenant_id и времени разбиения) → RecordBatch по колонкам набора."""
+    columns = list(zip(*rows, strict=True)) if rows else [()] * len(dataset.columns)
+    arrays = [
+        pa.array(convert(values) if convert else values, type=type_)
+        for (_, type_, convert), values in zip(dataset.columns, columns, strict=True)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=dataset.schema)
+
+
+def partition_path(root: str, dataset: str, tenant_id: UUID, day: date, run_id: str) -> str:
+    return f"{root}/{dataset}/tenant_id={tenant_id}/date={day.isoformat()}/part-{run_id}.parquet"
+
+
+def write_partitions(
+    fs: pafs.FileSystem,
+    root: str,
+    dataset: ExportDataset,
+    batches: Iterable[Sequence[Sequence[Any]]],
+    run_id: str,
+    batch_rows: int = ANALYTICS_EXPORT_BATCH_ROWS,
+) -> dict[str, int]:
+    """
+    Разложить отсортированные строки (tenant_id, время, *колонки) по файлам (тенант, день UTC).
+    В памяти — не больше batch_rows строк: каждая пачка сразу уходит row group'ом в файл.
+    Имя файла — run_id (водяной знак запуска): повтор того же окна перезаписывает те же файлы.
+    """
+    stats = {"rows": 0, "files": 0}
+    writer: pq.ParquetWriter | None = None
+    key: tuple[UUID, date] | None = None
+    pending: list[Sequence[Any]] = []
+
+    def flush() -> None:
+        nonlocal writer
+        if not pending:
+            return
+        if writer is None:
+            path = partition_path(root, dataset.name, key[0], key[1], run_id)
+            fs.create_dir(path.rsplit("/", 1)[0], recursive=True)
+            writer = pq.ParquetWriter(
+                path, dataset.schema, filesystem=fs, compression=ANALYTICS_EXPORT_COMPRESSION
+            )
+            stats["files"] += 1
+        writer.write_batch(to_record_batch(dataset, pending))
+        stats["rows"] += len(pending)
+        pending.clear()
+
+    try:
+        for batch in batches:
+            for row in batch:
+                row_key = (row[0], row[1].astimezone(UTC).date())
+                if row_key != key:
+                    flush()
+                    if writer is not None:
+                        writer.close()
+                        writer = None
+                    key = row_key
+                pending.append(row[2:])
+                if len(pending) >= batch_rows:
+                    flush()
+        flush()
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats
+
+
+def read_watermarks(fs: pafs.FileSystem, root: str) -> dict[str, datetime]:
+    path = f"{root}/{WATERMARKS_FILE}"
+    if fs.get_file_info(path).type == pafs.FileType.NotFound:
+        return {}
+    with fs.open_input_stream(path) as f:
+        raw = json.loads(f.read())
+    return {name: datetime.fromisoformat(value) for name, value in raw.items()}
+
+
+def write_watermarks(fs: pafs.FileSystem, root: str, watermarks: dict[str, datetime]) -> None:
+    fs.create_dir(root, recursive=True)
+    body = json.dumps({name: value.isoformat() for name, value in sorted(watermarks.items())})
+    with fs.open_output_stream(f"{root}/{WATERMARKS_FILE}") as f:
+        f.write(body.encode())
+
+
+def run_export(
+    uri: str,
+    now: datetime | None = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    datasets: Sequence[ExportDataset] = DATASETS,
+) -> dict[str, Any]:
+    """
+    Выгрузить новое по всем наборам: окно [водяной знак, now − ANALYTICS_EXPORT_LAG_SECONDS).
+    Водяной знак набора сдвигается после того, как записаны все его файлы; сбой посередине —
+    следующий запуск повторит окно (строки дедуплицируются по id).
+    """
+    fs, root = pafs.FileSystem.from_uri(uri)
+    root = root.rstrip("/")
+    until = (now or datetime.now(UTC)) - timedelta(seconds=ANALYTICS_EXPORT_LAG_SECONDS)
+    until = until.replace(microsecond=0)
+    run_id = until.strftime("%Y%m%dT%H%M%SZ")
+    watermarks = read_watermarks(fs, root)
+    result: dict[str, Any] = {"until": until.isoformat()}
+    db = session_factory()
+    try:
+        # Одна выгрузка одновременно: вторая (пересёкшиеся запуски beat) просто выходит
+        if not db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": EXPORT_LOCK_KEY}
+        ).scalar():
+            logger.info("analytics export already running")
+            return {"skipped": "locked"}
+        for dataset in datasets:
+            since = watermarks.get(dataset.name, EPOCH)
+            if since >= until:
+                continue
+            rows = db.execute(
+                dataset.query(since, until).execution_options(yield_per=ANALYTICS_EXPORT_BATCH_ROWS)
+            )
+            stats = write_partitions(fs, root, dataset, rows.partitions(), run_id)
+            watermarks[dataset.name] = until
+            write_watermarks(fs, root, watermarks)
+            logger.info(
+                "analytics export dataset done",
+                dataset=dataset.name,
+                since=since.isoformat(),
+                until=until.isoformat(),
+                **stats,
+            )
+            result[dataset.name] = stats
+    finally:
+        db.close()
+    return result
@@ -1,6 +1,6 @@
 """
 @file: celery_app.py
-@description: Celery app - Redis broker, queues: publish, notifications, analytics.
+@description: Celery app - Redis broker, queues: publish, notifications, analytics; beat schedule.
 @dependencies: celery, redis
 @created: 2025-02-19
 """
@@ -8,6 +8,7 @@
 import os
 
 from celery import Celery
+from celery.signals import beat_init, celeryd_init
 
 broker = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 app = Celery(
@@ -18,16 +19,50 @@ app = Celery(
 )
 app.conf.task_routes = {
     "services.worker.tasks.ping": {"queue": "default"},
+    "services.worker.tasks.schedule_due_orders": {"queue": "default"},
     "services.worker.tasks.publish_order": {"queue": "publish"},
     "services.worker.tasks.send_notification": {"queue": "notifications"},
+    "services.worker.tasks.send_notifications_batch": {"queue": "notifications"},
     "services.worker.tasks.notify_new_order": {"queue": "notifications"},
     "services.worker.tasks.notify_order_cancelled": {"queue": "notifications"},
     "services.worker.tasks.notify_payment_received": {"queue": "notifications"},
     "services.worker.tasks.process_webhook": {"queue": "notifications"},
     "services.worker.tasks.aggregate_analytics": {"queue": "analytics"},
+    "services.worker.tasks.export_analytics": {"queue": "analytics"},
+    "services.worker.tasks.refresh_revenue_view": {"queue": "analytics"},
 }
 app.conf.task_serializer = "json"
 app.conf.result_serializer = "json"
 app.conf.timezone = "UTC"
 app.conf.enable_utc = True
 app.conf.task_default_queue = "default"
+# Планировщик публикаций: раз в минуту (celery beat; можно запускать несколько экземпляров)
+app.conf.beat_schedule = {
+    "schedule-due-orders": {
+        "task": "services.worker.tasks.schedule_due_orders",
+        "schedule": 60.0,
+    },
+    # Parquet для аналитиков: только новое с прошлого запуска (без ANALYTICS_EXPORT_URI — no-op)
+    "export-analytics": {
+        "task": "services.worker.tasks.export_analytics",
+        "schedule": float(os.getenv("ANALYTICS_EXPORT_INTERVAL_SECONDS", "3600")),
+    },
+    # Выручка для админки: tenant_revenue_daily, REFRESH ... CONCURRENTLY
+    "refresh-revenue-view": {
+        "task": "services.worker.tasks.refresh_revenue_view",
+        "schedule": float(os.getenv("REVENUE_REFRESH_INTERVAL_SECONDS", "900")),
+    },
+}
+
+
+@celeryd_init.connect
+@beat_init.connect
+def _configure_logging(**_kwargs):
+    """JSON-логи при старте worker/beat (до fork), а не побочным эффектом импорта tasks."""
+    from services.api.logging_config import configure_json_logging
+
+    configure_json_logging()
+
+
+# Сигналы метрик (длительность задач, HTTP-экспозиция в главном процессе воркера)
+import services.worker.metrics  # noqa: E402, F401
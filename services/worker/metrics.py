@@ -0,0 +1,124 @@
+"""
+@file: metrics.py
+@description: Prometheus-метрики Celery: длительность и исходы задач по очередям, повторы,
+    глубина каждой очереди из celery_app.task_routes (LLEN в Redis на scrape). HTTP-экспозиция
+    поднимается в главном процессе воркера; для prefork нужен PROMETHEUS_MULTIPROC_DIR (задан в
+    образе воркера) — иначе метрики дочерних процессов не видны.
+@dependencies: prometheus_client, redis, celery
+@created: 2026-10-19
+"""
+
+import os
+import time
+
+import redis
+from celery import signals
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+
+from db.database import engine
+from services.api.logging_config import get_logger
+from services.api.metrics import (
+    clear_multiprocess_dir,
+    instrument_engine,
+    mark_process_dead,
+    multiprocess_dir,
+)
+from services.worker.celery_app import app
+
+logger = get_logger(__name__)
+
+# 0 — не поднимать HTTP-сервер метрик
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+
+TASK_DURATION = Histogram(
+    "lytslot_celery_task_duration_seconds",
+    "Время выполнения задачи Celery",
+    ["task", "queue"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+TASKS = Counter(
+    "lytslot_celery_tasks_total",
+    "Завершённые попытки задач Celery по исходу (success, failure, retry)",
+    ["task", "queue", "state"],
+)
+
+_started: dict[str, float] = {}
+
+instrument_engine(engine)
+
+
+def queue_names() -> list[str]:
+    """Очереди из task_routes и очередь по умолчанию — без дублей, в порядке объявления."""
+    names = [route["queue"] for route in app.conf.task_routes.values() if "queue" in route]
+    return list(dict.fromkeys([app.conf.task_default_queue, *names]))
+
+
+def _queue_of(task) -> str:
+    info = getattr(task.request, "delivery_info", None) or {}
+    return info.get("routing_key") or app.conf.task_default_queue
+
+
+class QueueDepthCollector:
+    """lytslot_celery_queue_depth{queue}: LLEN списков брокера Redis в момент scrape."""
+
+    def __init__(self, broker_url: str, queues: list[str]) -> None:
+        self._redis = redis.from_url(broker_url, socket_connect_timeout=1, socket_timeout=1)
+        self._queues = queues
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "lytslot_celery_queue_depth", "Сообщений в очереди брокера", labels=["queue"]
+        )
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for name in self._queues:
+                    pipe.llen(name)
+                depths = pipe.execute()
+        except redis.RedisError:
+            logger.warning("Queue depth unavailable", exc_info=True)
+            return
+        for name, depth in zip(self._queues, depths, strict=True):
+            family.add_metric([name], depth)
+        yield family
+
+
+@signals.task_prerun.connect
+def _on_task_prerun(task_id=None, **_kwargs):
+    _started[task_id] = time.perf_counter()
+
+
+@signals.task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, state=None, **_kwargs):
+    started = _started.pop(task_id, None)
+    if task is None:
+        return
+    queue = _queue_of(task)
+    if started is not None:
+        TASK_DURATION.labels(task.name, queue).observe(time.perf_counter() - started)
+    outcome = {"SUCCESS": "success", "FAILURE": "failure", "RETRY": "retry"}.get(state)
+    if outcome:
+        TASKS.labels(task.name, queue, outcome).inc()
+
+
+@signals.celeryd_init.connect
+def _start_metrics_server(**_kwargs):
+    """Главный процесс воркера, до fork: чистый каталог метрик и HTTP-сервер экспозиции."""
+    if not WORKER_METRICS_PORT:
+        return
+    from prometheus_client import multiprocess
+
+    if multiprocess_dir():
+        clear_multiprocess_dir()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:  # --pool threads/solo: всё в одном процессе
+        registry = REGISTRY
+    registry.register(QueueDepthCollector(app.conf.broker_url, queue_names()))
+    start_http_server(WORKER_METRICS_PORT, registry=registry)
+    logger.info("Worker metrics on :%s", WORKER_METRICS_PORT)
+
+
+@signals.worker_process_shutdown.connect
+def _mark_dead(pid=None, **_kwargs):
+    mark_process_dead(pid or os.getpid())
@@ -0,0 +1,96 @@
+"""
+@file: outbox_relay.py
+@description: Relay transactional outbox → Celery: забирает пачку из outbox (FOR UPDATE
+    SKIP LOCKED), публикует задачи в брокер через одно соединение и удаляет отправленные строки
+    в той же транзакции. Несколько relay могут работать параллельно.
+@dependencies: sqlalchemy, celery, db.database, db.models, services.worker.celery_app
+@created: 2026-10-19
+
+Запуск: python -m services.worker.outbox_relay
+"""
+
+import os
+import time
+from collections.abc import Callable, Collection
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from db.models import OutboxMessage
+from services.api.logging_config import configure_json_logging, get_logger
+from services.worker.celery_app import app
+
+logger = get_logger(__name__)
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.2"))
+
+# send(task_name, kwargs) — отправка одной задачи в брокер
+SendFn = Callable[[str, dict[str, Any]], Any]
+
+
+def relay_batch(
+    db: Session,
+    send: SendFn,
+    limit: int = OUTBOX_BATCH_SIZE,
+    task_names: Collection[str] | None = None,
+) -> int:
+    """
+    Отправить до limit сообщений outbox в порядке записи и удалить их. Вернуть число отправленных.
+    При ошибке брокера транзакция откатывается — строки останутся и уйдут в следующий раз
+    (at-least-once: задачи-получатели должны быть идемпотентны). task_names — только сообщения
+    этих задач (бенчмарк не трогает чужие строки общей БД).
+    """
+    batch = select(OutboxMessage.id)
+    if task_names is not None:
+        batch = batch.where(OutboxMessage.task_name.in_(task_names))
+    batch = (
+        batch.order_by(OutboxMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    try:
+        rows = db.execute(
+            delete(OutboxMessage)
+            .where(OutboxMessage.id.in_(batch))
+            .returning(OutboxMessage.id, OutboxMessage.task_name, OutboxMessage.kwargs)
+        ).all()
+        for row in sorted(rows, key=lambda r: r.id):
+            send(row.task_name, row.kwargs or {})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def run_forever() -> None:
+    """Цикл relay: пачки подряд, пока outbox не пуст; затем пауза OUTBOX_POLL_INTERVAL."""
+    logger.info("Outbox relay started (batch=%s)", OUTBOX_BATCH_SIZE)
+    while True:
+        db = SessionLocal()
+        try:
+            # Одно соединение с брокером на всю пачку вместо connect/publish на каждую задачу
+            with app.producer_or_acquire() as producer:
+                sent = relay_batch(
+                    db,
+                    lambda name, kwargs: app.send_task(name, kwargs=kwargs, producer=producer),
+                )
+        except Exception:
+            logger.exception("Outbox relay batch failed")
+            sent = 0
+            time.sleep(max(OUTBOX_POLL_INTERVAL, 1.0))
+        finally:
+            db.close()
+        if sent:
+            logger.info("Outbox relay: sent %s", sent)
+        if sent < OUTBOX_BATCH_SIZE:
+            time.sleep(OUTBOX_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    configure_json_logging()
+    run_forever()
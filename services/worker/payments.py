@@ -0,0 +1,114 @@
+"""
+@file: payments.py
+@description: Применение события оплаты: Payment по invoice_id, продвижение Order/Slot и
+    уведомление (outbox) — в одной транзакции; повторная обработка события ничего не меняет.
+@dependencies: sqlalchemy, db.models, db.events, shared.schemas.payment
+@created: 2026-10-19
+"""
+
+from datetime import UTC, datetime
+
+from sqlalchemy.orm import Session
+
+from db.events import record_event
+from db.models import (
+    Channel,
+    Order,
+    OrderStatus,
+    OutboxMessage,
+    Payment,
+    Slot,
+    SlotStatus,
+    WebhookEvent,
+)
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PAYMENT_SUCCEEDED = "succeeded"
+PAYMENT_REFUNDED = "refunded"
+# Финальные статусы платежа: запоздавшие события их не перетирают; единственный выход из
+# финального статуса — возврат успешного платежа
+FINAL_PAYMENT_STATUSES = {PAYMENT_SUCCEEDED, "failed", "canceled", PAYMENT_REFUNDED}
+ALLOWED_FROM_FINAL = {(PAYMENT_SUCCEEDED, PAYMENT_REFUNDED)}
+
+
+def transition_allowed(current: str | None, new: str | None) -> bool:
+    """Можно ли сменить статус платежа current -> new (None — событие без статуса)."""
+    if new is None or new == current:
+        return False
+    if current in FINAL_PAYMENT_STATUSES:
+        return (current, new) in ALLOWED_FROM_FINAL
+    return True
+
+
+def process_payment_event(db: Session, provider: str, event_id: str) -> str:
+    """
+    Обработать принятое событие. Возвращает исход: processed | duplicate | missing_event |
+    unknown_payment. unknown_payment не помечает событие обработанным: платёж может появиться
+    позже (вебхук обогнал оформление), вызывающий повторяет. Commit — на стороне вызывающего.
+    """
+    stored = (
+        db.query(WebhookEvent)
+        .filter(WebhookEvent.provider == provider, WebhookEvent.event_id == event_id)
+        .with_for_update()
+        .first()
+    )
+    if stored is None:
+        return "missing_event"
+    if stored.processed_at is not None:
+        return "duplicate"
+
+    # pydantic нужен только очереди вебхуков — не грузим его при старте остальных воркеров
+    from shared.schemas.payment import PaymentEvent
+
+    event = PaymentEvent.parse(provider, stored.payload)
+    payment = (
+        db.query(Payment)
+        .filter(Payment.invoice_id == event.invoice_id, Payment.provider == provider)
+        .with_for_update()
+        .first()
+    )
+    if payment is None:
+        logger.warning("Webhook %s %s: payment %s not found", provider, event_id, event.invoice_id)
+        return "unknown_payment"
+    stored.processed_at = datetime.now(UTC)
+    if not transition_allowed(payment.status, event.status):
+        logger.info(
+            "Webhook %s %s: payment %s stays %s (event status %s)",
+            provider,
+            event_id,
+            payment.invoice_id,
+            payment.status,
+            event.status,
+        )
+        return "processed"
+    payment.status = event.status
+    tenant_id = (
+        db.query(Channel.tenant_id)
+        .join(Order, Order.channel_id == Channel.id)
+        .filter(Order.id == payment.order_id)
+        .scalar()
+    )
+    record_event(db, tenant_id, "payment", id=str(payment.order_id), status=event.status)
+    if event.status == PAYMENT_SUCCEEDED and _mark_order_paid(db, payment):
+        record_event(db, tenant_id, "order", id=str(payment.order_id), status=OrderStatus.PAID)
+    return "processed"
+
+
+def _mark_order_paid(db: Session, payment: Payment) -> bool:
+    """DRAFT -> PAID для заказа, слот -> PAID, уведомление об оплате через outbox."""
+    order = db.query(Order).filter(Order.id == payment.order_id).with_for_update().first()
+    if order is None or order.status != OrderStatus.DRAFT:
+        return False
+    order.status = OrderStatus.PAID
+    db.query(Slot).filter(Slot.id == order.slot_id).update(
+        {Slot.status: SlotStatus.PAID}, synchronize_session=False
+    )
+    db.add(
+        OutboxMessage(
+            task_name="services.worker.tasks.notify_payment_received",
+            kwargs={"order_id": str(order.id), "amount": str(payment.amount)},
+        )
+    )
+    return True
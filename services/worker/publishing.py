@@ -0,0 +1,167 @@
+"""
+@file: publishing.py
+@description: Идемпотентная публикация заказа: захват попытки (FOR UPDATE), фиксация исхода,
+    сохранение telegram_message_id; экспоненциальный backoff с jitter для повторов.
+@dependencies: sqlalchemy, db.database, db.models, db.events
+@created: 2026-10-19
+"""
+
+import os
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import text
+
+from db.database import SessionLocal
+from db.events import record_event
+from db.models import Channel, Order, OrderStatus, PublishState, View
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PUBLISH_RETRY_BASE_SECONDS = float(os.getenv("PUBLISH_RETRY_BASE_SECONDS", "5"))
+PUBLISH_RETRY_MAX_SECONDS = float(os.getenv("PUBLISH_RETRY_MAX_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class PublishClaim:
+    """Захваченная попытка публикации: куда и что отправлять."""
+
+    order_id: UUID
+    chat_id: str
+    text: str
+
+
+def backoff_with_jitter(
+    retries: int,
+    base: float = PUBLISH_RETRY_BASE_SECONDS,
+    cap: float = PUBLISH_RETRY_MAX_SECONDS,
+) -> float:
+    """Full jitter: случайная задержка в [0, min(cap, base * 2^retries)]."""
+    return random.uniform(0, min(cap, base * (2**retries)))
+
+
+def format_publication(content: dict | None, erid: str | None) -> str:
+    """Текст рекламного поста: текст заказа + ERID + ссылка."""
+    body = content or {}
+    msg_text = body.get("text") or "Реклама"
+    if erid:
+        msg_text += f"\n\n🛍 ERID: {erid}"
+    if body.get("link"):
+        msg_text += f"\n\n{body['link']}"
+    return msg_text
+
+
+def claim_publication(order_id: str) -> PublishClaim | None:
+    """
+    Проверить запись идемпотентности и начать попытку (state=sending, attempts+1) в отдельной
+    транзакции. None — публиковать не нужно: уже опубликован, отменён, или прошлая попытка
+    могла дойти до Telegram (sending/unknown) — повтор запрещён (at-most-once).
+    """
+    db = SessionLocal()
+    try:
+        order = db.query(Order).filter(Order.id == UUID(order_id)).with_for_update(of=Order).first()
+        if not order:
+            logger.warning("Order not found: %s", order_id)
+            return None
+        if order.telegram_message_id is not None or order.status == OrderStatus.PUBLISHED:
+            logger.info("publish_order: order %s already published, skip", order_id)
+            return None
+        if order.status == OrderStatus.CANCELLED:
+            logger.info("publish_order: order %s cancelled, skip", order_id)
+            return None
+        if order.publish_state in (PublishState.SENDING, PublishState.UNKNOWN):
+            logger.error(
+                "publish_order: order %s has unfinished attempt (%s), manual check required",
+                order_id,
+                order.publish_state,
+            )
+            return None
+        channel = order.channel
+        if not channel:
+            logger.warning("Order %s has no channel", order_id)
+            return None
+        db.execute(
+            text("SELECT set_config('app.tenant_id', :tid, true)"), {"tid": str(channel.tenant_id)}
+        )
+        order.publish_state = PublishState.SENDING
+        order.publish_attempts = (order.publish_attempts or 0) + 1
+        claim = PublishClaim(
+            order_id=order.id,
+            chat_id=(
+                channel.username if channel.username.startswith("@") else f"@{channel.username}"
+            ),
+            text=format_publication(order.content, order.erid),
+        )
+        db.commit()
+        return claim
+    finally:
+        db.close()
+
+
+def release_publication(order_id: str, state: PublishState) -> None:
+    """Зафиксировать неуспешный исход попытки: FAILED (можно повторить) или UNKNOWN."""
+    db = SessionLocal()
+    try:
+        db.query(Order).filter(Order.id == UUID(order_id)).update(
+            {Order.publish_state: state}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def record_skipped(order_id: str) -> None:
+    """
+    BOT_TOKEN не задан (dev): пост не отправляется, попытка фиксируется как SKIPPED (повтор
+    разрешён) и записывается просмотр — как до записи идемпотентности.
+    """
+    db = SessionLocal()
+    try:
+        db.query(Order).filter(Order.id == UUID(order_id)).update(
+            {Order.publish_state: PublishState.SKIPPED}, synchronize_session=False
+        )
+        db.add(View(order_id=UUID(order_id), timestamp=datetime.now(UTC)))
+        tenant_id = (
+            db.query(Channel.tenant_id)
+            .join(Order, Order.channel_id == Channel.id)
+            .filter(Order.id == UUID(order_id))
+            .scalar()
+        )
+        record_event(db, tenant_id, "view", id=order_id)
+        db.commit()
+    finally:
+        db.close()
+
+
+def record_published(order_id: str, message_id: int) -> None:
+    """Сохранить message_id, перевести заказ в PUBLISHED и записать просмотр. Идемпотентно."""
+    db = SessionLocal()
+    try:
+        updated = (
+            db.query(Order)
+            .filter(Order.id == UUID(order_id), Order.telegram_message_id.is_(None))
+            .update(
+                {
+                    Order.telegram_message_id: message_id,
+                    Order.publish_state: PublishState.SENT,
+                    Order.status: OrderStatus.PUBLISHED,
+                },
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            db.add(View(order_id=UUID(order_id), timestamp=datetime.now(UTC)))
+            tenant_id = (
+                db.query(Channel.tenant_id)
+                .join(Order, Order.channel_id == Channel.id)
+                .filter(Order.id == UUID(order_id))
+                .scalar()
+            )
+            record_event(db, tenant_id, "order", id=order_id, status=OrderStatus.PUBLISHED)
+            record_event(db, tenant_id, "view", id=order_id)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+"""
+@file: scheduler.py
+@description: Планировщик публикаций: захват «созревших» заказов (FOR UPDATE SKIP LOCKED) и
+    равномерное распределение publish_order внутри минуты.
+@dependencies: sqlalchemy, db.models, db.events
+@created: 2026-10-19
+"""
+
+import os
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from db.events import record_event
+from db.models import PENDING_PUBLISH_STATUSES, Channel, Order, OrderStatus
+
+# Размер пачки за один SELECT ... FOR UPDATE SKIP LOCKED и лимит заказов за один тик
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", "500"))
+SCHEDULER_MAX_PER_TICK = int(os.getenv("SCHEDULER_MAX_PER_TICK", "10000"))
+# Окно (сек), на которое размазываются публикации одной минуты — без пика нагрузки на БД/Telegram
+SCHEDULER_SPREAD_SECONDS = float(os.getenv("SCHEDULER_SPREAD_SECONDS", "50"))
+
+
+def due_bucket_end(now: datetime) -> datetime:
+    """Конец текущей минутной корзины: берём всё, что должно выйти до конца этой минуты."""
+    return now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def claim_due_orders(db: Session, now: datetime, limit: int) -> list[UUID]:
+    """
+    Перевести до limit созревших заказов в SCHEDULED и вернуть их id.
+    SKIP LOCKED: несколько планировщиков делят заказы без двойной публикации и без ожидания.
+    Вызывающий отвечает за commit (после успешной постановки задач в очередь); события
+    SCHEDULED для дашборда и SSE уходят после этого commit.
+    """
+    due = (
+        select(Order.id)
+        .where(
+            Order.status.in_(PENDING_PUBLISH_STATUSES),
+            Order.publish_at < due_bucket_end(now),
+        )
+        .order_by(Order.publish_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(due.scalar_subquery()))
+        .values(status=OrderStatus.SCHEDULED)
+        .returning(Order.id, Order.channel_id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.execute(stmt).all()
+    if claimed:
+        channel_ids = {row.channel_id for row in claimed}
+        tenants = dict(
+            db.execute(
+                select(Channel.id, Channel.tenant_id).where(Channel.id.in_(channel_ids))
+            ).all()
+        )
+        for row in claimed:
+            record_event(
+                db,
+                tenants.get(row.channel_id),
+                "order",
+                id=str(row.id),
+                status=OrderStatus.SCHEDULED,
+            )
+    return [row.id for row in claimed]
+
+
+def spread_countdowns(count: int, window: float = SCHEDULER_SPREAD_SECONDS) -> list[float]:
+    """Задержки (сек) для count задач, равномерно распределённые по окну [0, window)."""
+    if count <= 0:
+        return []
+    step = window / count
+    return [round(i * step, 3) for i in range(count)]
@@ -1,35 +1,78 @@
 """
 @file: tasks.py
-@description: Celery tasks: ping, publish_order, process_webhook, aggregate_analytics.
+@description: Celery tasks: ping, schedule_due_orders, publish_order, notifications,
+    process_webhook, export_analytics, refresh_revenue_view, aggregate_analytics.
 @dependencies: services.worker.celery_app, db, services.api.logging_config
 @created: 2025-02-19
 """
 
 import os
 from datetime import UTC, datetime
+from typing import NamedTuple
 from uuid import UUID
 
-import httpx
-from sqlalchemy import text
+from celery.signals import worker_process_shutdown
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from db.database import SessionLocal
-from db.models import Order, OrderStatus, View
-from services.api.logging_config import configure_json_logging, get_logger, set_request_id
+from db.models import Channel, Order, OrderStatus, PublishState, Tenant
+from services.api import revenue
+from services.api.logging_config import get_logger, set_request_id
 from services.worker.celery_app import app
+from services.worker.payments import process_payment_event
+from services.worker.publishing import (
+    backoff_with_jitter,
+    claim_publication,
+    record_published,
+    record_skipped,
+    release_publication,
+)
+from services.worker.scheduler import (
+    SCHEDULER_BATCH_SIZE,
+    SCHEDULER_MAX_PER_TICK,
+    claim_due_orders,
+    spread_countdowns,
+)
+from services.worker.telegram import (
+    TelegramDeliveryUnknown,
+    TelegramSendError,
+    close_clients,
+    post_message,
+    send_many,
+    send_message,
+)
 
-configure_json_logging()
 logger = get_logger(__name__)
 
 
+@worker_process_shutdown.connect
+def _close_telegram_clients(**_kwargs):
+    """Закрыть пулы соединений Telegram при остановке процесса воркера."""
+    close_clients()
+
+
 def _send_telegram_message(bot_token: str, chat_id: str | int, text: str) -> bool:
-    """Отправить сообщение в чат/канал через Bot API. chat_id: @username или -100..."""
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    with httpx.Client(timeout=30.0) as client:
-        r = client.post(url, json={"chat_id": chat_id, "text": text[:4096]})
-    if r.status_code != 200:
-        logger.warning("Telegram sendMessage failed: %s %s", r.status_code, r.text)
-        return False
-    return True
+    """Отправить сообщение в чат/канал через Bot API (общий пул соединений процесса)."""
+    return send_message(bot_token, chat_id, text)
+
+
+def _deliver(messages: list[tuple[int, str]]) -> int:
+    """
+    Отправить пачку личных сообщений (группировка, дедупликация, параллельно). Вернуть sent.
+    Не доставлено ни одно — TelegramSendError (задача повторяется). При частичной доставке
+    только предупреждение: повтор задублировал бы уже доставленные сообщения.
+    """
+    bot_token = os.getenv("BOT_TOKEN", "").strip()
+    if not bot_token:
+        logger.warning("BOT_TOKEN not set, skipping %s notifications", len(messages))
+        return 0
+    result = send_many(bot_token, messages)
+    if result["failed"] and not result["sent"]:
+        raise TelegramSendError(f"all {result['failed']} notifications failed")
+    if result["failed"]:
+        logger.warning("Notifications: %s sent, %s failed", result["sent"], result["failed"])
+    return result["sent"]
 
 
 @app.task
@@ -38,52 +81,81 @@ def ping():
     return {"pong": True}
 
 
-@app.task(bind=True, max_retries=3)
-def publish_order(self, order_id: str, request_id: str | None = None):
-    """Публикация рекламы в канал (бот отправляет пост), запись в views. RLS: tenant_id."""
+@app.task
+def schedule_due_orders():
+    """
+    Тик планировщика (Celery beat, раз в минуту): заказы, чей слот наступает в текущую минуту,
+    переводятся в SCHEDULED и ставятся в очередь publish с разнесением по времени.
+    Безопасно запускать несколько планировщиков одновременно (FOR UPDATE SKIP LOCKED).
+    """
+    now = datetime.now(UTC)
+    total = 0
+    while total < SCHEDULER_MAX_PER_TICK:
+        db = SessionLocal()
+        try:
+            limit = min(SCHEDULER_BATCH_SIZE, SCHEDULER_MAX_PER_TICK - total)
+            order_ids = claim_due_orders(db, now, limit)
+            if not order_ids:
+                break
+            # Ставим в очередь до commit: при сбое брокера откат вернёт заказы в пул на след. тик
+            for order_id, countdown in zip(
+                order_ids, spread_countdowns(len(order_ids)), strict=True
+            ):
+                publish_order.apply_async((str(order_id),), countdown=countdown)
+            db.commit()
+            total += len(order_ids)
+            if len(order_ids) < limit:
+                break
+        except Exception:
+            db.rollback()
+            logger.exception("schedule_due_orders: batch failed")
+            break
+        finally:
+            db.close()
+    if total:
+        logger.info("schedule_due_orders: scheduled %s orders", total)
+    return {"scheduled": total}
+
+
+@app.task(bind=True, max_retries=5)
+def publish_order(
+    self, order_id: str, request_id: str | None = None, message_id: int | None = None
+):
+    """
+    Публикация рекламы в канал (бот отправляет пост), запись в views. At-most-once:
+    перед отправкой захватывается попытка (publish_state), после — сохраняется message_id.
+    Если Telegram принял пост, а запись в БД упала, повтор получает message_id и не шлёт снова.
+    """
     set_request_id(request_id or str(self.request.id))
-    db = SessionLocal()
     try:
-        order = db.query(Order).filter(Order.id == UUID(order_id)).first()
-        if not order:
-            logger.warning("Order not found: %s", order_id)
-            return
-        if not order.channel:
-            logger.warning("Order %s has no channel", order_id)
-            return
-        tenant_id = str(order.channel.tenant_id)
-        db.execute(text("SELECT set_config('app.tenant_id', :tid, true)"), {"tid": tenant_id})
-
-        # Отправка поста в Telegram (бот должен быть админом канала)
-        bot_token = os.getenv("BOT_TOKEN", "").strip()
-        body = order.content or {}
-        msg_text = body.get("text") or "Реклама"
-        if order.erid:
-            msg_text += f"\n\n🛍 ERID: {order.erid}"
-        if body.get("link"):
-            msg_text += f"\n\n{body['link']}"
-
-        if bot_token:
-            chat_id = (
-                order.channel.username
-                if order.channel.username.startswith("@")
-                else f"@{order.channel.username}"
-            )
-            if _send_telegram_message(bot_token, chat_id, msg_text):
-                order.status = OrderStatus.PUBLISHED
-                logger.info("Published order %s to %s", order_id, chat_id)
-            else:
-                raise RuntimeError("Telegram sendMessage failed")
-        else:
-            logger.info("BOT_TOKEN not set, skipping Telegram send for order %s", order_id)
-
-        db.add(View(order_id=order.id, timestamp=datetime.now(UTC)))
-        db.commit()
+        if message_id is None:
+            claim = claim_publication(order_id)
+            if claim is None:
+                return
+            bot_token = os.getenv("BOT_TOKEN", "").strip()
+            if not bot_token:
+                logger.info("BOT_TOKEN not set, skipping Telegram send for order %s", order_id)
+                record_skipped(order_id)
+                return
+            # Отправка поста в Telegram (бот должен быть админом канала)
+            try:
+                message_id = post_message(bot_token, claim.chat_id, claim.text)
+            except TelegramSendError:
+                release_publication(order_id, PublishState.FAILED)
+                raise
+            except TelegramDeliveryUnknown:
+                release_publication(order_id, PublishState.UNKNOWN)
+                logger.exception("publish_order: delivery of order %s unknown, no retry", order_id)
+                return
+            logger.info("Published order %s to %s", order_id, claim.chat_id)
+        record_published(order_id, message_id)
     except Exception as e:
         logger.exception("publish_order failed: %s", e)
-        raise self.retry(exc=e) from e
-    finally:
-        db.close()
+        raise self.retry(
+            exc=e,
+            countdown=backoff_with_jitter(self.request.retries),
+            kwargs={"request_id": request_id, "message_id": message_id},
+        ) from e
 
 
 @app.task
@@ -96,23 +168,77 @@ def send_notification(telegram_id: int, text: str) -> bool:
     return _send_telegram_message(bot_token, telegram_id, text)
 
 
-def _format_new_order_owner(order: Order) -> str:
-    ch = order.channel
-    ch_name = f"@{ch.username}" if ch and ch.username else "канал"
+@app.task(bind=True, max_retries=2)
+def send_notifications_batch(
+    self, messages: list[list], request_id: str | None = None
+) -> dict[str, int]:
+    """
+    Пачка уведомлений одним сообщением брокера: [[telegram_id, text], ...].
+    Дубликаты отбрасываются, сообщения одному адресату склеиваются, отправка — параллельно.
+    Пока без продюсера: точка входа для будущих рассылок-дайджестов (notify_* шлют через
+    _deliver напрямую).
+    """
+    set_request_id(request_id or str(self.request.id))
+    pairs = [(int(telegram_id), str(text)) for telegram_id, text in messages]
+    try:
+        sent = _deliver(pairs)
+    except TelegramSendError as e:
+        logger.exception("send_notifications_batch failed: %s", e)
+        raise self.retry(exc=e) from e
+    return {"received": len(pairs), "sent": sent}
+
+
+class OrderNotice(NamedTuple):
+    """Поля заказа, нужные для уведомлений (без загрузки ORM-объектов и их связей)."""
+
+    id: UUID
+    status: OrderStatus
+    advertiser_id: int
+    channel_username: str | None
+    owner_telegram_id: int | None
+
+
+def load_order_notice(db: Session, order_id: str | UUID) -> OrderNotice | None:
+    """Один запрос: заказ + username канала + telegram_id владельца (только нужные колонки)."""
+    row = db.execute(
+        select(
+            Order.id,
+            Order.status,
+            Order.advertiser_id,
+            Channel.username,
+            Tenant.telegram_id,
+        )
+        .join(Channel, Channel.id == Order.channel_id)
+        .join(Tenant, Tenant.id == Channel.tenant_id)
+        .where(Order.id == (order_id if isinstance(order_id, UUID) else UUID(order_id)))
+    ).first()
+    return OrderNotice(*row) if row else None
+
+
+def _fetch_order_notice(order_id: str) -> OrderNotice | None:
+    """Загрузить OrderNotice в короткой сессии: соединение с БД не держится во время отправки."""
+    db = SessionLocal()
+    try:
+        return load_order_notice(db, order_id)
+    finally:
+        db.close()
+
+
+def _format_new_order_owner(order: OrderNotice) -> str:
+    ch_name = f"@{order.channel_username}" if order.channel_username else "канал"
     return f"📩 Новый заказ на {ch_name}\nID: {str(order.id)[:8]}…\nСтатус: {order.status.value}"
 
 
-def _format_new_order_advertiser(order: Order) -> str:
-    ch = order.channel
-    ch_name = f"@{ch.username}" if ch and ch.username else "канал"
+def _format_new_order_advertiser(order: OrderNotice) -> str:
+    ch_name = f"@{order.channel_username}" if order.channel_username else "канал"
     return f"✅ Ваш заказ принят\nКанал: {ch_name}\nID: {str(order.id)[:8]}…"
 
 
-def _format_order_cancelled(order: Order) -> str:
+def _format_order_cancelled(order: OrderNotice) -> str:
     return f"❌ Заказ {str(order.id)[:8]}… отменён."
 
 
-def _format_payment_received(order: Order, amount: str = "") -> str:
+def _format_payment_received(order: OrderNotice, amount: str = "") -> str:
     return f"💰 Оплата получена по заказу {str(order.id)[:8]}…" + (
         f" Сумма: {amount}" if amount else ""
     )
@@ -122,71 +248,96 @@ def _format_payment_received(order: Order, amount: str = "") -> str:
 def notify_new_order(self, order_id: str, request_id: str | None = None):
     """Уведомить владельца канала и рекламодателя о новом заказе."""
     set_request_id(request_id or str(self.request.id))
-    db = SessionLocal()
     try:
-        order = db.query(Order).filter(Order.id == UUID(order_id)).first()
+        order = _fetch_order_notice(order_id)
         if not order:
             logger.warning("notify_new_order: order %s not found", order_id)
             return
-        if order.channel and order.channel.tenant:
-            owner_telegram_id = order.channel.tenant.telegram_id
-            send_notification(owner_telegram_id, _format_new_order_owner(order))
+        messages = []
+        if order.owner_telegram_id:
+            messages.append((order.owner_telegram_id, _format_new_order_owner(order)))
         if order.advertiser_id:
-            send_notification(order.advertiser_id, _format_new_order_advertiser(order))
+            messages.append((order.advertiser_id, _format_new_order_advertiser(order)))
+        _deliver(messages)
     except Exception as e:
         logger.exception("notify_new_order failed: %s", e)
         raise self.retry(exc=e) from e
-    finally:
-        db.close()
 
 
 @app.task(bind=True, max_retries=2)
 def notify_order_cancelled(self, order_id: str, request_id: str | None = None):
     """Уведомить рекламодателя и владельца канала об отмене заказа."""
     set_request_id(request_id or str(self.request.id))
-    db = SessionLocal()
     try:
-        order = db.query(Order).filter(Order.id == UUID(order_id)).first()
+        order = _fetch_order_notice(order_id)
         if not order:
             return
         text = _format_order_cancelled(order)
-        if order.advertiser_id:
-            send_notification(order.advertiser_id, text)
-        if order.channel and order.channel.tenant:
-            send_notification(order.channel.tenant.telegram_id, text)
+        _deliver([(tid, text) for tid in (order.advertiser_id, order.owner_telegram_id) if tid])
     except Exception as e:
         logger.exception("notify_order_cancelled failed: %s", e)
         raise self.retry(exc=e) from e
-    finally:
-        db.close()
 
 
 @app.task(bind=True, max_retries=2)
 def notify_payment_received(self, order_id: str, amount: str = ""):
     """Уведомить о получении оплаты по заказу."""
-    db = SessionLocal()
     try:
-        order = db.query(Order).filter(Order.id == UUID(order_id)).first()
+        order = _fetch_order_notice(order_id)
         if not order:
             return
         text = _format_payment_received(order, amount)
-        if order.channel and order.channel.tenant:
-            send_notification(order.channel.tenant.telegram_id, text)
-        if order.advertiser_id:
-            send_notification(order.advertiser_id, text)
+        _deliver([(tid, text) for tid in (order.owner_telegram_id, order.advertiser_id) if tid])
     except Exception as e:
         logger.exception("notify_payment_received failed: %s", e)
         raise self.retry(exc=e) from e
+
+
+@app.task(bind=True, max_retries=5)
+def process_webhook(self, provider: str, event_id: str, request_id: str | None = None):
+    """Обновление Payment/Order/Slot по принятому webhook Stripe/ЮKassa (одна транзакция)."""
+    set_request_id(request_id or str(self.request.id))
+    db = SessionLocal()
+    try:
+        outcome = process_payment_event(db, provider, event_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.exception("process_webhook failed: %s", e)
+        raise self.retry(exc=e, countdown=backoff_with_jitter(self.request.retries)) from e
     finally:
         db.close()
+    logger.info("Webhook %s %s: %s", provider, event_id, outcome)
+    if outcome == "unknown_payment":
+        # Событие не помечено обработанным: повторяем, пока не появится Payment
+        raise self.retry(countdown=backoff_with_jitter(self.request.retries))
+    return {"outcome": outcome}
+
+
+@app.task
+def export_analytics():
+    """
+    Инкрементальная выгрузка просмотров и заказов в Parquet (services.worker.analytics_export).
+    Без ANALYTICS_EXPORT_URI ничего не делает; pyarrow нужен только здесь (extra «analytics»).
+    """
+    uri = os.getenv("ANALYTICS_EXPORT_URI", "").strip()
+    if not uri:
+        return {"skipped": "ANALYTICS_EXPORT_URI not set"}
+    from services.worker.analytics_export import run_export
+
+    return run_export(uri)
 
 
-@app.task(bind=True)
-def process_webhook(self, provider: str, data: dict):
-    """Обновление статуса платежа из webhook Stripe/ЮKassa."""
-    logger.info("Webhook %s: %s", provider, list(data.keys()))
-    # TODO: разбор data, поиск Payment по invoice_id, обновление статуса и Order
-    return {"ok": True}
+@app.task
+def refresh_revenue_view():
+    """Пересчитать материализованную выручку по тенантам (GET /api/admin/revenue)."""
+    db = SessionLocal()
+    try:
+        duration_ms = revenue.refresh_revenue_view(db)
+        db.commit()
+        return {"duration_ms": duration_ms}
+    finally:
+        db.close()
 
 
 @app.task
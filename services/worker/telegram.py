@@ -0,0 +1,261 @@
+"""
+@file: telegram.py
+@description: Отправка сообщений через Telegram Bot API: общий пул соединений, группировка и
+    дедупликация пачки уведомлений, параллельная отправка с ограничением конкурентности —
+    асинхронно (один event loop в фоновом потоке и один httpx.AsyncClient на процесс воркера)
+    или пулом потоков.
+@dependencies: httpx, asyncio
+@created: 2026-10-19
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import httpx
+
+from services.api.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+TELEGRAM_MAX_TEXT = 4096
+# Сколько sendMessage одновременно «в полёте» из одного процесса воркера
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "16"))
+# async — event loop + AsyncClient (по умолчанию); threads — пул потоков с общим httpx.Client
+TELEGRAM_IO_MODE = os.getenv("TELEGRAM_IO_MODE", "async").strip().lower()
+
+_client: httpx.Client | None = None
+# Event loop (поток telegram-io) и AsyncClient — один на процесс: при --pool threads задачи всех
+# потоков делят их, и соединений не больше NOTIFY_CONCURRENCY на процесс
+_async: dict[str, Any] | None = None
+_async_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+class TelegramSendError(Exception):
+    """Telegram точно не принял сообщение (ошибка ответа или соединения) — повтор безопасен."""
+
+
+class TelegramDeliveryUnknown(Exception):
+    """Запрос мог дойти до Telegram, но ответ не получен — повтор может задублировать пост."""
+
+
+def get_client() -> httpx.Client:
+    """Общий httpx.Client процесса (keep-alive). Создаётся лениво — уже после fork воркера."""
+    global _client
+    if _client is None:
+        _client = httpx.Client(
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=NOTIFY_CONCURRENCY, max_keepalive_connections=NOTIFY_CONCURRENCY
+            ),
+        )
+    return _client
+
+
+def _async_state() -> dict[str, Any]:
+    """Event loop процесса, запущенный в фоновом потоке telegram-io; создаётся лениво."""
+    global _async
+    with _async_lock:
+        if _async is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="telegram-io", daemon=True)
+            thread.start()
+            _async = {"loop": loop, "thread": thread, "client": None}
+        return _async
+
+
+def _reset_after_fork() -> None:
+    """В дочернем процессе потока telegram-io нет — loop и клиент создаются заново."""
+    global _async, _async_lock
+    _async = None
+    _async_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Выполнить корутину в event loop процесса и дождаться результата (из Celery-задачи)."""
+    return asyncio.run_coroutine_threadsafe(coro, _async_state()["loop"]).result()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Общий httpx.AsyncClient процесса: соединения переиспользуются между задачами и потоками."""
+    state = _async_state()
+    with _async_lock:
+        if state["client"] is None:
+            state["client"] = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=NOTIFY_CONCURRENCY,
+                    max_keepalive_connections=NOTIFY_CONCURRENCY,
+                ),
+            )
+        return state["client"]
+
+
+def close_clients() -> None:
+    """Закрыть клиенты и остановить event loop процесса (сигнал завершения процесса воркера)."""
+    global _client, _async
+    if _client is not None:
+        _client.close()
+        _client = None
+    with _async_lock:
+        state, _async = _async, None
+    if state is None:
+        return
+    loop = state["loop"]
+    if state["client"] is not None:
+        asyncio.run_coroutine_threadsafe(state["client"].aclose(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    state["thread"].join(timeout=5)
+    loop.close()
+
+
+def send_message(
+    bot_token: str, chat_id: str | int, text: str, client: httpx.Client | None = None
+) -> bool:
+    """Отправить сообщение в чат/канал через Bot API. chat_id: @username, telegram_id или -100..."""
+    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    r = (client or get_client()).post(
+        url, json={"chat_id": chat_id, "text": text[:TELEGRAM_MAX_TEXT]}
+    )
+    if r.status_code != 200:
+        logger.warning("Telegram sendMessage failed: %s %s", r.status_code, r.text)
+        return False
+    return True
+
+
+def post_message(
+    bot_token: str, chat_id: str | int, text: str, client: httpx.Client | None = None
+) -> int:
+    """
+    Отправить сообщение и вернуть message_id. Ошибки классифицируются для идемпотентности:
+    TelegramSendError — не доставлено; TelegramDeliveryUnknown — исход неизвестен.
+    """
+    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    try:
+        r = (client or get_client()).post(
+            url, json={"chat_id": chat_id, "text": text[:TELEGRAM_MAX_TEXT]}
+        )
+    except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+        raise TelegramSendError(f"connection failed: {e!r}") from e
+    except httpx.HTTPError as e:
+        raise TelegramDeliveryUnknown(f"no response: {e!r}") from e
+    if r.status_code != 200:
+        raise TelegramSendError(f"sendMessage {r.status_code}: {r.text[:200]}")
+    try:
+        return int(r.json()["result"]["message_id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise TelegramDeliveryUnknown(f"unexpected sendMessage response: {r.text[:200]}") from e
+
+
+async def send_message_async(
+    bot_token: str, chat_id: str | int, text: str, client: httpx.AsyncClient | None = None
+) -> bool:
+    """Асинхронный вариант send_message (не блокирует поток на время HTTP-запроса)."""
+    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    r = await (client or get_async_client()).post(
+        url, json={"chat_id": chat_id, "text": text[:TELEGRAM_MAX_TEXT]}
+    )
+    if r.status_code != 200:
+        logger.warning("Telegram sendMessage failed: %s %s", r.status_code, r.text)
+        return False
+    return True
+
+
+def group_messages(messages: Iterable[tuple[int | str, str]]) -> list[tuple[int | str, str]]:
+    """
+    Дедупликация одинаковых (chat_id, text) и склейка сообщений одному адресату в одно
+    (через пустую строку), пока помещается в лимит Telegram. Порядок адресатов сохраняется.
+    """
+    by_chat: dict[int | str, list[str]] = {}
+    seen: set[tuple[int | str, str]] = set()
+    for chat_id, text in messages:
+        if not text or (chat_id, text) in seen:
+            continue
+        seen.add((chat_id, text))
+        by_chat.setdefault(chat_id, []).append(text)
+
+    grouped: list[tuple[int | str, str]] = []
+    for chat_id, texts in by_chat.items():
+        current = ""
+        for text in texts:
+            candidate = f"{current}\n\n{text}" if current else text
+            if current and len(candidate) > TELEGRAM_MAX_TEXT:
+                grouped.append((chat_id, current))
+                candidate = text
+            current = candidate
+        grouped.append((chat_id, current))
+    return grouped
+
+
+async def send_many_async(
+    bot_token: str,
+    messages: Iterable[tuple[int | str, str]],
+    concurrency: int = NOTIFY_CONCURRENCY,
+    client: httpx.AsyncClient | None = None,
+) -> dict[str, int]:
+    """Сгруппировать и отправить пачку сообщений: до concurrency запросов в полёте в одном loop."""
+    grouped = group_messages(messages)
+    if not grouped:
+        return {"sent": 0, "failed": 0}
+    http = client or get_async_client()
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def _send(item: tuple[int | str, str]) -> bool:
+        async with semaphore:
+            try:
+                return await send_message_async(bot_token, item[0], item[1], client=http)
+            except httpx.HTTPError:
+                logger.warning("Telegram sendMessage error for %s", item[0], exc_info=True)
+                return False
+
+    results = await asyncio.gather(*(_send(item) for item in grouped))
+    sent = sum(results)
+    return {"sent": sent, "failed": len(results) - sent}
+
+
+def send_many(
+    bot_token: str,
+    messages: Iterable[tuple[int | str, str]],
+    concurrency: int = NOTIFY_CONCURRENCY,
+    client: httpx.Client | httpx.AsyncClient | None = None,
+    mode: str | None = None,
+) -> dict[str, int]:
+    """
+    Сгруппировать и отправить пачку сообщений параллельно (не более concurrency запросов).
+    mode: async (event loop процесса) или threads (пул потоков); по умолчанию TELEGRAM_IO_MODE.
+    client — httpx.AsyncClient для async, httpx.Client для threads (иначе TypeError).
+    """
+    if (mode or TELEGRAM_IO_MODE) == "async":
+        if client is not None and not isinstance(client, httpx.AsyncClient):
+            raise TypeError("send_many(mode='async') expects httpx.AsyncClient")
+        return run_async(send_many_async(bot_token, messages, concurrency, client=client))
+    if client is not None and not isinstance(client, httpx.Client):
+        raise TypeError("send_many(mode='threads') expects httpx.Client")
+    grouped = group_messages(messages)
+    if not grouped:
+        return {"sent": 0, "failed": 0}
+    http = client or get_client()
+
+    def _send(item: tuple[int | str, str]) -> bool:
+        try:
+            return send_message(bot_token, item[0], item[1], client=http)
+        except httpx.HTTPError:
+            logger.warning("Telegram sendMessage error for %s", item[0], exc_info=True)
+            return False
+
+    if len(grouped) == 1 or concurrency <= 1:
+        results = [_send(item) for item in grouped]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(grouped))) as pool:
+            results = list(pool.map(_send, grouped))
+    sent = sum(results)
+    return {"sent": sent, "failed": len(results) - sent}
@@ -8,6 +8,7 @@
 from shared.schemas.channel import ChannelCreate, ChannelUpdate
 from shared.schemas.channel import ChannelResponse as ChannelResponseSchema
 from shared.schemas.order import OrderCreate, OrderResponse, OrderUpdate
+from shared.schemas.payment import PaymentEvent
 from shared.schemas.slot import SlotCreate, SlotFilter, SlotResponse
 from shared.schemas.tenant import BaseTenantModel
 
@@ -19,6 +20,7 @@ __all__ = [
     "OrderCreate",
     "OrderUpdate",
     "OrderResponse",
+    "PaymentEvent",
     "SlotFilter",
     "SlotCreate",
     "SlotResponse",
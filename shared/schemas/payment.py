@@ -0,0 +1,64 @@
+"""
+@file: payment.py
+@description: Нормализованное событие оплаты из webhook Stripe/ЮKassa (для API и воркера).
+@dependencies: pydantic
+@created: 2026-10-19
+"""
+
+from typing import Any
+
+from pydantic import BaseModel
+
+# Тип события провайдера -> статус Payment. Остальные события подтверждаются и игнорируются.
+STRIPE_EVENT_STATUS = {
+    "payment_intent.succeeded": "succeeded",
+    "checkout.session.completed": "succeeded",
+    "payment_intent.payment_failed": "failed",
+    "payment_intent.canceled": "canceled",
+}
+YOOKASSA_EVENT_STATUS = {
+    "payment.succeeded": "succeeded",
+    "payment.waiting_for_capture": "waiting_for_capture",
+    "payment.canceled": "canceled",
+    "refund.succeeded": "refunded",
+}
+
+
+class PaymentEvent(BaseModel):
+    """Событие оплаты: id события у провайдера, invoice_id платежа и новый статус."""
+
+    provider: str
+    event_id: str
+    invoice_id: str
+    status: str | None
+
+    @classmethod
+    def from_stripe(cls, payload: dict[str, Any]) -> "PaymentEvent":
+        obj = (payload.get("data") or {}).get("object") or {}
+        return cls(
+            provider="stripe",
+            event_id=str(payload["id"]),
+            invoice_id=str(obj.get("id", "")),
+            status=STRIPE_EVENT_STATUS.get(payload.get("type", "")),
+        )
+
+    @classmethod
+    def from_yookassa(cls, payload: dict[str, Any]) -> "PaymentEvent":
+        event = payload.get("event", "")
+        obj = payload.get("object") or {}
+        # В уведомлении ЮKassa нет id события: уникальны пара (event, object.id)
+        invoice_id = obj.get("payment_id") if event.startswith("refund.") else obj.get("id")
+        return cls(
+            provider="yookassa",
+            event_id=f"{event}:{obj['id']}",
+            invoice_id=str(invoice_id or ""),
+            status=YOOKASSA_EVENT_STATUS.get(event),
+        )
+
+    @classmethod
+    def parse(cls, provider: str, payload: dict[str, Any]) -> "PaymentEvent":
+        if provider == "stripe":
+            return cls.from_stripe(payload)
+        if provider == "yookassa":
+            return cls.from_yookassa(payload)
+        raise ValueError(f"Unknown payment provider: {provider}")
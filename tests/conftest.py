@@ -6,6 +6,7 @@
 """
 
 import os
+from contextlib import contextmanager
 from datetime import UTC, datetime
 
 import pytest
@@ -15,10 +16,12 @@ from sqlalchemy.orm import Session
 # Включаем dev-login и отключаем Celery для тестов (до импорта app)
 os.environ.setdefault("ENABLE_DEV_LOGIN", "true")
 os.environ.setdefault("CELERY_BROKER_URL", "")
+os.environ.setdefault("REALTIME_ENABLED", "false")
 
-from db.database import SessionLocal
+from db.database import SessionLocal, engine
 from db.models import Channel, Slot, Tenant
 from services.api.main import app
+from services.api.query_stats import capture_queries
 
 
 @pytest.fixture(scope="session")
@@ -27,6 +30,24 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Бюджет SQL-запросов эндпоинта: with query_budget(2): client.get(...).
+    Больше max_queries запросов — тест падает со списком выполненных запросов (поиск N+1).
+    """
+
+    @contextmanager
+    def budget(max_queries: int):
+        with capture_queries(engine) as queries:
+            yield queries
+        assert (
+            len(queries) <= max_queries
+        ), f"{len(queries)} SQL queries, budget {max_queries}:\n" + "\n".join(queries)
+
+    return budget
+
+
 @pytest.fixture
 def db():
     """Сессия БД для подготовки данных. После теста откатываем изменения."""
@@ -0,0 +1,38 @@
+"""
+@file: test_api_server.py
+@description: Production-профиль API: число воркеров по CPU и квоте cgroup, uvloop/httptools.
+@dependencies: pytest, services.api.server
+@created: 2026-10-19
+"""
+
+import pytest
+
+pytest.importorskip("uvicorn_worker")
+
+from services.api import server  # noqa: E402
+
+
+def test_available_cpus_respects_cgroup_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    cpu_max = tmp_path / "cpu.max"
+    monkeypatch.setattr(server, "CGROUP_CPU_MAX", cpu_max)
+    assert server.available_cpus() == 8  # файла нет — только affinity
+    cpu_max.write_text("150000 100000\n")
+    assert server.available_cpus() == 2  # 1.5 CPU — округление вверх
+    cpu_max.write_text("max 100000\n")
+    assert server.available_cpus() == 8
+    cpu_max.write_text("10000 100000\n")
+    assert server.available_cpus() == 1
+
+
+def test_default_workers_env_override(monkeypatch):
+    monkeypatch.setattr(server, "available_cpus", lambda: 3)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert server.default_workers() == 3
+    monkeypatch.setenv("WEB_CONCURRENCY", "5")
+    assert server.default_workers() == 5
+
+
+def test_worker_uses_uvloop_and_httptools():
+    assert server.ApiWorker.CONFIG_KWARGS["loop"] == "uvloop"
+    assert server.ApiWorker.CONFIG_KWARGS["http"] == "httptools"
@@ -0,0 +1,109 @@
+"""
+@file: test_bot_api_client.py
+@description: HTTP-клиент бота: общий AsyncClient, повтор GET при 5xx/сетевой ошибке,
+    отсутствие повтора POST, учёт латентности вызовов, сброс кэшированного JWT при 401.
+@dependencies: pytest, httpx, services.bot.api_client
+@created: 2026-10-19
+"""
+
+import time
+from uuid import uuid4
+
+import httpx
+import pytest
+from jose import jwt
+from prometheus_client import REGISTRY
+
+from services.bot import api_client
+
+
+def _attempts(outcome: str) -> float:
+    labels = {"method": "GET", "path": "/api/channels", "outcome": outcome}
+    return REGISTRY.get_sample_value("lytslot_bot_api_request_duration_seconds_count", labels) or 0
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """Общий клиент бота поверх MockTransport; ответы задаёт тест."""
+    calls: list[httpx.Request] = []
+    responses: list = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        result = responses.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    client = httpx.AsyncClient(base_url="http://api", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(api_client, "_client", client)
+    monkeypatch.setattr(api_client.settings, "api_retry_backoff_seconds", 0)
+    monkeypatch.setattr(api_client.settings, "api_get_retries", 2)
+    return calls, responses
+
+
+async def test_get_retried_after_503_and_connect_error(mock_api):
+    calls, responses = mock_api
+    responses += [
+        httpx.Response(503),
+        httpx.ConnectError("refused"),
+        httpx.Response(200, json=[{"id": "1", "username": "ch"}]),
+    ]
+    before = {outcome: _attempts(outcome) for outcome in ("5xx", "transport_error", "2xx")}
+    channels = await api_client.get_channels("token")
+    assert channels == [{"id": "1", "username": "ch"}]
+    assert len(calls) == 3
+    assert calls[0].headers["Authorization"] == "Bearer token"
+    # Каждая попытка — наблюдение гистограммы с исходом
+    assert {outcome: _attempts(outcome) - n for outcome, n in before.items()} == {
+        "5xx": 1,
+        "transport_error": 1,
+        "2xx": 1,
+    }
+
+
+async def test_get_gives_up_after_retries(mock_api):
+    _, responses = mock_api
+    responses += [httpx.Response(503)] * 3
+    with pytest.raises(httpx.HTTPStatusError):
+        await api_client.get_channels("token")
+
+
+async def test_post_is_not_retried(mock_api):
+    calls, responses = mock_api
+    responses += [httpx.Response(503), httpx.Response(201, json={"id": "x"})]
+    with pytest.raises(httpx.HTTPStatusError):
+        await api_client.create_order("token", uuid4(), uuid4(), {"text": "ad"})
+    assert len(calls) == 1
+
+
+async def test_calls_share_one_client(mock_api):
+    _, responses = mock_api
+    responses += [httpx.Response(200, json=[]), httpx.Response(200, json=[])]
+    client = api_client.get_client()
+    await api_client.get_channels("token")
+    await api_client.get_slots("token", uuid4())
+    assert api_client.get_client() is client
+
+
+async def test_401_invalidates_cached_token(mock_api, monkeypatch):
+    """Отозванный JWT не переиспользуется до refresh_at: после 401 выдаётся новый."""
+    calls, responses = mock_api
+    issued: list[str] = []
+
+    async def issue(telegram_id: int) -> str:
+        claims = {"sub": str(telegram_id), "exp": int(time.time()) + 3600, "n": len(issued)}
+        issued.append(jwt.encode(claims, "secret"))
+        return issued[-1]
+
+    monkeypatch.setattr(api_client, "_token_cache", api_client.TokenCache(issue, None))
+    revoked = await api_client.get_token(42)
+    assert await api_client.get_token(42) == revoked
+
+    responses.append(httpx.Response(401))
+    with pytest.raises(httpx.HTTPStatusError):
+        await api_client.get_channels(revoked)
+    assert len(calls) == 1
+    fresh = await api_client.get_token(42)
+    assert fresh != revoked
+    assert len(issued) == 2
@@ -0,0 +1,99 @@
+"""
+@file: test_bot_slot_picker.py
+@description: Пикер слотов бота: группировка по дням, пагинация дней и времени, кэш страниц
+    на пользователя и его сброс при занятии слота.
+@dependencies: pytest, services.bot.handlers.order_flow, services.bot.slot_cache
+@created: 2026-10-19
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from services.bot.handlers.order_flow import _day_keyboard, _slot_keyboard
+from services.bot.slot_cache import SlotPageCache, group_free_slots
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+
+def _slots(days: int, per_day: int, status: str = "free") -> list[dict]:
+    start = datetime(2026, 10, 20, 8, tzinfo=UTC)
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{d:06d}{h:06d}",
+            "datetime": (start + timedelta(days=d, minutes=30 * h)).isoformat(),
+            "status": status,
+        }
+        for d in range(days)
+        for h in range(per_day)
+    ]
+
+
+def _callbacks(markup) -> list[str]:
+    return [b.callback_data for row in markup.inline_keyboard for b in row]
+
+
+def test_group_free_slots_by_day():
+    slots = _slots(2, 3) + _slots(1, 1, status="paid")
+    slots.append({"id": "x", "datetime": "not-a-date", "status": "free"})
+    days = group_free_slots(list(reversed(slots)))
+    assert [day for day, _ in days] == ["20261020", "20261021"]
+    assert [hm for _, hm in days[0][1]] == ["08:00", "08:30", "09:00"]
+
+
+def test_day_keyboard_paginates():
+    days = group_free_slots(_slots(14, 2))
+    first = _callbacks(_day_keyboard(days, 0))
+    assert first[:7] == [f"slot_day:{day}:0" for day, _ in days[:7]]
+    assert "slot_days:1" in first and "slot_days:-1" not in first
+    last = _callbacks(_day_keyboard(days, 5))  # страница за пределами — последняя
+    assert last[0] == f"slot_day:{days[7][0]}:0"
+    assert "slot_days:0" in last and "slot_days:2" not in last
+
+
+def test_slot_keyboard_grid_and_pages():
+    day, slots = group_free_slots(_slots(1, 30))[0]
+    markup = _slot_keyboard(day, slots, 0)
+    time_rows = [r for r in markup.inline_keyboard if r[0].callback_data.startswith("slot:")]
+    assert len(time_rows) == 6 and all(len(r) == 4 for r in time_rows)
+    assert f"slot_day:{day}:1" in _callbacks(markup)
+    second = _callbacks(_slot_keyboard(day, slots, 1))
+    assert sum(c.startswith("slot:") for c in second) == 6
+    assert f"slot_day:{day}:0" in second and "slot_days:0" in second
+    # Кнопки укладываются в лимит callback_data Telegram (64 байта)
+    assert all(len(c.encode()) <= 64 for c in second)
+
+
+async def test_cache_is_per_user_and_invalidated_when_slot_taken():
+    redis = FakeRedis()
+    cache, other_replica = SlotPageCache(redis, ttl=60), SlotPageCache(redis, ttl=60)
+    days = group_free_slots(_slots(2, 2))
+    await cache.put(1, "ch", days)
+    assert await cache.get(1, "ch") == days
+    assert await cache.get(2, "ch") is None
+    await other_replica.invalidate("ch")
+    assert await cache.get(1, "ch") is None
+    await cache.put(1, "ch", days[1:])
+    assert await cache.get(1, "ch") == days[1:]
+
+
+async def test_cache_without_redis():
+    cache = SlotPageCache(None, ttl=60)
+    days = group_free_slots(_slots(1, 1))
+    await cache.put(1, "ch", days)
+    assert await cache.get(1, "ch") == days
+    await cache.invalidate("ch")
+    assert await cache.get(1, "ch") is None
+    expired = SlotPageCache(None, ttl=-1)
+    await expired.put(1, "ch", days)
+    assert await expired.get(1, "ch") is None
@@ -0,0 +1,94 @@
+"""
+@file: test_bot_token_cache.py
+@description: Кэш JWT бота: одна выдача на пользователя, обновление до exp, общий Redis
+    между репликами, ограниченная память (LRU, блокировки не копятся).
+@dependencies: pytest, services.bot.token_cache
+@created: 2026-10-19
+"""
+
+import asyncio
+import time
+
+from jose import jwt
+
+from services.bot.token_cache import TokenCache, token_expires_at, token_subject
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class Issuer:
+    def __init__(self, ttl: float) -> None:
+        self.calls = 0
+        self.ttl = ttl
+
+    async def __call__(self, telegram_id: int) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return jwt.encode(
+            {"sub": str(telegram_id), "exp": int(time.time() + self.ttl), "n": self.calls},
+            "secret",
+        )
+
+
+def test_token_expires_at_reads_exp_without_secret():
+    token = jwt.encode({"sub": "1", "exp": 1893456000}, "secret")
+    assert token_expires_at(token) == 1893456000
+    assert token_expires_at("garbage") is None
+    assert token_subject(token) == 1
+    assert token_subject("garbage") is None
+
+
+async def test_concurrent_gets_issue_one_token():
+    issuer = Issuer(ttl=3600)
+    cache = TokenCache(issuer, None, refresh_margin=60)
+    tokens = await asyncio.gather(*(cache.get(42) for _ in range(50)))
+    assert issuer.calls == 1
+    assert len(set(tokens)) == 1
+    assert await cache.get(42) == tokens[0]
+    # Блокировка пользователя не остаётся после выдачи
+    assert cache._locks == {}
+
+
+async def test_token_refreshed_before_exp():
+    issuer = Issuer(ttl=30)
+    cache = TokenCache(issuer, None, refresh_margin=60)
+    first = await cache.get(42)
+    second = await cache.get(42)
+    # До exp меньше margin — каждый раз новый токен, а не истекающий
+    assert first != second
+    assert issuer.calls == 2
+
+
+async def test_replicas_share_token_through_redis():
+    redis = FakeRedis()
+    issuer = Issuer(ttl=3600)
+    replica_a = TokenCache(issuer, redis, refresh_margin=60)
+    replica_b = TokenCache(issuer, redis, refresh_margin=60)
+    assert await replica_a.get(7) == await replica_b.get(7)
+    assert issuer.calls == 1
+
+    await replica_b.invalidate(7)
+    assert "bot:jwt:7" not in redis.data
+
+
+async def test_memory_bounded_by_max_entries():
+    issuer = Issuer(ttl=3600)
+    cache = TokenCache(issuer, None, refresh_margin=60, max_entries=2)
+    await cache.get(1)
+    await cache.get(2)
+    await cache.get(1)  # 1 недавно использован — вытесняется 2
+    await cache.get(3)
+    assert list(cache._local) == [1, 3]
+    assert issuer.calls == 3
@@ -0,0 +1,118 @@
+"""
+@file: test_bot_webhook.py
+@description: Webhook-приёмник бота: секретный токен, ограничение одновременных обработчиков,
+    drain при остановке — на синтетических апдейтах через локальный aiohttp-сервер; метрики
+    на публичный порт не выводятся.
+@dependencies: pytest, aiohttp, aiogram, services.bot.webhook
+@created: 2026-10-19
+"""
+
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from services.bot.config import settings
+from services.bot.webhook import SECRET_HEADER, UpdateReceiver, create_webhook_app
+
+SECRET = "test-secret"
+
+
+def synthetic_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": 1000 + update_id, "type": "private"},
+            "from": {"id": 1000 + update_id, "is_bot": False, "first_name": "U"},
+            "text": f"hello {update_id}",
+        },
+    }
+
+
+class SlowHandlers:
+    """Обработчик сообщений, считающий одновременно выполняющиеся вызовы."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.done: list[int] = []
+        self.router = Router()
+        self.router.message()(self.on_message)
+
+    async def on_message(self, message: Message) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.done.append(message.message_id)
+
+
+async def _client(handlers: SlowHandlers, max_concurrency: int, drain_timeout: float = 5.0):
+    dp = Dispatcher()
+    dp.include_router(handlers.router)
+    bot = Bot(token="123456:TEST")
+    receiver = UpdateReceiver(dp, bot, SECRET, max_concurrency, drain_timeout)
+    app = web.Application()
+    app.router.add_post("/webhook", receiver.handle)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client, receiver, bot
+
+
+async def test_webhook_app_does_not_serve_metrics(monkeypatch):
+    monkeypatch.setattr(settings, "webhook_secret", SECRET)
+    bot = Bot(token="123456:TEST")
+    app = create_webhook_app(Dispatcher(), bot, register_webhook=False)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    try:
+        assert (await client.get("/health")).status == 200
+        assert (await client.get("/metrics")).status == 404
+    finally:
+        await client.close()
+        await bot.session.close()
+
+
+async def test_rejects_wrong_secret():
+    handlers = SlowHandlers(delay=0)
+    client, _, bot = await _client(handlers, max_concurrency=4)
+    try:
+        r = await client.post("/webhook", json=synthetic_update(1))
+        assert r.status == 401
+        r = await client.post("/webhook", json=synthetic_update(1), headers={SECRET_HEADER: "x"})
+        assert r.status == 401
+        assert handlers.done == []
+    finally:
+        await client.close()
+        await bot.session.close()
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 8])
+async def test_bounded_concurrency_and_drain(max_concurrency):
+    handlers = SlowHandlers(delay=0.02)
+    client, receiver, bot = await _client(handlers, max_concurrency=max_concurrency)
+    try:
+        responses = await asyncio.gather(
+            *(
+                client.post("/webhook", json=synthetic_update(i), headers={SECRET_HEADER: SECRET})
+                for i in range(1, 41)
+            )
+        )
+        assert [r.status for r in responses] == [200] * 40
+        await receiver.drain()
+        assert sorted(handlers.done) == list(range(1, 41))
+        assert handlers.peak <= max_concurrency
+
+        r = await client.post(
+            "/webhook", json=synthetic_update(99), headers={SECRET_HEADER: SECRET}
+        )
+        assert r.status == 503
+    finally:
+        await client.close()
+        await bot.session.close()
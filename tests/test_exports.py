@@ -0,0 +1,119 @@
+"""
+@file: test_exports.py
+@description: Потоковая выгрузка CSV/NDJSON: кодирование пачек строк, авторизация, изоляция
+    тенантов и формат ответа эндпоинтов (нужна БД).
+@dependencies: pytest, services.api.exports, tests.conftest
+@created: 2026-10-19
+"""
+
+import csv
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from fastapi.testclient import TestClient
+
+from db.models import OrderStatus, View
+from services.api.exports import encode_rows
+
+ORDER_ID = UUID("00000000-0000-0000-0000-000000000001")
+TS = datetime(2026, 10, 19, 9, 30, tzinfo=UTC)
+
+
+def test_encode_csv_one_chunk_per_batch():
+    batches = [
+        [(ORDER_ID, OrderStatus.PAID, {"text": 'Скидка, "50%"\nтолько сегодня'}, TS)],
+        [(ORDER_ID, OrderStatus.DRAFT, None, None)],
+    ]
+    chunks = list(encode_rows(["id", "status", "content", "publish_at"], batches, "csv"))
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "status", "content", "publish_at"]
+    assert rows[1] == [
+        str(ORDER_ID),
+        "paid",
+        '{"text":"Скидка, \\"50%\\"\\nтолько сегодня"}',
+        "2026-10-19T09:30:00+00:00",
+    ]
+    assert rows[2] == [str(ORDER_ID), "draft", "", ""]
+
+
+def test_encode_csv_null_in_first_row():
+    batches = [[(ORDER_ID, None), (ORDER_ID, TS)]]
+    rows = list(
+        csv.reader(io.StringIO(b"".join(encode_rows(["id", "at"], batches, "csv")).decode()))
+    )
+    assert [row[1] for row in rows] == ["at", "", "2026-10-19T09:30:00+00:00"]
+
+
+def test_encode_csv_empty_result_has_header():
+    assert list(encode_rows(["id", "timestamp"], [], "csv")) == [b"id,timestamp\n"]
+
+
+def test_encode_ndjson():
+    batches = [
+        [(ORDER_ID, OrderStatus.PAID, {"text": "ad"}, TS)],
+        [(ORDER_ID, "draft", None, None)],
+    ]
+    body = b"".join(encode_rows(["id", "status", "content", "publish_at"], batches, "ndjson"))
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert lines == [
+        {
+            "id": str(ORDER_ID),
+            "status": "paid",
+            "content": {"text": "ad"},
+            "publish_at": "2026-10-19T09:30:00+00:00",
+        },
+        {"id": str(ORDER_ID), "status": "draft", "content": None, "publish_at": None},
+    ]
+
+
+def test_export_requires_auth(client: TestClient):
+    assert client.get("/api/orders/export").status_code == 401
+    assert client.get("/api/analytics/views/export").status_code == 401
+
+
+def _create_order(client: TestClient, token: str, channel, slot) -> str:
+    r = client.post(
+        "/api/orders",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"channel_id": str(channel.id), "slot_id": str(slot.id), "content": {"text": "ad"}},
+    )
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_export_orders_csv_only_own_tenant(
+    client: TestClient, token_a: str, token_b: str, channel_a, channel_b, slot_a, slot_b
+):
+    order_a = _create_order(client, token_a, channel_a, slot_a)
+    order_b = _create_order(client, token_b, channel_b, slot_b)
+    r = client.get("/api/orders/export", headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"].startswith('attachment; filename="orders-')
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    ids = {row["id"] for row in rows}
+    assert order_a in ids
+    assert order_b not in ids
+    assert {row["channel_id"] for row in rows} == {str(channel_a.id)}
+
+
+def test_export_views_ndjson(client: TestClient, db, token_a: str, channel_a, slot_a):
+    order_id = _create_order(client, token_a, channel_a, slot_a)
+    seen_at = datetime.now(UTC) - timedelta(hours=1)
+    db.add(View(order_id=UUID(order_id), timestamp=seen_at))
+    db.commit()
+    r = client.get(
+        "/api/analytics/views/export",
+        params={"format": "ndjson", "channel_id": str(channel_a.id)},
+        headers={"Authorization": f"Bearer {token_a}"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert {line["channel_id"] for line in lines} == {str(channel_a.id)}
+    view = next(line for line in lines if line["order_id"] == order_id)
+    assert set(view) == {"id", "order_id", "channel_id", "timestamp"}
+    assert datetime.fromisoformat(view["timestamp"]) == seen_at
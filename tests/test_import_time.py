@@ -0,0 +1,63 @@
+"""
+@file: test_import_time.py
+@description: Холодный старт: профиль `python -X importtime` для API и воркера — бюджет времени
+    импорта и список модулей, которые не должны загружаться при старте.
+@dependencies: pytest
+@created: 2026-10-19
+
+Бюджеты (мс) с запасом для CI; переопределяются IMPORT_BUDGET_API_MS / IMPORT_BUDGET_WORKER_MS.
+Профиль вручную: python -X importtime -c "import services.api.main" 2>&1 | sort -t'|' -k2 -n
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+API_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_API_MS", "3000"))
+WORKER_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_WORKER_MS", "2500"))
+
+
+def import_profile(module: str, **env: str) -> tuple[float, set[str]]:
+    """Импорт module в чистом процессе: (накопленное время, мс; загруженные модули)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT), **env},
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    total_us, modules = 0.0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if name.strip() == module:
+            total_us = float(cumulative)
+    return total_us / 1000, modules
+
+
+def test_api_cold_start():
+    elapsed_ms, modules = import_profile("services.api.main", SENTRY_DSN="")
+    assert not modules & {"sentry_sdk", "celery", "aiogram", "services.worker.tasks"}
+    assert elapsed_ms < API_BUDGET_MS, f"import services.api.main: {elapsed_ms:.0f} ms"
+
+
+def test_api_sentry_without_auto_integrations():
+    pytest.importorskip("sentry_sdk")
+    _, modules = import_profile("services.api.main", SENTRY_DSN="https://key@sentry.invalid/1")
+    assert "sentry_sdk" in modules
+    assert not modules & {"celery", "aiogram", "aiohttp"}
+
+
+def test_worker_cold_start():
+    elapsed_ms, modules = import_profile("services.worker.tasks")
+    assert not modules & {"fastapi", "pydantic", "aiogram", "sentry_sdk"}
+    assert elapsed_ms < WORKER_BUDGET_MS, f"import services.worker.tasks: {elapsed_ms:.0f} ms"
@@ -0,0 +1,100 @@
+"""
+@file: test_logging.py
+@description: JSON-логи: очередь с фоновым выводом, контекст request_id, сэмплирование info,
+    отбрасывание при переполнении очереди.
+@dependencies: pytest, services.api.logging_config
+@created: 2026-10-19
+"""
+
+import io
+import json
+import threading
+
+import pytest
+
+from services.api import logging_config
+from services.api.logging_config import (
+    QueueLogSink,
+    configure_json_logging,
+    flush_logs,
+    get_logger,
+    set_request_id,
+)
+
+
+@pytest.fixture(autouse=True)
+def _restore_logging():
+    yield
+    set_request_id(None)
+    configure_json_logging()
+
+
+def _lines(buf: io.BytesIO) -> list[dict]:
+    return [json.loads(line) for line in buf.getvalue().splitlines()]
+
+
+def test_queue_mode_renders_json_with_context():
+    buf = io.BytesIO()
+    configure_json_logging(mode="queue", stream=buf)
+    set_request_id("req-1")
+    log = get_logger(__name__)
+    log.info("order %s paid", "o-1", amount=10)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.exception("failed")
+    flush_logs()
+    info, error = _lines(buf)
+    assert info["event"] == "order o-1 paid" and info["amount"] == 10
+    assert info["request_id"] == "req-1" and info["level"] == "info"
+    assert info["timestamp"].endswith("Z")
+    assert error["level"] == "error" and "ValueError: boom" in error["exception"]
+
+
+def test_log_call_does_not_wait_for_output():
+    release = threading.Event()
+
+    class BlockedStream(io.BytesIO):
+        def write(self, data):
+            release.wait(5)
+            return super().write(data)
+
+    buf = BlockedStream()
+    configure_json_logging(mode="queue", stream=buf)
+    log = get_logger(__name__)
+    for i in range(100):
+        log.info("event", i=i)  # вывод заблокирован — вызовы всё равно возвращаются сразу
+    release.set()
+    flush_logs()
+    assert len(_lines(buf)) == 100
+
+
+def test_sampling_keeps_warnings():
+    buf = io.BytesIO()
+    configure_json_logging(mode="sync", stream=buf, sample_rate=0.0)
+    log = get_logger(__name__)
+    log.info("dropped")
+    log.info("kept", sample=False)
+    log.warning("warned")
+    assert [e["event"] for e in _lines(buf)] == ["kept", "warned"]
+    assert "sample" not in _lines(buf)[0]
+
+
+def test_overflow_drops_and_reports(monkeypatch):
+    release = threading.Event()
+
+    class BlockedStream(io.BytesIO):
+        def write(self, data):
+            release.wait(5)
+            return super().write(data)
+
+    buf = BlockedStream()
+    monkeypatch.setattr(logging_config, "LOG_BATCH_SIZE", 1)
+    sink = QueueLogSink(buf, maxsize=2)
+    for i in range(10):
+        sink.put({"event": "e", "i": i})
+    release.set()
+    sink.close()
+    lines = _lines(buf)
+    dropped = [e for e in lines if e["event"] == "log events dropped"]
+    assert dropped and sum(e["count"] for e in dropped) + len(lines) - len(dropped) == 10
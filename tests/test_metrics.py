@@ -0,0 +1,98 @@
+"""
+@file: test_metrics.py
+@description: Prometheus-метрики: метка route — шаблон пути, защита /metrics токеном, очереди
+    воркера из task_routes, попадания в кэши бота.
+@dependencies: pytest, prometheus_client, services.api.metrics, services.worker.metrics,
+    services.bot.metrics
+@created: 2026-10-19
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from services.api.config import settings
+from services.api.metrics import UNMATCHED_ROUTE, MetricsMiddleware
+from services.bot.slot_cache import SlotPageCache
+from services.bot.token_cache import TokenCache
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _metrics_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    return app
+
+
+def test_route_label_is_path_template():
+    client = TestClient(_metrics_app())
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("lytslot_http_requests_total", **labels)
+    for item_id in (1, 2, 3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert _sample("lytslot_http_requests_total", **labels) == before + 3
+    assert _sample("lytslot_http_requests_total", method="GET", route="/items/1", status="200") == 0
+
+
+def test_unmatched_paths_share_one_series():
+    client = TestClient(_metrics_app())
+    labels = {"method": "GET", "route": UNMATCHED_ROUTE, "status": "404"}
+    before = _sample("lytslot_http_requests_total", **labels)
+    client.get("/nope/1")
+    client.get("/nope/2")
+    assert _sample("lytslot_http_requests_total", **labels) == before + 2
+
+
+def test_metrics_endpoint_disabled_without_token(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "")
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_requires_token(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    r = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert r.status_code == 200
+    assert "lytslot_http_request_duration_seconds" in r.text
+
+
+def test_worker_queue_names_cover_routes():
+    from services.worker.metrics import queue_names
+
+    names = queue_names()
+    assert names[0] == "default"
+    assert {"publish", "notifications", "analytics"} <= set(names)
+    assert len(names) == len(set(names))
+
+
+async def test_token_cache_counts_hits_and_misses():
+    async def issue(telegram_id: int) -> str:
+        return "not-a-jwt"
+
+    hits = _sample("lytslot_cache_requests_total", cache="bot_jwt", result="hit")
+    misses = _sample("lytslot_cache_requests_total", cache="bot_jwt", result="miss")
+    cache = TokenCache(issue, None)
+    await cache.get(1)
+    await cache.get(1)
+    assert _sample("lytslot_cache_requests_total", cache="bot_jwt", result="miss") == misses + 1
+    assert _sample("lytslot_cache_requests_total", cache="bot_jwt", result="hit") == hits + 1
+
+
+async def test_slot_cache_counts_hits_and_misses():
+    cache = SlotPageCache(None, ttl=60)
+    hits = _sample("lytslot_cache_requests_total", cache="bot_slots", result="hit")
+    misses = _sample("lytslot_cache_requests_total", cache="bot_slots", result="miss")
+    assert await cache.get(1, "ch") is None
+    await cache.put(1, "ch", [])
+    assert await cache.get(1, "ch") == []
+    assert _sample("lytslot_cache_requests_total", cache="bot_slots", result="hit") == hits + 1
+    assert _sample("lytslot_cache_requests_total", cache="bot_slots", result="miss") == misses + 1
@@ -0,0 +1,155 @@
+"""
+@file: test_notification_batch.py
+@description: Пакетная отправка уведомлений: дедупликация, склейка, параллельность (mock API).
+@dependencies: pytest, httpx, services.worker.telegram, services.worker.tasks
+@created: 2026-10-19
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from services.worker import tasks, telegram
+from services.worker.telegram import (
+    TELEGRAM_MAX_TEXT,
+    close_clients,
+    get_async_client,
+    group_messages,
+    run_async,
+    send_many,
+    send_many_async,
+)
+
+
+def test_group_messages_dedupes_and_merges_per_recipient():
+    """Одинаковые пары отбрасываются, сообщения одному адресату склеиваются."""
+    grouped = group_messages([(1, "a"), (2, "b"), (1, "a"), (1, "c"), (3, "")])
+    assert grouped == [(1, "a\n\nc"), (2, "b")]
+
+
+def test_group_messages_respects_telegram_limit():
+    """Склейка не превышает лимит длины сообщения Telegram."""
+    long_text = "x" * (TELEGRAM_MAX_TEXT - 10)
+    grouped = group_messages([(1, long_text), (1, "second message")])
+    assert grouped == [(1, long_text), (1, "second message")]
+
+
+def test_send_many_runs_requests_concurrently():
+    """Пачка уходит параллельно: 20 запросов по 50 мс при concurrency=10 — около 100 мс."""
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    payloads: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+            payloads.append(json.loads(request.content))
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return httpx.Response(200, json={"ok": True})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    messages = [(i, f"msg {i}") for i in range(20)] + [(0, "msg 0")]
+
+    started = time.perf_counter()
+    result = send_many("token", messages, concurrency=10, client=client, mode="threads")
+    elapsed = time.perf_counter() - started
+
+    assert result == {"sent": 20, "failed": 0}
+    assert len(payloads) == 20
+    assert 1 < peak <= 10
+    assert elapsed < 0.5
+
+
+async def test_send_many_async_keeps_many_requests_in_flight():
+    """Async-режим: 50 запросов по 50 мс при concurrency=25 в одном потоке — около 100 мс."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return httpx.Response(200, json={"ok": True})
+
+    messages = [(i, f"msg {i}") for i in range(50)]
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        started = time.perf_counter()
+        result = await send_many_async("token", messages, concurrency=25, client=client)
+        elapsed = time.perf_counter() - started
+
+    assert result == {"sent": 50, "failed": 0}
+    assert peak == 25
+    assert elapsed < 0.5
+
+
+def test_send_many_async_mode_uses_given_client():
+    """В режиме async переданный AsyncClient используется, а не общий клиент процесса."""
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = send_many("token", [(1, "a"), (2, "b")], client=client, mode="async")
+    assert result == {"sent": 2, "failed": 0}
+    assert len(requests) == 2
+
+
+def test_send_many_rejects_client_of_other_mode():
+    with pytest.raises(TypeError):
+        send_many("token", [(1, "a")], client=httpx.Client(), mode="async")
+    with pytest.raises(TypeError):
+        send_many("token", [(1, "a")], client=httpx.AsyncClient(), mode="threads")
+
+
+def test_run_async_reuses_thread_loop():
+    """Event loop процесса переиспользуется между вызовами (одна задача — один run_async)."""
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert run_async(current_loop()) is run_async(current_loop())
+
+
+def test_threads_share_process_loop_and_client_until_closed():
+    """--pool threads: все потоки делят один loop и AsyncClient; close_clients закрывает их."""
+
+    async def loop_and_client():
+        return asyncio.get_running_loop(), get_async_client()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: run_async(loop_and_client()), range(8)))
+    assert len({id(loop) for loop, _ in results}) == 1
+    assert len({id(client) for _, client in results}) == 1
+    loop, client = results[0]
+
+    # Завершение процесса может прийти из любого потока
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(close_clients).result()
+    assert client.is_closed
+    assert loop.is_closed()
+    assert telegram._async is None
+
+
+def test_send_notifications_batch_task(monkeypatch):
+    """Задача принимает JSON-пары [telegram_id, text] и передаёт их в пакетную отправку."""
+    delivered: list[tuple[int, str]] = []
+    monkeypatch.setattr(tasks, "_deliver", lambda messages: delivered.extend(messages) or 2)
+
+    result = tasks.send_notifications_batch([[1, "a"], ["2", "b"]])
+
+    assert delivered == [(1, "a"), (2, "b")]
+    assert result == {"received": 2, "sent": 2}
@@ -0,0 +1,124 @@
+"""
+@file: test_notifications.py
+@description: Уведомления воркера: загрузка заказа одним запросом, адресаты сообщений,
+    повтор задачи, если Telegram не принял ни одного сообщения.
+@dependencies: pytest, sqlalchemy, tests.conftest, services.worker.tasks
+@created: 2026-10-19
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db.database import engine
+from db.models import Order, OrderStatus
+from services.worker import tasks
+from services.worker.tasks import OrderNotice, load_order_notice
+from services.worker.telegram import TelegramSendError
+
+
+@pytest.fixture
+def query_counter():
+    """Счётчик SQL-запросов, выполненных через engine, пока фикстура активна."""
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def test_load_order_notice_is_single_query(
+    db: Session, tenant_a, channel_a, slot_a, query_counter: list[str]
+):
+    """Заказ, username канала и telegram_id владельца загружаются одним запросом."""
+    order = Order(
+        advertiser_id=777,
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        content={"text": "notice"},
+    )
+    db.add(order)
+    db.flush()
+    query_counter.clear()
+
+    notice = load_order_notice(db, order.id)
+
+    assert len(query_counter) == 1
+    assert notice == OrderNotice(
+        id=order.id,
+        status=OrderStatus.DRAFT,
+        advertiser_id=777,
+        channel_username=channel_a.username,
+        owner_telegram_id=tenant_a.telegram_id,
+    )
+
+
+def _notice() -> OrderNotice:
+    return OrderNotice(
+        id=uuid4(),
+        status=OrderStatus.DRAFT,
+        advertiser_id=111,
+        channel_username="chan",
+        owner_telegram_id=222,
+    )
+
+
+@pytest.mark.parametrize(
+    "task",
+    [tasks.notify_new_order, tasks.notify_order_cancelled, tasks.notify_payment_received],
+)
+def test_notifications_go_to_owner_and_advertiser(monkeypatch, task):
+    """Каждое уведомление получают владелец канала и рекламодатель."""
+    notice = _notice()
+    sent: list[tuple[int, str]] = []
+    monkeypatch.setattr(tasks, "_fetch_order_notice", lambda order_id: notice)
+    monkeypatch.setattr(tasks, "_deliver", lambda messages: sent.extend(messages) or len(messages))
+
+    task(str(notice.id))
+
+    assert sorted(tid for tid, _ in sent) == [111, 222]
+    assert all(str(notice.id)[:8] in text for _, text in sent)
+
+
+@pytest.mark.parametrize(
+    ("result", "raises"),
+    [({"sent": 0, "failed": 2}, True), ({"sent": 1, "failed": 1}, False)],
+)
+def test_deliver_raises_only_when_nothing_delivered(monkeypatch, result, raises):
+    """Полный отказ — ошибка для повтора; частичный — без повтора (иначе дубли)."""
+    monkeypatch.setenv("BOT_TOKEN", "token")
+    monkeypatch.setattr(tasks, "send_many", lambda bot_token, messages: result)
+    if raises:
+        with pytest.raises(TelegramSendError):
+            tasks._deliver([(1, "a"), (2, "b")])
+    else:
+        assert tasks._deliver([(1, "a"), (2, "b")]) == 1
+
+
+@pytest.mark.parametrize(
+    "task",
+    [tasks.notify_new_order, tasks.notify_order_cancelled, tasks.notify_payment_received],
+)
+def test_notification_retried_when_telegram_unavailable(monkeypatch, task):
+    """Сетевой сбой Telegram по всем адресатам — задача повторяется (max_retries=2)."""
+    notice = _notice()
+    attempts: list[int] = []
+    monkeypatch.setenv("BOT_TOKEN", "token")
+    monkeypatch.setattr(tasks, "_fetch_order_notice", lambda order_id: notice)
+    monkeypatch.setattr(
+        tasks,
+        "send_many",
+        lambda bot_token, messages: attempts.append(1) or {"sent": 0, "failed": 2},
+    )
+
+    result = task.apply(args=(str(notice.id),))
+
+    assert isinstance(result.result, TelegramSendError)
+    assert len(attempts) == 3
@@ -0,0 +1,145 @@
+"""
+@file: test_order_events.py
+@description: SSE смен статуса заказов: формат и разбор id, возобновление по Last-Event-ID,
+    дедупликация хвоста и живых записей, отключение отставшего подписчика.
+@dependencies: pytest, tests.conftest, services.api.order_stream
+@created: 2026-10-19
+"""
+
+import asyncio
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from db.events import order_stream_key
+from services.api.order_stream import (
+    OrderStreamHub,
+    format_sse,
+    order_event_stream,
+    parse_stream_id,
+)
+
+
+class FakeStreamRedis:
+    """Минимальный Redis Streams в памяти: xadd, xrange, xrevrange, блокирующий xread."""
+
+    def __init__(self) -> None:
+        self.streams: dict[str, list[tuple[str, dict]]] = {}
+        self.seq = 0
+        self.changed = asyncio.Event()
+
+    def xadd(self, key: str, fields: dict) -> str:
+        self.seq += 1
+        entry_id = f"1000-{self.seq}"
+        self.streams.setdefault(key, []).append((entry_id, fields))
+        self.changed.set()
+        return entry_id
+
+    def _after(self, key: str, cursor: str) -> list:
+        bound = parse_stream_id(cursor)
+        return [e for e in self.streams.get(key, []) if parse_stream_id(e[0]) > bound]
+
+    async def xrange(self, key, min="-", count=None):
+        entries = self.streams.get(key, [])
+        if min != "-":
+            entries = self._after(key, min.lstrip("("))
+        return entries[:count] if count else entries
+
+    async def xrevrange(self, key, count=None):
+        return list(reversed(self.streams.get(key, [])))[:count]
+
+    async def xread(self, streams: dict, count=None, block=None):
+        for _ in range(2):
+            found = [[k, self._after(k, c)[:count]] for k, c in streams.items()]
+            found = [item for item in found if item[1]]
+            if found:
+                return found
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), (block or 0) / 1000)
+            except TimeoutError:
+                return []
+        return []
+
+    async def aclose(self) -> None:
+        pass
+
+
+def test_parse_stream_id_and_format():
+    assert parse_stream_id("1700000000000-3") == (1700000000000, 3)
+    assert parse_stream_id("garbage") is None
+    assert parse_stream_id(None) is None
+    frame = format_sse(("1-2", {"order_id": "o", "status": "paid"}))
+    assert frame == 'id: 1-2\nevent: order.status\ndata: {"order_id": "o", "status": "paid"}\n\n'
+
+
+async def _collect(stream, count: int) -> list[str]:
+    frames = []
+    async for frame in stream:
+        if frame.startswith("id:") or frame.startswith("event: reset"):
+            frames.append(frame)
+        if len(frames) == count:
+            break
+    return frames
+
+
+async def test_resume_from_last_event_id_then_live():
+    """Подписчик с Last-Event-ID получает пропущенное из потока, затем новые записи без дублей."""
+    redis = FakeStreamRedis()
+    tenant = str(uuid4())
+    key = order_stream_key(tenant)
+    ids = [redis.xadd(key, {"order_id": str(i), "status": "paid"}) for i in range(5)]
+    hub = OrderStreamHub(redis, block_ms=50, queue_size=100)
+
+    stream = order_event_stream(hub, tenant, last_event_id=ids[1])
+    task = asyncio.create_task(_collect(stream, 5))
+    await asyncio.sleep(0.1)
+    redis.xadd(key, {"order_id": "5", "status": "published"})
+    redis.xadd(key, {"order_id": "6", "status": "published"})
+    frames = await asyncio.wait_for(task, 2)
+    await stream.aclose()
+    await hub.close()
+
+    received = [f.split("\n")[0].removeprefix("id: ") for f in frames]
+    assert received == [ids[2], ids[3], ids[4], "1000-6", "1000-7"]
+
+
+async def test_trimmed_history_emits_reset():
+    redis = FakeStreamRedis()
+    tenant = str(uuid4())
+    key = order_stream_key(tenant)
+    redis.seq = 10
+    redis.xadd(key, {"order_id": "x", "status": "paid"})
+    hub = OrderStreamHub(redis, block_ms=50, queue_size=100)
+
+    stream = order_event_stream(hub, tenant, last_event_id="1000-2")
+    frames = await asyncio.wait_for(_collect(stream, 2), 2)
+    await stream.aclose()
+    await hub.close()
+    assert frames[0].startswith("event: reset")
+    assert frames[1].startswith("id: 1000-11")
+
+
+async def test_one_reader_fans_out_and_drops_lagging_follower():
+    redis = FakeStreamRedis()
+    tenant = str(uuid4())
+    hub = OrderStreamHub(redis, block_ms=50, queue_size=3)
+    fast, slow = await hub.follow(tenant), await hub.follow(tenant)
+
+    redis.xadd(order_stream_key(tenant), {"order_id": "1", "status": "paid"})
+    await asyncio.sleep(0.1)
+    assert (await fast.get())[0] == "1000-1"
+    for i in range(5):
+        redis.xadd(order_stream_key(tenant), {"order_id": str(i), "status": "paid"})
+        await asyncio.sleep(0.02)
+        while not fast.empty():
+            fast.get_nowait()
+    await hub.close()
+    assert slow.qsize() <= 4
+    assert slow not in hub._followers.get(tenant, set())
+    assert fast in hub._followers[tenant]
+
+
+def test_order_events_requires_auth(client: TestClient):
+    r = client.get("/api/orders/events")
+    assert r.status_code == 401
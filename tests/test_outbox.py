@@ -0,0 +1,75 @@
+"""
+@file: test_outbox.py
+@description: Transactional outbox: запись задачи в транзакции API, порядок отправки и откат
+    relay (без БД; пропускная способность — benchmarks/test_outbox_relay.py).
+@dependencies: pytest, services.api.outbox, services.worker.outbox_relay
+@created: 2026-10-19
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from db.models import OutboxMessage
+from services.api import outbox
+from services.worker.outbox_relay import relay_batch
+
+
+def test_enqueue_task_adds_outbox_row_to_session(monkeypatch):
+    """Задача попадает в текущую сессию (commit вместе с данными), а не в брокер."""
+    monkeypatch.setattr(outbox.settings, "celery_broker_url", "redis://broker")
+    db = MagicMock()
+
+    outbox.enqueue_task(db, "notify_new_order", order_id="42", request_id=None)
+
+    message = db.add.call_args.args[0]
+    assert isinstance(message, OutboxMessage)
+    assert message.task_name == "services.worker.tasks.notify_new_order"
+    assert message.kwargs == {"order_id": "42", "request_id": None}
+
+
+def test_enqueue_task_skipped_when_worker_disabled(monkeypatch):
+    monkeypatch.setattr(outbox.settings, "celery_broker_url", "")
+    db = MagicMock()
+    outbox.enqueue_task(db, "notify_new_order", order_id="42")
+    db.add.assert_not_called()
+
+
+def test_relay_batch_rolls_back_when_broker_fails():
+    """Сбой брокера — откат: строки outbox не удаляются и уйдут в следующей пачке."""
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [
+        SimpleNamespace(id=1, task_name="t", kwargs={}),
+    ]
+
+    def send(name, kwargs):
+        raise ConnectionError("redis down")
+
+    with pytest.raises(ConnectionError):
+        relay_batch(db, send)
+    db.rollback.assert_called_once()
+    db.commit.assert_not_called()
+
+
+def test_relay_batch_sends_in_id_order_and_commits():
+    """DELETE … RETURNING не гарантирует порядок: отправка — по id, затем commit."""
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [
+        SimpleNamespace(id=n, task_name="t", kwargs={"n": n}) for n in (3, 1, 2)
+    ]
+    sent: list[int] = []
+
+    assert relay_batch(db, lambda name, kwargs: sent.append(kwargs["n"])) == 3
+    assert sent == [1, 2, 3]
+    db.commit.assert_called_once()
+
+
+def test_relay_batch_task_names_filter():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = []
+    relay_batch(db, lambda name, kwargs: None, task_names=["bench.task"])
+    stmt = db.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "outbox.task_name IN" in sql
@@ -0,0 +1,80 @@
+"""
+@file: test_profiler.py
+@description: Сэмплирующий профилировщик: стеки потоков в collapsed-формате, один профиль на
+    процесс, эндпоинт /api/admin/profile только для админов и только при PROFILING_ENABLED.
+@dependencies: pytest, services.api.profiler, tests.conftest
+@created: 2026-10-19
+"""
+
+import threading
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.api import profiler
+from services.api.auth import create_access_token
+from services.api.config import settings
+from services.api.profiler import ProfilerBusy, render_collapsed, sample_stacks
+
+ADMIN_ID = 777001
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_stacks_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks, snapshots = sample_stacks(0.2, 0.005)
+    finally:
+        stop.set()
+        worker.join()
+    assert snapshots > 5
+    busy = [stack for stack in stacks if stack.startswith("thread:busy;")]
+    assert any("_busy_loop (" in stack for stack in busy)
+    assert not any("sample_stacks" in stack for stack in stacks)
+
+
+def test_render_collapsed_format():
+    text = render_collapsed(Counter({"thread:a;f (x.py:1)": 3, "thread:a;g (x.py:5)": 7}))
+    assert text.splitlines() == ["thread:a;g (x.py:5) 7", "thread:a;f (x.py:1) 3"]
+
+
+def test_one_profile_per_process():
+    with profiler._lock, pytest.raises(ProfilerBusy):
+        sample_stacks(0.01, 0.005)
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    monkeypatch.setattr(settings, "admin_telegram_ids", str(ADMIN_ID))
+    return {"Authorization": f"Bearer {create_access_token(ADMIN_ID)}"}
+
+
+def test_profile_endpoint_disabled_by_default(client: TestClient, admin_headers):
+    r = client.post("/api/admin/profile", params={"seconds": 0.05}, headers=admin_headers)
+    assert r.status_code == 404
+
+
+def test_profile_endpoint_requires_admin(client: TestClient, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    headers = {"Authorization": f"Bearer {create_access_token(ADMIN_ID + 1)}"}
+    r = client.post("/api/admin/profile", params={"seconds": 0.05}, headers=headers)
+    assert r.status_code == 403
+
+
+def test_profile_endpoint_returns_collapsed_stacks(client: TestClient, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    r = client.post(
+        "/api/admin/profile", params={"seconds": 0.1, "interval_ms": 5}, headers=admin_headers
+    )
+    assert r.status_code == 200, r.text
+    assert int(r.headers["X-Profile-Samples"]) > 0
+    lines = r.text.splitlines()
+    assert lines and all(line.startswith("thread:") for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
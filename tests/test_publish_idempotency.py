@@ -0,0 +1,240 @@
+"""
+@file: test_publish_idempotency.py
+@description: publish_order at-most-once: сбои на каждом шаге не приводят к повторному посту;
+    запись идемпотентности (claim/release/record_published) на реальной БД.
+@dependencies: pytest, services.worker.tasks, services.worker.publishing, tests.conftest
+@created: 2026-10-19
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from db.models import Order, OrderStatus, PublishState, View
+from services.worker import tasks
+from services.worker.publishing import (
+    PublishClaim,
+    backoff_with_jitter,
+    claim_publication,
+    record_published,
+    record_skipped,
+    release_publication,
+)
+from services.worker.telegram import TelegramDeliveryUnknown, TelegramSendError
+
+
+class FakePublication:
+    """Запись идемпотентности в памяти + Telegram с инъекцией сбоев по шагам."""
+
+    def __init__(self, monkeypatch):
+        self.order_id = str(uuid4())
+        self.state: PublishState | None = None
+        self.message_id: int | None = None
+        self.delivered = 0  # сколько постов реально появилось в канале
+        self.views = 0
+        self.fail: dict[str, list[Exception]] = {}
+        monkeypatch.setenv("BOT_TOKEN", "token")
+        monkeypatch.setattr(tasks, "claim_publication", self.claim)
+        monkeypatch.setattr(tasks, "release_publication", self.release)
+        monkeypatch.setattr(tasks, "record_published", self.record)
+        monkeypatch.setattr(tasks, "record_skipped", self.skip)
+        monkeypatch.setattr(tasks, "post_message", self.post)
+        monkeypatch.setattr(tasks, "backoff_with_jitter", lambda retries: 0)
+
+    def _maybe_fail(self, step: str) -> None:
+        if self.fail.get(step):
+            raise self.fail[step].pop(0)
+
+    def claim(self, order_id):
+        self._maybe_fail("claim")
+        if self.message_id is not None or self.state in (
+            PublishState.SENDING,
+            PublishState.UNKNOWN,
+        ):
+            return None
+        self.state = PublishState.SENDING
+        return PublishClaim(order_id=self.order_id, chat_id="@chan", text="ad")
+
+    def post(self, bot_token, chat_id, text):
+        step_error = self.fail.get("post_after_delivery")
+        if step_error:
+            self.delivered += 1
+            raise step_error.pop(0)
+        self._maybe_fail("post")
+        self.delivered += 1
+        return 1000 + self.delivered
+
+    def release(self, order_id, state):
+        self._maybe_fail("release")
+        self.state = state
+
+    def record(self, order_id, message_id):
+        self._maybe_fail("record")
+        if self.message_id is None:
+            self.message_id = message_id
+            self.state = PublishState.SENT
+
+    def skip(self, order_id):
+        self.state = PublishState.SKIPPED
+        self.views += 1
+
+    def run(self):
+        return tasks.publish_order.apply(args=(self.order_id,))
+
+
+@pytest.fixture
+def pub(monkeypatch):
+    return FakePublication(monkeypatch)
+
+
+def test_publish_happy_path_posts_once(pub: FakePublication):
+    pub.run()
+    pub.run()  # повторный вызов (дубликат задачи) не публикует снова
+    assert pub.delivered == 1
+    assert pub.message_id == 1001
+    assert pub.state == PublishState.SENT
+
+
+def test_claim_failure_is_retried_without_post(pub: FakePublication):
+    """БД недоступна при захвате — пост не отправлен, повтор публикует ровно один раз."""
+    pub.fail["claim"] = [RuntimeError("db down")]
+    pub.run()
+    assert pub.delivered == 1
+    assert pub.state == PublishState.SENT
+
+
+def test_definite_telegram_error_is_retried(pub: FakePublication):
+    """Telegram точно не принял пост — повтор безопасен, в канале один пост."""
+    pub.fail["post"] = [TelegramSendError("502")]
+    pub.run()
+    assert pub.delivered == 1
+    assert pub.state == PublishState.SENT
+
+
+def test_record_failure_after_delivery_does_not_repost(pub: FakePublication):
+    """Telegram принял пост, commit упал — повтор только дописывает message_id."""
+    pub.fail["record"] = [RuntimeError("commit failed"), RuntimeError("commit failed")]
+    pub.run()
+    assert pub.delivered == 1
+    assert pub.message_id == 1001
+    assert pub.state == PublishState.SENT
+
+
+def test_unknown_delivery_is_not_retried(pub: FakePublication):
+    """Таймаут ответа: пост мог выйти — повтор запрещён, попытка помечена UNKNOWN."""
+    pub.fail["post_after_delivery"] = [TelegramDeliveryUnknown("read timeout")]
+    pub.run()
+    pub.run()
+    assert pub.delivered == 1
+    assert pub.state == PublishState.UNKNOWN
+    assert pub.message_id is None
+
+
+def test_release_failure_keeps_attempt_locked(pub: FakePublication):
+    """Ошибка Telegram и сбой записи исхода: попытка остаётся SENDING, повторной отправки нет."""
+    pub.fail["post"] = [TelegramSendError("502")]
+    pub.fail["release"] = [RuntimeError("db down")]
+    pub.run()
+    assert pub.delivered == 0
+    assert pub.state == PublishState.SENDING
+
+
+def test_without_bot_token_records_view_and_skipped_state(pub: FakePublication, monkeypatch):
+    """Без BOT_TOKEN пост не отправляется, но попытка фиксируется и просмотр записывается."""
+    monkeypatch.delenv("BOT_TOKEN")
+    pub.run()
+    assert pub.delivered == 0
+    assert pub.views == 1
+    assert pub.state == PublishState.SKIPPED
+    # Токен появился — заказ можно опубликовать
+    monkeypatch.setenv("BOT_TOKEN", "token")
+    pub.run()
+    assert pub.delivered == 1
+    assert pub.state == PublishState.SENT
+
+
+def test_backoff_with_jitter_is_bounded():
+    for retries in range(8):
+        delay = backoff_with_jitter(retries, base=5, cap=300)
+        assert 0 <= delay <= min(300, 5 * 2**retries)
+
+
+@pytest.fixture
+def scheduled_order(db: Session, channel_a, slot_a):
+    """Заказ в SCHEDULED, закоммиченный: функции публикации работают в своих сессиях."""
+    order = Order(
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        advertiser_id=777001,
+        content={"text": "Реклама", "link": "https://example.com"},
+        erid="ERID-1",
+        status=OrderStatus.SCHEDULED,
+    )
+    db.add(order)
+    db.commit()
+    yield order
+    db.rollback()
+    db.query(Order).filter(Order.id == order.id).delete()
+    db.commit()
+
+
+def _reload(db: Session, order: Order) -> Order:
+    db.expire_all()
+    return db.get(Order, order.id)
+
+
+def test_claim_publication_locks_attempt(db: Session, scheduled_order: Order, channel_a):
+    claim = claim_publication(str(scheduled_order.id))
+    assert claim is not None
+    assert claim.chat_id == "@" + channel_a.username.lstrip("@")
+    assert claim.text == "Реклама\n\n🛍 ERID: ERID-1\n\nhttps://example.com"
+    order = _reload(db, scheduled_order)
+    assert (order.publish_state, order.publish_attempts) == (PublishState.SENDING, 1)
+    # Незавершённая попытка (SENDING) — повторный захват запрещён
+    assert claim_publication(str(scheduled_order.id)) is None
+
+
+def test_release_failed_allows_new_claim(db: Session, scheduled_order: Order):
+    assert claim_publication(str(scheduled_order.id)) is not None
+    release_publication(str(scheduled_order.id), PublishState.FAILED)
+    assert claim_publication(str(scheduled_order.id)) is not None
+    assert _reload(db, scheduled_order).publish_attempts == 2
+
+
+def test_release_unknown_blocks_claim(db: Session, scheduled_order: Order):
+    assert claim_publication(str(scheduled_order.id)) is not None
+    release_publication(str(scheduled_order.id), PublishState.UNKNOWN)
+    assert claim_publication(str(scheduled_order.id)) is None
+    assert _reload(db, scheduled_order).publish_state == PublishState.UNKNOWN
+
+
+def test_record_published_is_idempotent(db: Session, scheduled_order: Order):
+    assert claim_publication(str(scheduled_order.id)) is not None
+    record_published(str(scheduled_order.id), 555)
+    record_published(str(scheduled_order.id), 556)  # повтор задачи с другим id не перетирает
+
+    order = _reload(db, scheduled_order)
+    assert order.telegram_message_id == 555
+    assert order.publish_state == PublishState.SENT
+    assert order.status == OrderStatus.PUBLISHED
+    assert db.query(View).filter(View.order_id == scheduled_order.id).count() == 1
+    assert claim_publication(str(scheduled_order.id)) is None
+
+
+def test_claim_skips_cancelled_order(db: Session, scheduled_order: Order):
+    order = _reload(db, scheduled_order)
+    order.status = OrderStatus.CANCELLED
+    db.commit()
+    assert claim_publication(str(scheduled_order.id)) is None
+    assert _reload(db, scheduled_order).publish_state is None
+
+
+def test_record_skipped_allows_later_claim(db: Session, scheduled_order: Order):
+    assert claim_publication(str(scheduled_order.id)) is not None
+    record_skipped(str(scheduled_order.id))
+    order = _reload(db, scheduled_order)
+    assert order.publish_state == PublishState.SKIPPED
+    assert order.status == OrderStatus.SCHEDULED
+    assert db.query(View).filter(View.order_id == scheduled_order.id).count() == 1
+    assert claim_publication(str(scheduled_order.id)) is not None
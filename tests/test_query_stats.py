@@ -0,0 +1,131 @@
+"""
+@file: test_query_stats.py
+@description: SQL-инструментирование: счётчики запроса, лог медленных запросов, нормализация,
+    Server-Timing; бюджеты запросов списочных эндпоинтов (нужна БД).
+@dependencies: pytest, sqlalchemy, services.api.query_stats, tests.conftest
+@created: 2026-10-19
+"""
+
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from services.api.logging_config import configure_json_logging, flush_logs
+from services.api.query_stats import (
+    capture_queries,
+    instrument_queries,
+    normalize_sql,
+    query_stats_ctx,
+    start_query_stats,
+)
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    yield
+    query_stats_ctx.set(None)
+
+
+def test_normalize_sql_strips_values():
+    sql = """
+        SELECT * FROM orders
+        WHERE status = 'draft' AND price > 10.5 AND id IN (%(id_1)s, %(id_2)s, %(id_3)s)
+          AND created_at::date = :day LIMIT 20
+    """
+    assert normalize_sql(sql) == (
+        "SELECT * FROM orders WHERE status = ? AND price > ? AND id IN (...) "
+        "AND created_at::date = ? LIMIT ?"
+    )
+
+
+def test_stats_count_queries_of_current_request(sqlite_engine):
+    instrument_queries(sqlite_engine, slow_query_ms=0)
+    with sqlite_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # вне запроса — не учитывается
+        stats = start_query_stats()
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.seconds > 0
+    assert stats.slow == 0
+
+
+def test_slow_queries_logged_normalized(sqlite_engine):
+    buf = io.BytesIO()
+    configure_json_logging(mode="sync", stream=buf)
+    try:
+        # Порог 0.0001 мс: медленным считается любой запрос
+        instrument_queries(sqlite_engine, slow_query_ms=0.0001)
+        stats = start_query_stats()
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 'secret' AS x WHERE 1 = :n"), {"n": 1})
+        flush_logs()
+    finally:
+        configure_json_logging()
+    events = [json.loads(line) for line in buf.getvalue().splitlines()]
+    slow = [e for e in events if e["event"] == "slow query"]
+    assert stats.slow == 1
+    assert slow[0]["statement"] == "SELECT ? AS x WHERE ? = ?"
+    assert slow[0]["level"] == "warning"
+
+
+def test_failed_query_does_not_break_timing_stack(sqlite_engine):
+    instrument_queries(sqlite_engine, slow_query_ms=0)
+    stats = start_query_stats()
+    with sqlite_engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
+    assert stats.count == 1
+
+
+def test_capture_queries_lists_statements(sqlite_engine):
+    with sqlite_engine.connect() as conn:
+        with capture_queries(sqlite_engine) as queries:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        conn.execute(text("SELECT 3"))
+    assert queries == ["SELECT 1", "SELECT 2"]
+
+
+def test_server_timing_header(client: TestClient):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith('db;dur=0.0;desc="0 queries", app;dur=')
+
+
+# Бюджеты: set_config(app.tenant_id) + один SELECT; рост — признак N+1 или лишней загрузки
+
+
+def test_list_channels_query_budget(client: TestClient, token_a: str, channel_a, query_budget):
+    with query_budget(2):
+        r = client.get("/api/channels", headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200, r.text
+
+
+def test_list_slots_query_budget(client: TestClient, token_a: str, slot_a, query_budget):
+    with query_budget(2):
+        r = client.get(
+            "/api/slots",
+            params={"channel_id": str(slot_a.channel_id)},
+            headers={"Authorization": f"Bearer {token_a}"},
+        )
+    assert r.status_code == 200, r.text
+
+
+def test_list_orders_query_budget(client: TestClient, token_a: str, query_budget):
+    with query_budget(2):
+        r = client.get("/api/orders", headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 200, r.text
@@ -0,0 +1,136 @@
+"""
+@file: test_realtime.py
+@description: Real-time дашборд: авторизация WebSocket, публикация событий после commit,
+    склейка всплесков и раздача одного кадра всем сокетам тенанта.
+@dependencies: pytest, tests.conftest, services.api.realtime, db.events
+@created: 2026-10-19
+"""
+
+import asyncio
+import json
+import threading
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from db import events
+from services.api.auth import create_access_token
+from services.api.realtime import DashboardHub, authorize_dashboard
+
+
+class FakeWebSocket:
+    def __init__(self, fail: bool = False) -> None:
+        self.frames: list[dict] = []
+        self.fail = fail
+        self.closed = False
+
+    async def send_text(self, frame: str) -> None:
+        if self.fail:
+            raise ConnectionError("client gone")
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+def test_authorize_dashboard_requires_token_of_same_tenant():
+    tenant_id = uuid4()
+    token = create_access_token(1, tenant_id=tenant_id)
+    authorize_dashboard(token, str(tenant_id))
+    with pytest.raises(HTTPException) as exc:
+        authorize_dashboard(token, str(uuid4()))
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException):
+        authorize_dashboard(None, str(tenant_id))
+    with pytest.raises(HTTPException):
+        authorize_dashboard("not-a-jwt", str(tenant_id))
+
+
+def test_websocket_without_token_is_rejected(client: TestClient):
+    with (
+        pytest.raises(WebSocketDisconnect) as exc,
+        client.websocket_connect(f"/ws/dashboard/{uuid4()}"),
+    ):
+        pass
+    assert exc.value.code == 1008
+
+
+def test_events_published_only_after_commit(monkeypatch):
+    published: list = []
+    monkeypatch.setattr(events, "enqueue_events", published.extend)
+    tenant_id = uuid4()
+
+    session = Session()
+    session.begin()
+    events.record_event(session, tenant_id, "order", id="1", status="draft")
+    session.rollback()
+    assert published == []
+
+    session.begin()
+    events.record_event(session, tenant_id, "order", id="1", status="paid")
+    session.commit()
+    assert published == [(str(tenant_id), {"type": "order", "id": "1", "status": "paid"})]
+
+
+def test_events_published_in_background_thread(monkeypatch):
+    """Commit только ставит события в очередь; Redis-pipeline — в потоке events-publisher."""
+    threads: list[str] = []
+    published: list = []
+
+    def publish(batch):
+        threads.append(threading.current_thread().name)
+        published.extend(batch)
+
+    monkeypatch.setattr(events, "REALTIME_ENABLED", True)
+    monkeypatch.setattr(events, "publish_events", publish)
+    tenant_id = str(uuid4())
+    events.enqueue_events([(tenant_id, {"type": "view", "id": "1"})])
+    events.enqueue_events([(tenant_id, {"type": "view", "id": "2"})])
+    events.flush()
+    assert [payload["id"] for _, payload in published] == ["1", "2"]
+    assert set(threads) == {"events-publisher"}
+
+
+def test_hub_coalesces_burst_into_one_frame_per_socket():
+    """Всплеск из 100 событий по 3 заказам -> один кадр с последним состоянием каждого."""
+
+    async def scenario():
+        hub = DashboardHub("redis://unused", coalesce_seconds=0.05, send_timeout=1.0)
+        tenant, other = str(uuid4()), str(uuid4())
+        sockets = [FakeWebSocket() for _ in range(3)]
+        foreign = FakeWebSocket()
+        for ws in sockets:
+            hub._sockets.setdefault(tenant, set()).add(ws)
+        hub._sockets[other] = {foreign}
+
+        for i in range(100):
+            hub.enqueue(tenant, {"type": "order", "id": str(i % 3), "status": f"s{i}"})
+        await asyncio.sleep(0.15)
+        return sockets, foreign
+
+    sockets, foreign = asyncio.run(scenario())
+    for ws in sockets:
+        assert len(ws.frames) == 1
+        statuses = {e["id"]: e["status"] for e in ws.frames[0]["events"]}
+        assert statuses == {"0": "s99", "1": "s97", "2": "s98"}
+    assert foreign.frames == []
+
+
+def test_hub_drops_failing_socket_without_blocking_others():
+    async def scenario():
+        hub = DashboardHub("redis://unused", coalesce_seconds=0.01, send_timeout=1.0)
+        tenant = str(uuid4())
+        good, bad = FakeWebSocket(), FakeWebSocket(fail=True)
+        hub._sockets[tenant] = {good, bad}
+        hub.enqueue(tenant, {"type": "view", "id": "1"})
+        await asyncio.sleep(0.05)
+        return hub, good, bad
+
+    hub, good, bad = asyncio.run(scenario())
+    assert len(good.frames) == 1
+    assert bad.closed
+    assert hub.connection_count() == 1
@@ -0,0 +1,115 @@
+"""
+@file: test_revenue.py
+@description: Админская выручка: агрегация tenant_revenue_daily по периодам, доступ только для
+    админов, keyset-пагинация списка каналов (нужна БД с миграцией 008).
+@dependencies: pytest, services.api.revenue, tests.conftest
+@created: 2026-10-19
+"""
+
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from db.models import Order, OrderStatus, Payment
+from services.api.auth import create_access_token
+from services.api.config import settings
+from services.api.revenue import refresh_revenue_view, revenue_query
+
+ADMIN_ID = 777001
+
+
+@pytest.fixture
+def admin_headers(monkeypatch):
+    monkeypatch.setattr(settings, "admin_telegram_ids", str(ADMIN_ID))
+    return {"Authorization": f"Bearer {create_access_token(ADMIN_ID)}"}
+
+
+def test_revenue_query_period_is_literal_in_group_by():
+    sql = str(revenue_query("week").compile(dialect=postgresql.dialect()))
+    group_by = sql.split("GROUP BY", 1)[1]
+    assert "date_trunc('week', tenant_revenue_daily.day)" in group_by
+
+
+def _pay(db: Session, channel, slot, amount: str, status: str, at: datetime) -> None:
+    order = Order(
+        channel_id=channel.id,
+        slot_id=slot.id,
+        advertiser_id=ADMIN_ID,
+        content={"text": "revenue"},
+        status=OrderStatus.PAID,
+    )
+    db.add(order)
+    db.flush()
+    db.add(
+        Payment(
+            order_id=order.id,
+            provider="stripe",
+            invoice_id=f"pi_{uuid4().hex}",
+            amount=Decimal(amount),
+            status=status,
+            created_at=at,
+        )
+    )
+    db.flush()
+
+
+def test_revenue_by_tenant_and_period(db: Session, channel_a, slot_a, channel_b, slot_b):
+    # Неделя 2020-01-06 (пн): у A два дня, у B один; неуспешный платёж не считается
+    _pay(db, channel_a, slot_a, "100.00", "succeeded", datetime(2020, 1, 6, 10, tzinfo=UTC))
+    _pay(db, channel_a, slot_a, "50.00", "succeeded", datetime(2020, 1, 8, 23, tzinfo=UTC))
+    _pay(db, channel_a, slot_a, "999.00", "pending", datetime(2020, 1, 8, 12, tzinfo=UTC))
+    _pay(db, channel_b, slot_b, "10.00", "succeeded", datetime(2020, 1, 7, 9, tzinfo=UTC))
+    # Обновление — в транзакции теста: откатится вместе с данными
+    refresh_revenue_view(db)
+
+    window = {"date_from": date(2020, 1, 6), "date_to": date(2020, 1, 13)}
+    weekly = db.execute(revenue_query("week", **window, tenant_id=channel_a.tenant_id)).all()
+    assert len(weekly) == 1
+    assert weekly[0].period_start == date(2020, 1, 6)
+    assert weekly[0].payments_count == 2
+    assert weekly[0].gross == Decimal("150.00")
+    assert weekly[0].platform_revenue == Decimal("30.00")
+
+    daily = db.execute(revenue_query("day", **window)).all()
+    assert [(r.tenant_id, r.period_start) for r in daily] == [
+        (channel_a.tenant_id, date(2020, 1, 6)),
+        (channel_b.tenant_id, date(2020, 1, 7)),
+        (channel_a.tenant_id, date(2020, 1, 8)),
+    ]
+
+
+def test_revenue_requires_admin(client: TestClient, token_a: str, admin_headers):
+    r = client.get("/api/admin/revenue", headers={"Authorization": f"Bearer {token_a}"})
+    assert r.status_code == 403
+    r = client.get(
+        "/api/admin/revenue",
+        params={"period": "week", "date_from": "2020-01-06", "date_to": "2020-01-13"},
+        headers=admin_headers,
+    )
+    assert r.status_code == 200, r.text
+    assert r.json() == {"period": "week", "total_gross": 0, "total_revenue": 0, "by_tenant": []}
+
+
+def test_admin_channels_keyset_pages(
+    client: TestClient, admin_headers, channel_a, channel_b, query_budget
+):
+    with query_budget(2):
+        r = client.get("/api/admin/channels", params={"limit": 1}, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    seen = [row["id"] for row in r.json()]
+    cursor = r.headers.get("X-Next-Cursor")
+    while cursor:
+        r = client.get(
+            "/api/admin/channels", params={"limit": 1, "after": cursor}, headers=admin_headers
+        )
+        assert r.status_code == 200, r.text
+        seen += [row["id"] for row in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen))
+    assert {str(channel_a.id), str(channel_b.id)} <= set(seen)
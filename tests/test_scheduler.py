@@ -0,0 +1,67 @@
+"""
+@file: test_scheduler.py
+@description: Планировщик публикаций: минутные корзины, разнесение задач, захват созревших заказов.
+@dependencies: pytest, tests.conftest, services.worker.scheduler
+@created: 2026-10-19
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from db.models import Order, OrderStatus
+from services.worker.scheduler import claim_due_orders, due_bucket_end, spread_countdowns
+
+
+def test_due_bucket_end_is_next_minute_boundary():
+    """Корзина заканчивается на границе следующей минуты."""
+    now = datetime(2026, 1, 1, 12, 30, 45, 123, tzinfo=UTC)
+    assert due_bucket_end(now) == datetime(2026, 1, 1, 12, 31, tzinfo=UTC)
+
+
+def test_spread_countdowns_are_even_within_window():
+    """Тысячи публикаций одной минуты распределяются по окну, а не стартуют одновременно."""
+    countdowns = spread_countdowns(1000, window=50)
+    assert len(countdowns) == 1000
+    assert countdowns[0] == 0
+    assert max(countdowns) < 50
+    assert countdowns == sorted(countdowns)
+    assert spread_countdowns(0) == []
+
+
+def test_claim_due_orders_moves_only_due_orders_to_scheduled(db: Session, channel_a, slot_a):
+    """Созревший заказ переходит в SCHEDULED; будущий и отменённый не трогаются."""
+    now = datetime.now(UTC)
+    due = Order(
+        advertiser_id=1,
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        content={"text": "due"},
+        publish_at=now - timedelta(minutes=1),
+    )
+    future = Order(
+        advertiser_id=1,
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        content={"text": "future"},
+        publish_at=now + timedelta(hours=1),
+    )
+    cancelled = Order(
+        advertiser_id=1,
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        content={"text": "cancelled"},
+        status=OrderStatus.CANCELLED,
+        publish_at=now - timedelta(minutes=1),
+    )
+    db.add_all([due, future, cancelled])
+    db.flush()
+
+    claimed = claim_due_orders(db, now, limit=10000)
+
+    assert due.id in claimed
+    assert future.id not in claimed
+    assert cancelled.id not in claimed
+    db.expire_all()
+    assert db.get(Order, due.id).status == OrderStatus.SCHEDULED
+    assert db.get(Order, future.id).status == OrderStatus.DRAFT
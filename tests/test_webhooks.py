@@ -0,0 +1,275 @@
+"""
+@file: test_webhooks.py
+@description: Webhooks оплаты: подпись Stripe, IP-allowlist ЮKassa, разбор событий,
+    дедупликация по event_id и идемпотентная обработка в воркере.
+@dependencies: pytest, tests.conftest, services.api.webhook_auth, services.worker.payments
+@created: 2026-10-19
+"""
+
+import json
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from db.models import Order, OrderStatus, OutboxMessage, Payment, Slot, SlotStatus, WebhookEvent
+from services.api import webhook_auth
+from services.api.main import app
+from services.api.webhook_auth import (
+    sign_stripe_payload,
+    verify_stripe_signature,
+    verify_yookassa_ip,
+)
+from services.worker.payments import process_payment_event, transition_allowed
+from shared.schemas.payment import PaymentEvent
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture
+def stripe_secret(monkeypatch):
+    monkeypatch.setattr(webhook_auth.settings, "stripe_webhook_secret", SECRET)
+    return SECRET
+
+
+def _stripe_event(event_id: str, invoice_id: str, type_: str = "payment_intent.succeeded") -> bytes:
+    return json.dumps(
+        {"id": event_id, "type": type_, "data": {"object": {"id": invoice_id}}}
+    ).encode()
+
+
+def test_stripe_signature_valid(stripe_secret):
+    body = _stripe_event("evt_1", "pi_1")
+    verify_stripe_signature(body, sign_stripe_payload(body, stripe_secret))
+
+
+def test_stripe_signature_rejects_tampered_payload(stripe_secret):
+    header = sign_stripe_payload(_stripe_event("evt_1", "pi_1"), stripe_secret)
+    with pytest.raises(HTTPException) as exc:
+        verify_stripe_signature(_stripe_event("evt_1", "pi_2"), header)
+    assert exc.value.status_code == 401
+
+
+def test_stripe_signature_rejects_expired_event(stripe_secret):
+    body = _stripe_event("evt_1", "pi_1")
+    header = sign_stripe_payload(body, stripe_secret, timestamp=int(time.time()) - 3600)
+    with pytest.raises(HTTPException) as exc:
+        verify_stripe_signature(body, header)
+    assert exc.value.status_code == 400
+
+
+def test_stripe_signature_requires_secret(monkeypatch):
+    monkeypatch.setattr(webhook_auth.settings, "stripe_webhook_secret", "")
+    with pytest.raises(HTTPException) as exc:
+        verify_stripe_signature(b"{}", "t=1,v1=00")
+    assert exc.value.status_code == 503
+
+
+def test_yookassa_ip_allowlist(monkeypatch):
+    monkeypatch.setattr(webhook_auth.settings, "yookassa_allowed_ips", "185.71.76.0/27")
+    verify_yookassa_ip("185.71.76.5")
+    with pytest.raises(HTTPException) as exc:
+        verify_yookassa_ip("10.0.0.1")
+    assert exc.value.status_code == 403
+
+
+def _yookassa_behind_proxy(trusted: str) -> TestClient:
+    """Приложение за ingress 10.1.2.3, как его запускает gunicorn/uvicorn (FORWARDED_ALLOW_IPS)."""
+    return TestClient(ProxyHeadersMiddleware(app, trusted_hosts=trusted), client=("10.1.2.3", 443))
+
+
+@pytest.mark.parametrize(
+    "trusted, forwarded_for, status",
+    [
+        # Прокси доверенный: проверяется адрес ЮKassa из X-Forwarded-For
+        ("10.0.0.0/8", "185.71.76.5", 200),
+        ("10.0.0.0/8", "203.0.113.7", 403),
+        # Прокси не доверенный (по умолчанию 127.0.0.1): виден адрес прокси
+        ("127.0.0.1", "185.71.76.5", 403),
+    ],
+)
+def test_yookassa_ip_allowlist_behind_proxy(monkeypatch, trusted, forwarded_for, status):
+    monkeypatch.setattr(webhook_auth.settings, "yookassa_allowed_ips", "185.71.76.0/27")
+    # Событие без статуса подтверждается без обращения к БД
+    r = _yookassa_behind_proxy(trusted).post(
+        "/webhooks/yookassa",
+        json={"event": "payment.unknown", "object": {"id": "pay_1"}},
+        headers={"X-Forwarded-For": forwarded_for},
+    )
+    assert r.status_code == status, r.text
+
+
+def test_payment_event_parsing():
+    stripe = PaymentEvent.parse("stripe", json.loads(_stripe_event("evt_1", "pi_1")))
+    assert (stripe.event_id, stripe.invoice_id, stripe.status) == ("evt_1", "pi_1", "succeeded")
+
+    refund = PaymentEvent.parse(
+        "yookassa",
+        {"event": "refund.succeeded", "object": {"id": "rf_1", "payment_id": "pay_1"}},
+    )
+    assert (refund.event_id, refund.invoice_id, refund.status) == (
+        "refund.succeeded:rf_1",
+        "pay_1",
+        "refunded",
+    )
+    ignored = PaymentEvent.parse(
+        "stripe", json.loads(_stripe_event("evt_2", "x", "customer.created"))
+    )
+    assert ignored.status is None
+
+
+@pytest.mark.parametrize(
+    "current, new, allowed",
+    [
+        ("pending", "waiting_for_capture", True),
+        ("waiting_for_capture", "succeeded", True),
+        ("pending", "failed", True),
+        ("succeeded", "refunded", True),
+        ("succeeded", "canceled", False),
+        ("succeeded", "failed", False),
+        ("succeeded", "waiting_for_capture", False),
+        ("canceled", "succeeded", False),
+        ("refunded", "succeeded", False),
+        ("failed", "refunded", False),
+        ("succeeded", "succeeded", False),
+        ("pending", None, False),
+    ],
+)
+def test_payment_status_transitions(current, new, allowed):
+    """Из финального статуса — только возврат успешного платежа."""
+    assert transition_allowed(current, new) is allowed
+
+
+def test_stripe_webhook_rejects_bad_signature(client, stripe_secret):
+    r = client.post(
+        "/webhooks/stripe",
+        content=_stripe_event("evt_1", "pi_1"),
+        headers={"Stripe-Signature": "t=1,v1=deadbeef"},
+    )
+    assert r.status_code in (400, 401)
+
+
+def test_stripe_webhook_duplicate_stored_once(client, db: Session, stripe_secret):
+    """Повтор того же события от провайдера подтверждается 200, но сохраняется один раз."""
+    event_id = f"evt_{uuid4().hex}"
+    body = _stripe_event(event_id, f"pi_{uuid4().hex}")
+    for _ in range(3):
+        r = client.post(
+            "/webhooks/stripe",
+            content=body,
+            headers={"Stripe-Signature": sign_stripe_payload(body, stripe_secret)},
+        )
+        assert r.status_code == 200, r.text
+    stored = db.query(WebhookEvent).filter(WebhookEvent.event_id == event_id).all()
+    assert len(stored) == 1
+    db.delete(stored[0])
+    db.commit()
+
+
+def test_process_payment_event_is_idempotent(db: Session, channel_a, slot_a):
+    """Успешная оплата: Payment succeeded, Order DRAFT -> PAID, слот PAID; повтор — duplicate."""
+    order = Order(
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        advertiser_id=777001,
+        content={"text": "webhook"},
+        status=OrderStatus.DRAFT,
+    )
+    db.add(order)
+    db.flush()
+    invoice_id = f"pi_{uuid4().hex}"
+    db.add(
+        Payment(
+            order_id=order.id,
+            provider="stripe",
+            invoice_id=invoice_id,
+            amount=Decimal("100.00"),
+            status="pending",
+        )
+    )
+    event_id = f"evt_{uuid4().hex}"
+    db.add(
+        WebhookEvent(
+            provider="stripe",
+            event_id=event_id,
+            payload=json.loads(_stripe_event(event_id, invoice_id)),
+        )
+    )
+    db.flush()
+
+    assert process_payment_event(db, "stripe", event_id) == "processed"
+    db.flush()
+    assert process_payment_event(db, "stripe", event_id) == "duplicate"
+    db.flush()
+
+    db.refresh(order)
+    assert order.status == OrderStatus.PAID
+    assert db.get(Slot, slot_a.id).status == SlotStatus.PAID
+    payment = db.query(Payment).filter(Payment.invoice_id == invoice_id).one()
+    assert payment.status == "succeeded"
+    notices = (
+        db.query(OutboxMessage)
+        .filter(OutboxMessage.task_name == "services.worker.tasks.notify_payment_received")
+        .filter(OutboxMessage.kwargs["order_id"].astext == str(order.id))
+        .count()
+    )
+    assert notices == 1
+
+
+def test_unknown_payment_event_stays_unprocessed(db: Session):
+    """Вебхук раньше Payment: событие не помечается обработанным и применяется при повторе."""
+    event_id = f"evt_{uuid4().hex}"
+    db.add(
+        WebhookEvent(
+            provider="stripe",
+            event_id=event_id,
+            payload=json.loads(_stripe_event(event_id, f"pi_{uuid4().hex}")),
+        )
+    )
+    db.flush()
+
+    assert process_payment_event(db, "stripe", event_id) == "unknown_payment"
+    stored = db.query(WebhookEvent).filter(WebhookEvent.event_id == event_id).one()
+    assert stored.processed_at is None
+    assert process_payment_event(db, "stripe", event_id) == "unknown_payment"
+
+
+def test_late_cancel_does_not_overwrite_succeeded(db: Session, channel_a, slot_a):
+    """Запоздавшее payment_intent.canceled после succeeded не меняет платёж."""
+    order = Order(
+        channel_id=channel_a.id,
+        slot_id=slot_a.id,
+        advertiser_id=777001,
+        content={"text": "webhook"},
+        status=OrderStatus.PAID,
+    )
+    db.add(order)
+    db.flush()
+    invoice_id = f"pi_{uuid4().hex}"
+    db.add(
+        Payment(
+            order_id=order.id,
+            provider="stripe",
+            invoice_id=invoice_id,
+            amount=Decimal("100.00"),
+            status="succeeded",
+        )
+    )
+    event_id = f"evt_{uuid4().hex}"
+    db.add(
+        WebhookEvent(
+            provider="stripe",
+            event_id=event_id,
+            payload=json.loads(_stripe_event(event_id, invoice_id, "payment_intent.canceled")),
+        )
+    )
+    db.flush()
+
+    assert process_payment_event(db, "stripe", event_id) == "processed"
+    payment = db.query(Payment).filter(Payment.invoice_id == invoice_id).one()
+    assert payment.status == "succeeded"